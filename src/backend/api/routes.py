@@ -1,9 +1,19 @@
-from fastapi import APIRouter, Request, Response
+from fastapi import APIRouter, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Dict, List, Optional
-from backend.services.sentiment import get_sentiment
+from backend.services.sentiment import aggregate_stats, get_sentiment_batch, get_sentiment_response, cache_stats
 from backend.services.history import get_history
-from backend.services.feed import get_feed
+from backend.services.feed import feed_cache_stats, get_feed
+from backend.services.clients import get_registry
+from backend.services.scoring import finbert_batch_stats, score_cache_stats
+from backend.services.prefetch import prefetch_stats
+from backend.services.stream import check_tickers, sentiment_events, stream_stats
+from backend.services import warmup
+from backend.core.errors import raise_api_error
+from backend.core.logs import logging_stats
+from backend.core import metrics
+from backend.core.ratelimit import rate_limit_stats
 from backend.settings import is_mock_mode
 
 router = APIRouter()
@@ -12,6 +22,7 @@ class HighlightItem(BaseModel):
     source: str
     text: str
     score: float
+    model: Optional[str] = None
 
 class SentimentResponse(BaseModel):
     ticker: str
@@ -19,6 +30,21 @@ class SentimentResponse(BaseModel):
     sources: Dict[str, float]
     confidence: float
     highlights: Optional[List[HighlightItem]] = None
+    scoring: Optional[Dict[str, int]] = None
+
+class BatchError(BaseModel):
+    status: int
+    error: str
+    message: str
+
+class BatchItem(BaseModel):
+    ticker: str
+    cache: str
+    sentiment: Optional[SentimentResponse] = None
+    error: Optional[BatchError] = None
+
+class BatchResponse(BaseModel):
+    results: List[BatchItem]
 
 class FeedItem(BaseModel):
     id: str
@@ -37,16 +63,67 @@ class FeedResponse(BaseModel):
 def health_check():
     return {"status": "running"}
 
+@router.get("/ready")
+def ready():
+    """Readiness probe: 503 until startup warmup has loaded the models."""
+    return JSONResponse(warmup.readiness.snapshot(), status_code=200 if warmup.readiness.ready else 503)
+
+@router.get("/stats")
+def stats():
+    return {
+        "clients": get_registry().stats(),
+        "finbert": finbert_batch_stats(),
+        "score_cache": score_cache_stats(),
+        "cache": cache_stats(),
+        "feed_cache": feed_cache_stats(),
+        "aggregate": aggregate_stats(),
+        "prefetch": prefetch_stats(),
+        "stream": stream_stats(),
+        "ratelimit": rate_limit_stats(),
+        "logging": logging_stats(),
+    }
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics(request: Request):
+    if not metrics.METRICS_ENABLED:
+        raise_api_error(request, 404, "METRICS_DISABLED", "Metrics are disabled (METRICS_ENABLED=false).")
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+@router.get("/sentiment/batch", response_model=BatchResponse)
+async def sentiment_batch(request: Request, response: Response, tickers: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT")):
+    results, cache_status = await get_sentiment_batch(tickers.split(","), request)
+    response.headers["X-Cache"] = cache_status
+    response.headers["X-Mode"] = "MOCK" if cache_status == "MOCK" else "LIVE"
+    return {"results": results}
+
+@router.get("/sentiment/stream")
+async def sentiment_stream(request: Request, tickers: str = Query(..., description="Comma-separated symbols, e.g. AAPL,MSFT")):
+    return StreamingResponse(
+        sentiment_events(check_tickers(tickers.split(","), request), request),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", "X-Mode": "MOCK" if is_mock_mode() else "LIVE"},
+    )
+
 @router.get("/sentiment/{ticker}", response_model=SentimentResponse)
 async def sentiment(ticker: str, request: Request, response: Response):
-    payload, cache_status = await get_sentiment(ticker, request)
+    payload, body, cache_status = await get_sentiment_response(ticker, request)
+    if body is not None:
+        # Encoded once when the entry was computed; no model validation per hit.
+        return Response(content=body, media_type="application/json", headers={"X-Cache": cache_status, "X-Mode": "LIVE"})
     response.headers["X-Cache"] = cache_status
     response.headers["X-Mode"] = "MOCK" if cache_status == "MOCK" else "LIVE"
     return payload
 
 @router.get("/sentiment/history/{ticker}")
-async def sentiment_history(ticker: str, request: Request, response: Response):
-    payload, cache_status = await get_history(ticker, request)
+async def sentiment_history(
+    ticker: str,
+    request: Request,
+    response: Response,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    resolution: str = "1d",
+):
+    payload, cache_status = await get_history(ticker, request, start=start, end=end, resolution=resolution)
     response.headers["X-Cache"] = cache_status
     response.headers["X-Mode"] = "MOCK" if cache_status == "MOCK" else "LIVE"
     return payload
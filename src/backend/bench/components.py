@@ -0,0 +1,330 @@
+"""
+In-process microbenchmarks for the hot paths, on fixed synthetic corpora.
+
+    cd src && python -m backend.bench.components                    # run, save JSON
+    cd src && python -m backend.bench.components --quick            # fewer repeats
+    cd src && python -m backend.bench.components --compare OLD NEW  # diff two runs
+
+Every benchmark reports the median and p95 time per operation over several
+repeats. Results are written to bench_results/components-<commit>.json, so
+two commits can be compared with --compare; rows that got slower than
+--threshold are flagged and make the command exit non-zero.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List
+
+os.environ.setdefault("METRICS_ENABLED", "false")
+
+from backend.core.cache import TTLCache
+from backend.core.ratelimit import RateLimiter
+from backend.services import scoring
+from backend.services.scoring import compute_confidence, score_items
+
+SEED = 1729
+
+_SUBJECTS = ["TSLA", "AAPL", "NVDA", "Shares", "The stock", "Apple", "Tesla", "Nvidia", "Investors", "Analysts"]
+_VERBS = ["surge", "plunge", "beat estimates", "miss estimates", "rally", "slide", "hold steady", "crash", "soar", "stall"]
+_TAILS = [
+    "after earnings", "on weak guidance", "as demand grows", "amid lawsuit fears", "on record deliveries",
+    "after downgrade", "after upgrade", "despite strong sales", "on recall news", "ahead of the Fed",
+]
+
+
+def corpus(n: int, seed: int = SEED) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        text = f"{rng.choice(_SUBJECTS)} {rng.choice(_VERBS)} {rng.choice(_TAILS)} #{i}"
+        items.append({"source": "news" if i % 3 else "reddit", "text": text, "ts": None, "id": f"item-{i}"})
+    return items
+
+
+def _measure(fn: Callable[[], Any], ops: int, repeats: int) -> Dict[str, Any]:
+    fn()
+    per_op = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        per_op.append((time.perf_counter() - start) / ops)
+    per_op.sort()
+    median = statistics.median(per_op)
+    return {
+        "ops": ops,
+        "repeats": repeats,
+        "median_us": round(median * 1e6, 3),
+        "p95_us": round(per_op[min(len(per_op) - 1, int(len(per_op) * 0.95))] * 1e6, 3),
+        "ops_per_sec": round(1 / median, 1) if median else None,
+    }
+
+
+def bench_score_vader(repeats: int) -> Dict[str, Any]:
+    items = corpus(200)
+
+    def run():
+        scoring._vader_cache.clear()
+        score_items(items, finbert_top_n=0)
+
+    return _measure(run, len(items), repeats)
+
+
+def bench_score_vader_cached(repeats: int) -> Dict[str, Any]:
+    items = corpus(200)
+    return _measure(lambda: score_items(items, finbert_top_n=0), len(items), repeats)
+
+
+def bench_score_finbert_stub(repeats: int) -> Dict[str, Any]:
+    items = corpus(200)
+    stub = scoring.FinbertBatcher(runner=lambda texts: [0.1] * len(texts))
+    real = scoring._batcher
+    scoring._batcher = stub
+
+    def run():
+        scoring._vader_cache.clear()
+        scoring._finbert_cache.clear()
+        score_items(items, finbert_top_n=12)
+
+    try:
+        return _measure(run, len(items), repeats)
+    finally:
+        scoring._batcher = real
+
+
+def _dated_corpus(n: int) -> List[Dict[str, Any]]:
+    rng = random.Random(SEED)
+    now = datetime.now(timezone.utc)
+    items = corpus(n)
+    for it in items:
+        it["ts"] = now - timedelta(minutes=rng.randrange(1, 5000))
+    return items
+
+
+def _bench_large_window(columnar: bool) -> Callable[[int], Dict[str, Any]]:
+    """Age weighting and blending of a 2000-item window, Python loop vs numpy columns."""
+
+    def bench(repeats: int) -> Dict[str, Any]:
+        items = _dated_corpus(2000)
+        real = scoring.COLUMNAR_MIN_ITEMS
+        scoring.COLUMNAR_MIN_ITEMS = 1 if columnar else 10**9
+        try:
+            return _measure(lambda: score_items(items, finbert_top_n=0), len(items), repeats)
+        finally:
+            scoring.COLUMNAR_MIN_ITEMS = real
+
+    return bench
+
+
+def _bench_aggregate(columnar: bool) -> Callable[[int], Dict[str, Any]]:
+    """Sentiment payload (means, confidence, highlights) over 2000 scored documents."""
+
+    def bench(repeats: int) -> Dict[str, Any]:
+        from backend.services import sentiment
+
+        docs = [sentiment._document(s) for s in score_items(_dated_corpus(2000), finbert_top_n=0)]
+        real = sentiment.COLUMNAR_MIN_ITEMS
+        sentiment.COLUMNAR_MIN_ITEMS = 1 if columnar else 10**9
+        try:
+            return _measure(lambda: sentiment._aggregate("TSLA", docs), len(docs), repeats)
+        finally:
+            sentiment.COLUMNAR_MIN_ITEMS = real
+
+    return bench
+
+
+def bench_compute_confidence(repeats: int) -> Dict[str, Any]:
+    rng = random.Random(SEED)
+    scores = [rng.uniform(-1, 1) for _ in range(200)]
+    loops = 1000
+
+    def run():
+        for _ in range(loops):
+            compute_confidence(scores, has_news=True, has_reddit=True)
+
+    return _measure(run, loops, repeats)
+
+
+def bench_cache_contention(repeats: int) -> Dict[str, Any]:
+    """1000 concurrent lookups over 20 keys, each miss computing behind the per-key lock."""
+    keys = [f"docs:T{i}" for i in range(20)]
+    calls = 1000
+
+    async def compute():
+        await asyncio.sleep(0)
+        return {"v": 1}
+
+    async def burst():
+        cache = TTLCache()
+        await asyncio.gather(*[
+            cache.get_or_compute_swr(keys[i % len(keys)], ttl_seconds=60, stale_seconds=30, compute=compute)
+            for i in range(calls)
+        ])
+
+    return _measure(lambda: asyncio.run(burst()), calls, repeats)
+
+
+def bench_ratelimit_many_keys(repeats: int) -> Dict[str, Any]:
+    rng = random.Random(SEED)
+    keys = [f"10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(256)}:/sentiment/{{ticker}}" for _ in range(50_000)]
+
+    def run():
+        limiter = RateLimiter(max_requests=30, window_seconds=60, max_keys=20_000)
+        allow = limiter.allow
+        for k in keys:
+            allow(k)
+
+    return _measure(run, len(keys), repeats)
+
+
+def _payload() -> Dict[str, Any]:
+    rng = random.Random(SEED)
+    return {
+        "ticker": "TSLA",
+        "sentiment": 0.1234,
+        "sources": {"newsapi": 0.2, "reddit": -0.05},
+        "confidence": 0.81,
+        "highlights": [
+            {"source": "newsapi", "text": it["text"], "score": round(rng.uniform(-1, 1), 4)} for it in corpus(4)
+        ],
+    }
+
+
+def bench_json_payload(repeats: int) -> Dict[str, Any]:
+    payload = _payload()
+    loops = 5000
+
+    def run():
+        for _ in range(loops):
+            json.dumps(payload, separators=(",", ":"))
+
+    return _measure(run, loops, repeats)
+
+
+def bench_json_response(repeats: int) -> Dict[str, Any]:
+    """The path FastAPI takes for a route: validate into the response model, then render."""
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+
+    from backend.api.routes import SentimentResponse
+
+    payload = _payload()
+    loops = 2000
+
+    def run():
+        for _ in range(loops):
+            JSONResponse(jsonable_encoder(SentimentResponse(**payload))).body
+
+    return _measure(run, loops, repeats)
+
+
+def bench_json_response_preencoded(repeats: int) -> Dict[str, Any]:
+    """The cached-hit path with PRESERIALIZED_RESPONSES: the body was encoded once at compute time."""
+    from fastapi.responses import Response
+
+    from backend.core.encoding import dumps
+
+    body = dumps(_payload()).decode("utf-8")
+    loops = 2000
+
+    def run():
+        for _ in range(loops):
+            Response(content=body, media_type="application/json").body
+
+    return _measure(run, loops, repeats)
+
+
+BENCHMARKS: Dict[str, Callable[[int], Dict[str, Any]]] = {
+    "score_items.vader_cold": bench_score_vader,
+    "score_items.vader_cached": bench_score_vader_cached,
+    "score_items.finbert_stub": bench_score_finbert_stub,
+    "score_items.window_2000_python": _bench_large_window(columnar=False),
+    "score_items.window_2000_columnar": _bench_large_window(columnar=True),
+    "aggregate.window_2000_python": _bench_aggregate(columnar=False),
+    "aggregate.window_2000_columnar": _bench_aggregate(columnar=True),
+    "compute_confidence": bench_compute_confidence,
+    "ttlcache.swr_contention": bench_cache_contention,
+    "ratelimiter.allow_50k_keys": bench_ratelimit_many_keys,
+    "json.payload_dumps": bench_json_payload,
+    "json.response_render": bench_json_response,
+    "json.response_preencoded": bench_json_response_preencoded,
+}
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True, stderr=subprocess.DEVNULL).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def run(selected: List[str], repeats: int) -> Dict[str, Any]:
+    results = {}
+    for name in selected:
+        results[name] = BENCHMARKS[name](repeats)
+        r = results[name]
+        print(f"{name:<32} median {r['median_us']:>10.3f} us/op   p95 {r['p95_us']:>10.3f} us/op")
+    return {
+        "commit": _git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": SEED,
+        "results": results,
+    }
+
+
+def compare(old_path: str, new_path: str, threshold: float) -> int:
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+
+    print(f"{'benchmark':<32} {old['commit']:>12} {new['commit']:>12}   change")
+    regressions = 0
+    for name, r in new["results"].items():
+        before = old["results"].get(name)
+        if not before:
+            print(f"{name:<32} {'-':>12} {r['median_us']:>12.3f}   new")
+            continue
+        change = r["median_us"] / before["median_us"] - 1 if before["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        print(f"{name:<32} {before['median_us']:>12.3f} {r['median_us']:>12.3f}   {change:+.1%}{flag}")
+    return 1 if regressions else 0
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Component microbenchmarks.")
+    parser.add_argument("--only", nargs="*", choices=sorted(BENCHMARKS), help="run a subset")
+    parser.add_argument("--repeats", type=int, default=15)
+    parser.add_argument("--quick", action="store_true", help="3 repeats, for a smoke run")
+    parser.add_argument("--out", help="result file (default bench_results/components-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"))
+    parser.add_argument("--threshold", type=float, default=0.10, help="slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    if args.compare:
+        return compare(*args.compare, threshold=args.threshold)
+
+    report = run(args.only or list(BENCHMARKS), 3 if args.quick else args.repeats)
+    out = args.out or os.path.join("bench_results", f"components-{report['commit']}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
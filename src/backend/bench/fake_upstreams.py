@@ -0,0 +1,275 @@
+"""
+Local stand-ins for NewsAPI and Reddit, for driving the whole pipeline offline.
+
+Both speak enough of the real wire format for newsapi-python and praw:
+
+    NewsAPI  GET  /v2/everything?q=...&pageSize=N
+    Reddit   POST /api/v1/access_token
+             GET  /r/<sub>/search?q=...&limit=N
+
+Latency, 5xx error rate and 429 throttle rate are configurable per server,
+and every request is counted (GET /__stats returns the counters). Point the
+app at them with NEWSAPI_BASE_URL, REDDIT_URL and REDDIT_OAUTH_URL.
+
+    cd src && python -m backend.bench.fake_upstreams --latency-ms 80
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+_TICKER = re.compile(r"\$?\b([A-Z]{1,5})\b")
+_STOPWORDS = {"OR", "AND", "NOT"}
+
+_HEADLINES = [
+    "{t} beats estimates as revenue jumps",
+    "{t} shares slide after guidance cut",
+    "Analysts upgrade {t} on strong demand",
+    "{t} faces lawsuit over disclosures",
+    "Why {t} stock is rallying today",
+    "{t} misses on earnings, stock falls",
+    "{t} announces buyback, shares rise",
+    "Is {t} overvalued after the run-up?",
+]
+_POSTS = [
+    "{t} to the moon, loading calls",
+    "Thoughts on {t} after earnings?",
+    "{t} is a terrible buy at these levels",
+    "Holding {t} long term, not worried",
+    "DD: {t} is undervalued",
+    "Sold all my {t} today",
+]
+
+
+def _tickers(query: str) -> List[str]:
+    found = [t for t in _TICKER.findall(query) if t not in _STOPWORDS]
+    return found or ["SPY"]
+
+
+class FaultProfile:
+    def __init__(self, latency_ms: float = 50.0, jitter_ms: float = 20.0, error_rate: float = 0.0, throttle_rate: float = 0.0, seed: int = 7) -> None:
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def draw(self) -> Dict[str, Any]:
+        with self._lock:
+            delay = max(0.0, self._rng.gauss(self.latency_ms, self.jitter_ms)) / 1000.0
+            roll = self._rng.random()
+        if roll < self.throttle_rate:
+            return {"delay": delay, "status": 429}
+        if roll < self.throttle_rate + self.error_rate:
+            return {"delay": delay, "status": 500}
+        return {"delay": delay, "status": 200}
+
+
+class _FakeServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, handler, faults: FaultProfile) -> None:
+        super().__init__(addr, handler)
+        self.faults = faults
+        self.counts: Dict[str, int] = {}
+        self._count_lock = threading.Lock()
+
+    def count(self, key: str) -> None:
+        with self._count_lock:
+            self.counts[key] = self.counts.get(key, 0) + 1
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _FakeServer
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def _send(self, status: int, body: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _faulted(self, name: str) -> bool:
+        self.server.count(name)
+        fault = self.server.faults.draw()
+        time.sleep(fault["delay"])
+        if fault["status"] == 429:
+            self.server.count(f"{name}:429")
+            self._send(429, {"status": "error", "code": "rateLimited", "message": "Too many requests"}, {"Retry-After": "1"})
+            return True
+        if fault["status"] == 500:
+            self.server.count(f"{name}:500")
+            self._send(500, {"status": "error", "code": "unexpectedError", "message": "Injected failure"})
+            return True
+        return False
+
+    def _read_body(self) -> None:
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+    def do_GET(self) -> None:
+        url = urlparse(self.path)
+        if url.path == "/__stats":
+            self._send(200, dict(self.server.counts))
+            return
+        self.route(url.path, parse_qs(url.query))
+
+    def do_POST(self) -> None:
+        self._read_body()
+        url = urlparse(self.path)
+        self.route(url.path, parse_qs(url.query))
+
+    def route(self, path: str, query: Dict[str, List[str]]) -> None:
+        self._send(404, {"error": "not found"})
+
+
+class _NewsHandler(_Handler):
+    def route(self, path: str, query: Dict[str, List[str]]) -> None:
+        if path.rstrip("/") != "/v2/everything":
+            return super().route(path, query)
+        if self._faulted("newsapi.everything"):
+            return
+
+        q = (query.get("q") or [""])[0]
+        size = int((query.get("pageSize") or ["20"])[0])
+        tickers = _tickers(q)
+        rng = random.Random(q)
+        now = datetime.now(timezone.utc)
+        # Rotate in a couple of new stories per minute so refreshes see fresh items.
+        epoch = int(now.timestamp() // 60)
+        articles = []
+        for i in range(size):
+            t = tickers[i % len(tickers)]
+            n = epoch * size + i
+            articles.append({
+                "source": {"id": None, "name": rng.choice(["Reuters", "Bloomberg", "CNBC", "MarketWatch"])},
+                "title": rng.choice(_HEADLINES).format(t=t) + f" ({n})",
+                "description": f"Coverage of {t}.",
+                "url": f"https://news.example/{t}/{n}",
+                "publishedAt": (now - timedelta(minutes=rng.randrange(5, 2000))).strftime("%Y-%m-%dT%H:%M:%SZ"),
+            })
+        self._send(200, {"status": "ok", "totalResults": len(articles), "articles": articles})
+
+
+class _RedditHandler(_Handler):
+    def route(self, path: str, query: Dict[str, List[str]]) -> None:
+        if path.rstrip("/") == "/api/v1/access_token":
+            self.server.count("reddit.token")
+            self._send(200, {"access_token": "fake-token", "token_type": "bearer", "expires_in": 3600, "scope": "*"})
+            return
+
+        m = re.match(r"^/r/([^/]+)/search/?$", path)
+        if not m:
+            return super().route(path, query)
+        if self._faulted("reddit.search"):
+            return
+
+        sub = m.group(1)
+        q = (query.get("q") or [""])[0]
+        limit = min(100, int((query.get("limit") or ["15"])[0]))
+        tickers = _tickers(q)
+        rng = random.Random(f"{sub}:{q}")
+        now = time.time()
+        children = []
+        for i in range(limit):
+            t = tickers[i % len(tickers)]
+            post_id = f"{sub[:3]}{zlib.crc32(f'{q}:{i}'.encode('utf-8')):x}"
+            children.append({
+                "kind": "t3",
+                "data": {
+                    "id": post_id,
+                    "name": f"t3_{post_id}",
+                    "title": rng.choice(_POSTS).format(t=t),
+                    "created_utc": now - rng.randrange(60, 200_000),
+                    "subreddit": sub,
+                    "score": rng.randrange(0, 5000),
+                    "permalink": f"/r/{sub}/comments/{post_id}/",
+                },
+            })
+        self._send(200, {"kind": "Listing", "data": {"after": None, "before": None, "dist": len(children), "children": children}})
+
+
+class FakeUpstream:
+    """One fake upstream running in a background thread on an ephemeral port."""
+
+    def __init__(self, handler, faults: Optional[FaultProfile] = None, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.server = _FakeServer((host, port), handler, faults or FaultProfile())
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def counts(self) -> Dict[str, int]:
+        return dict(self.server.counts)
+
+    def start(self) -> "FakeUpstream":
+        self._thread = threading.Thread(target=self.server.serve_forever, name="fake-upstream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def fake_newsapi(faults: Optional[FaultProfile] = None, port: int = 0) -> FakeUpstream:
+    return FakeUpstream(_NewsHandler, faults, port=port)
+
+
+def fake_reddit(faults: Optional[FaultProfile] = None, port: int = 0) -> FakeUpstream:
+    return FakeUpstream(_RedditHandler, faults, port=port)
+
+
+def upstream_env(news: FakeUpstream, reddit: FakeUpstream) -> Dict[str, str]:
+    """Environment that points the app at the fakes."""
+    return {
+        "NEWS_API_KEY": "fake-key",
+        "NEWSAPI_BASE_URL": news.url,
+        "REDDIT_CLIENT_ID": "fake-id",
+        "REDDIT_CLIENT_SECRET": "fake-secret",
+        "REDDIT_URL": reddit.url,
+        "REDDIT_OAUTH_URL": reddit.url,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run fake NewsAPI and Reddit servers.")
+    parser.add_argument("--news-port", type=int, default=8101)
+    parser.add_argument("--reddit-port", type=int, default=8102)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter-ms", type=float, default=20.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--throttle-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    def profile(seed: int) -> FaultProfile:
+        return FaultProfile(args.latency_ms, args.jitter_ms, args.error_rate, args.throttle_rate, seed=seed)
+
+    news = fake_newsapi(profile(1), args.news_port).start()
+    reddit = fake_reddit(profile(2), args.reddit_port).start()
+    for k, v in upstream_env(news, reddit).items():
+        print(f"export {k}={v}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        news.stop()
+        reddit.stop()
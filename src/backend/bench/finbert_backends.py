@@ -0,0 +1,179 @@
+"""
+FinBERT backends side by side: latency, throughput and agreement.
+
+    cd src && python -m backend.bench.finbert_backends
+    cd src && python -m backend.bench.finbert_backends --threads 1 2 4 --json finbert.json
+
+Runs every backend (pipeline, ONNX fp32, ONNX int8) over a fixed set of
+labelled headlines. For each one it reports load time, single-text latency
+p50/p95, batched throughput, label agreement with the pipeline backend,
+mean absolute score difference from it, and accuracy against the hand
+labels. Backends whose dependencies are missing are listed as skipped.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from backend.services.scoring import FINBERT_ONNX_DIR, FinbertUnavailable, OnnxScorer, PipelineScorer, export_finbert_onnx, onnx_model_path
+
+# (headline, expected label)
+HEADLINES: List[Tuple[str, str]] = [
+    ("Apple beats quarterly revenue estimates on strong iPhone sales", "positive"),
+    ("Tesla shares plunge after deliveries miss expectations", "negative"),
+    ("Nvidia raises full-year guidance as data center demand surges", "positive"),
+    ("Boeing cuts production forecast amid supply chain problems", "negative"),
+    ("Microsoft to hold annual shareholder meeting in December", "neutral"),
+    ("JPMorgan profit jumps 20% on higher interest income", "positive"),
+    ("Intel announces layoffs as PC market slump deepens", "negative"),
+    ("Amazon opens new distribution center in Ohio", "neutral"),
+    ("Netflix subscriber growth tops forecasts, stock soars", "positive"),
+    ("Disney faces shareholder lawsuit over streaming losses", "negative"),
+    ("Meta completes previously announced share repurchase program", "neutral"),
+    ("AMD wins major cloud contract, shares rally", "positive"),
+    ("Bank of America downgraded to underperform by analysts", "negative"),
+    ("Goldman Sachs names new head of asset management", "neutral"),
+    ("Alphabet posts record ad revenue and expands buyback", "positive"),
+    ("Ford recalls 500,000 vehicles over brake defect", "negative"),
+    ("Coca-Cola declares regular quarterly dividend", "neutral"),
+    ("Pfizer drug trial succeeds, sending shares higher", "positive"),
+    ("Wells Fargo fined $3 billion over consumer abuses", "negative"),
+    ("Walmart to report earnings next Thursday", "neutral"),
+    ("Starbucks same-store sales rebound strongly in China", "positive"),
+    ("Nike warns of weaker margins as inventories pile up", "negative"),
+    ("Oracle moves headquarters to Austin, Texas", "neutral"),
+    ("Visa volumes grow faster than expected in holiday quarter", "positive"),
+    ("Credit Suisse shares hit record low on funding fears", "negative"),
+    ("Salesforce appoints new chief financial officer", "neutral"),
+    ("Costco membership income rises, beating estimates", "positive"),
+    ("PayPal slashes outlook, stock tumbles 25%", "negative"),
+    ("Shell to publish annual report in March", "neutral"),
+    ("Caterpillar raises dividend for 30th consecutive year", "positive"),
+    ("Zoom revenue growth stalls as pandemic demand fades", "negative"),
+    ("IBM hosts investor day in New York", "neutral"),
+]
+
+
+def _label(score: float) -> str:
+    if score > 0:
+        return "positive"
+    if score < 0:
+        return "negative"
+    return "neutral"
+
+
+def _percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def _onnx(onnx_dir: str, threads: int, quantize: bool) -> OnnxScorer:
+    # The export is counted in load_s the first time; the scorer itself never exports.
+    if not os.path.exists(onnx_model_path(onnx_dir, quantize)):
+        export_finbert_onnx(onnx_dir, quantize=quantize)
+    return OnnxScorer(model_dir=onnx_dir, threads=threads, quantize=quantize)
+
+
+def _backends(threads: int, onnx_dir: str) -> Dict[str, Callable[[], Any]]:
+    return {
+        "pipeline": lambda: PipelineScorer(threads=threads),
+        "onnx-fp32": lambda: _onnx(onnx_dir, threads, quantize=False),
+        "onnx-int8": lambda: _onnx(onnx_dir, threads, quantize=True),
+    }
+
+
+def bench_backend(factory: Callable[[], Any], texts: List[str], batch_size: int, rounds: int) -> Dict[str, Any]:
+    start = time.perf_counter()
+    scorer = factory()
+    load_s = time.perf_counter() - start
+
+    scorer.score(texts[:2])
+
+    single = []
+    for _ in range(rounds):
+        for t in texts:
+            t0 = time.perf_counter()
+            scorer.score([t])
+            single.append((time.perf_counter() - t0) * 1000)
+
+    corpus = texts * max(1, (4 * batch_size) // len(texts))
+    t0 = time.perf_counter()
+    for _ in range(rounds):
+        for i in range(0, len(corpus), batch_size):
+            scorer.score(corpus[i:i + batch_size])
+    elapsed = time.perf_counter() - t0
+
+    return {
+        "load_s": round(load_s, 2),
+        "single_p50_ms": round(statistics.median(single), 2),
+        "single_p95_ms": round(_percentile(single, 0.95), 2),
+        "throughput_per_s": round(rounds * len(corpus) / elapsed, 1),
+        "scores": scorer.score(texts),
+    }
+
+
+def compare(results: Dict[str, Dict[str, Any]], expected: List[str], reference: Optional[str] = "pipeline") -> None:
+    ref = results.get(reference, {}).get("scores") if reference else None
+    for r in results.values():
+        scores = r.get("scores")
+        if scores is None:
+            continue
+        labels = [_label(s) for s in scores]
+        r["accuracy"] = round(sum(a == b for a, b in zip(labels, expected)) / len(expected), 3)
+        if ref is not None:
+            ref_labels = [_label(s) for s in ref]
+            r["agreement"] = round(sum(a == b for a, b in zip(labels, ref_labels)) / len(ref), 3)
+            r["mean_abs_diff"] = round(sum(abs(a - b) for a, b in zip(scores, ref)) / len(ref), 4)
+
+
+def run(threads: List[int], batch_size: int, rounds: int, onnx_dir: str) -> Dict[str, Any]:
+    texts = [t for t, _ in HEADLINES]
+    expected = [label for _, label in HEADLINES]
+    report: Dict[str, Any] = {"headlines": len(texts), "batch_size": batch_size, "rounds": rounds, "runs": {}}
+
+    for n in threads:
+        results: Dict[str, Dict[str, Any]] = {}
+        for name, factory in _backends(n, onnx_dir).items():
+            try:
+                results[name] = bench_backend(factory, texts, batch_size, rounds)
+            except FinbertUnavailable as e:
+                results[name] = {"skipped": str(e)}
+        compare(results, expected)
+        report["runs"][f"threads={n or 'default'}"] = results
+    return report
+
+
+def _print(report: Dict[str, Any]) -> None:
+    cols = ("load_s", "single_p50_ms", "single_p95_ms", "throughput_per_s", "agreement", "mean_abs_diff", "accuracy")
+    for run_name, results in report["runs"].items():
+        print(f"\n{run_name}  ({report['headlines']} headlines, batch {report['batch_size']})")
+        print(f"{'backend':<12}" + "".join(f"{c:>18}" for c in cols))
+        for name, r in results.items():
+            if "skipped" in r:
+                print(f"{name:<12}  skipped: {r['skipped']}")
+                continue
+            print(f"{name:<12}" + "".join(f"{r.get(c, '-'):>18}" for c in cols))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Compare FinBERT backends.")
+    parser.add_argument("--threads", type=int, nargs="*", default=[0], help="thread counts to try; 0 is the runtime default")
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--onnx-dir", default=FINBERT_ONNX_DIR, help="exported model directory (exported on first use)")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = run(args.threads, args.batch_size, args.rounds, args.onnx_dir)
+    _print(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+End-to-end load harness: the real app, fake upstreams, Zipfian ticker traffic.
+
+Starts fake NewsAPI and Reddit servers (bench/fake_upstreams.py), launches
+the app under uvicorn pointed at them, and sends /sentiment/{ticker}
+requests at a fixed arrival rate. Each request's ticker is drawn from a
+Zipf(s) popularity distribution over --tickers symbols. Reports latency
+percentiles, status and X-Cache mix, and how many upstream calls the
+traffic caused.
+
+    cd src && python -m backend.bench.load --rps 50 --duration 30
+    cd src && python -m backend.bench.load --latency-ms 300 --throttle-rate 0.05 --json out.json
+
+Arrivals are open-loop: a slow server does not slow the request schedule
+down, so queueing shows up in the percentiles instead of being hidden.
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import random
+import socket
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from backend.bench.fake_upstreams import FaultProfile, fake_newsapi, fake_reddit, upstream_env
+
+SRC_DIR = Path(__file__).resolve().parents[2]
+
+
+@dataclass
+class LoadConfig:
+    rps: float = 50.0
+    duration: float = 20.0
+    tickers: int = 200
+    zipf_s: float = 1.1
+    seed: int = 42
+    latency_ms: float = 80.0
+    jitter_ms: float = 30.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    timeout: float = 30.0
+    vader_only: Optional[bool] = None
+    app_url: Optional[str] = None
+
+
+def ticker_universe(n: int) -> List[str]:
+    letters = string.ascii_uppercase
+    codes = ("".join(p) for p in itertools.chain(itertools.product(letters, repeat=3), itertools.product(letters, repeat=4)))
+    return list(itertools.islice(codes, n))
+
+
+def zipf_sequence(tickers: List[str], s: float, count: int, seed: int) -> List[str]:
+    """count draws where the k-th most popular ticker has weight 1 / k**s."""
+    cum, total = [], 0.0
+    for k in range(1, len(tickers) + 1):
+        total += 1.0 / k ** s
+        cum.append(total)
+    return random.Random(seed).choices(tickers, cum_weights=cum, k=count)
+
+
+def percentile(sorted_values: List[float], p: float) -> Optional[float]:
+    if not sorted_values:
+        return None
+    rank = max(0, min(len(sorted_values) - 1, int(round(p / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _wait_up(url: str, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{url}/health", timeout=aiohttp.ClientTimeout(total=1)) as r:
+                    if r.status == 200:
+                        return
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                pass
+            await asyncio.sleep(0.1)
+    raise RuntimeError(f"app at {url} did not come up within {timeout:.0f}s")
+
+
+def start_app(env: Dict[str, str], port: int) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"],
+        cwd=SRC_DIR,
+        env={**os.environ, **env},
+    )
+
+
+async def _drive(url: str, sequence: List[str], rps: float, timeout: float) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+    connector = aiohttp.TCPConnector(limit=0)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout) as session:
+        async def one(ticker: str) -> None:
+            start = time.perf_counter()
+            try:
+                async with session.get(f"{url}/sentiment/{ticker}", headers={"X-Forwarded-For": "10.9.0.1"}) as r:
+                    await r.read()
+                    results.append({"status": r.status, "cache": r.headers.get("X-Cache", "-"), "ms": (time.perf_counter() - start) * 1000})
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                results.append({"status": 0, "cache": "-", "ms": (time.perf_counter() - start) * 1000, "error": type(e).__name__})
+
+        tasks = []
+        t0 = time.perf_counter()
+        for i, ticker in enumerate(sequence):
+            delay = t0 + i / rps - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(one(ticker)))
+        await asyncio.gather(*tasks)
+    return results
+
+
+def _mix(values: List[Any]) -> Dict[str, int]:
+    out: Dict[str, int] = {}
+    for v in values:
+        out[str(v)] = out.get(str(v), 0) + 1
+    return dict(sorted(out.items()))
+
+
+def summarize(results: List[Dict[str, Any]], elapsed: float, upstream: Dict[str, Dict[str, int]], config: LoadConfig) -> Dict[str, Any]:
+    ok = sorted(r["ms"] for r in results if r["status"] == 200)
+    every = sorted(r["ms"] for r in results)
+    return {
+        "config": asdict(config),
+        "requests": len(results),
+        "achieved_rps": round(len(results) / elapsed, 1) if elapsed else None,
+        "status": _mix([r["status"] for r in results]),
+        "cache": _mix([r["cache"] for r in results]),
+        "latency_ms": {
+            "p50": percentile(every, 50),
+            "p95": percentile(every, 95),
+            "p99": percentile(every, 99),
+            "max": every[-1] if every else None,
+        },
+        "latency_ms_200": {"p50": percentile(ok, 50), "p95": percentile(ok, 95), "p99": percentile(ok, 99)},
+        "upstream": upstream,
+    }
+
+
+async def run_load(config: LoadConfig) -> Dict[str, Any]:
+    news = fake_newsapi(FaultProfile(config.latency_ms, config.jitter_ms, config.error_rate, config.throttle_rate, seed=config.seed)).start()
+    reddit = fake_reddit(FaultProfile(config.latency_ms, config.jitter_ms, config.error_rate, config.throttle_rate, seed=config.seed + 1)).start()
+    proc = None
+    tmp = tempfile.TemporaryDirectory()
+    try:
+        url = config.app_url
+        if url is None:
+            vader_only = config.vader_only
+            if vader_only is None:
+                vader_only = importlib.util.find_spec("transformers") is None
+            port = _free_port()
+            env = {
+                **upstream_env(news, reddit),
+                "MOCK": "false",
+                "RATE_LIMIT_MAX_REQUESTS": str(10**9),
+                "HISTORY_DB_PATH": os.path.join(tmp.name, "history.sqlite3"),
+                "LOG_FILE": os.path.join(tmp.name, "app.log"),
+            }
+            if vader_only:
+                env["FINBERT_TOP_N"] = "0"
+            proc = start_app(env, port)
+            url = f"http://127.0.0.1:{port}"
+        await _wait_up(url, 30)
+
+        count = max(1, int(config.rps * config.duration))
+        sequence = zipf_sequence(ticker_universe(config.tickers), config.zipf_s, count, config.seed)
+        start = time.perf_counter()
+        results = await _drive(url, sequence, config.rps, config.timeout)
+        elapsed = time.perf_counter() - start
+
+        report = summarize(results, elapsed, {"newsapi": news.counts(), "reddit": reddit.counts()}, config)
+        report["distinct_tickers"] = len(set(sequence))
+        return report
+    finally:
+        if proc is not None:
+            proc.terminate()
+            try:
+                proc.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+        news.stop()
+        reddit.stop()
+        tmp.cleanup()
+
+
+def _print(report: Dict[str, Any]) -> None:
+    lat = report["latency_ms"]
+    print(f"requests        {report['requests']}  ({report['achieved_rps']} req/s, {report['distinct_tickers']} distinct tickers)")
+    print(f"status          {report['status']}")
+    print(f"cache           {report['cache']}")
+    print("latency ms      " + "  ".join(f"{k} {v:.1f}" for k, v in lat.items() if v is not None))
+    print(f"upstream        newsapi {report['upstream']['newsapi']}")
+    print(f"                reddit  {report['upstream']['reddit']}")
+
+
+def main() -> int:
+    defaults = LoadConfig()
+    parser = argparse.ArgumentParser(description="Load the app against fake upstreams.")
+    parser.add_argument("--rps", type=float, default=defaults.rps)
+    parser.add_argument("--duration", type=float, default=defaults.duration, help="seconds of traffic")
+    parser.add_argument("--tickers", type=int, default=defaults.tickers, help="size of the ticker universe")
+    parser.add_argument("--zipf-s", type=float, default=defaults.zipf_s, help="popularity skew; higher is more skewed")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms, help="mean upstream latency")
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="fraction of upstream calls answered 500")
+    parser.add_argument("--throttle-rate", type=float, default=defaults.throttle_rate, help="fraction answered 429")
+    parser.add_argument("--vader-only", action="store_true", default=None, help="set FINBERT_TOP_N=0 (default when transformers is missing)")
+    parser.add_argument("--app-url", help="load an already running app instead of starting one")
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    config = LoadConfig(
+        rps=args.rps,
+        duration=args.duration,
+        tickers=args.tickers,
+        zipf_s=args.zipf_s,
+        seed=args.seed,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        vader_only=args.vader_only,
+        app_url=args.app_url,
+    )
+    report = asyncio.run(run_load(config))
+    _print(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""
+Requests/sec through the legacy BaseHTTPMiddleware functions vs the ASGI
+middleware classes, on /health and on a cached /sentiment/{ticker}.
+
+    cd src && python -m backend.bench.middleware [--requests 5000]
+
+Both apps share the real router and sentiment cache and are driven
+in-process through httpx's ASGI transport, so the difference between the
+two rows is the middleware stack alone.
+"""
+import argparse
+import asyncio
+import os
+import time
+from uuid import uuid4
+
+os.environ["MOCK"] = "false"
+os.environ.setdefault("RATE_LIMIT_MAX_REQUESTS", "1000000000")
+
+import httpx
+from fastapi import FastAPI, Request
+
+from backend.api.routes import router
+from backend.core.middleware import RequestIdMiddleware
+from backend.core.ratelimit import RateLimitMiddleware, _key_for, _rejection, limiter
+from backend.services import sentiment as sentiment_mod
+from backend.services.scoring import ScoredItem
+
+
+# The BaseHTTPMiddleware functions the ASGI classes replaced, kept here as the baseline.
+async def attach_request_id(request: Request, call_next):
+    request_id = uuid4().hex[:12]
+    request.state.request_id = request_id
+    response = await call_next(request)
+    response.headers["X-Request-ID"] = request_id
+    return response
+
+
+async def rate_limit_middleware(request: Request, call_next):
+    if request.method == "OPTIONS":
+        return await call_next(request)
+
+    key = _key_for(request.scope)
+
+    if not limiter.allow(key):
+        return _rejection(request.scope, key)
+
+    return await call_next(request)
+
+
+def _legacy_app() -> FastAPI:
+    app = FastAPI()
+    app.middleware("http")(attach_request_id)
+    app.middleware("http")(rate_limit_middleware)
+    app.include_router(router)
+    return app
+
+
+def _asgi_app() -> FastAPI:
+    app = FastAPI()
+    app.add_middleware(RequestIdMiddleware)
+    app.add_middleware(RateLimitMiddleware)
+    app.include_router(router)
+    return app
+
+
+def _seed_cache(ticker: str) -> None:
+    docs = sentiment_mod._document_set(
+        ticker,
+        [
+            ScoredItem(source="news", text=f"{ticker} beats estimates", score=0.6),
+            ScoredItem(source="reddit", text=f"{ticker} looks expensive", score=-0.2),
+        ],
+    )
+    sentiment_mod._cache.set(f"docs:{ticker}", docs, ttl_seconds=3600, stale_seconds=3600)
+
+
+async def _rps(app: FastAPI, path: str, n: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(50):
+            (await client.get(path)).raise_for_status()
+
+        remaining = n
+
+        async def worker() -> None:
+            nonlocal remaining
+            while remaining > 0:
+                remaining -= 1
+                (await client.get(path)).raise_for_status()
+
+        start = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return n / (time.perf_counter() - start)
+
+
+async def main(n: int, concurrency: int) -> None:
+    _seed_cache("TSLA")
+    apps = {"BaseHTTPMiddleware": _legacy_app(), "ASGI": _asgi_app()}
+
+    print(f"{'path':<20} {'stack':<20} {'req/s':>10}")
+    for path in ("/health", "/sentiment/TSLA"):
+        for name, app in apps.items():
+            rps = await _rps(app, path, n, concurrency)
+            print(f"{path:<20} {name:<20} {rps:>10.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
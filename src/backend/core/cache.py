@@ -1,47 +1,174 @@
 from __future__ import annotations
 
 import asyncio
+import json
+import logging
+import os
+import sys
 import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
 from dataclasses import dataclass
-from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.metrics import CACHE_REQUESTS, REFRESH_SECONDS, REFRESHES, STAGE_SECONDS
+
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "10000"))
+CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+CACHE_SWEEP_INTERVAL_SECONDS = float(os.getenv("CACHE_SWEEP_INTERVAL_SECONDS", "30"))
+
+
+def _estimate_size(value: Any) -> int:
+  try:
+    return len(json.dumps(value, default=str)) + 64
+  except (TypeError, ValueError):
+    return sys.getsizeof(value) + 64
 
 
 @dataclass
 class CacheEntry:
   value: Any
-  stale_at: float    
-  expires_at: float   
+  stale_at: float
+  expires_at: float
+  size: int = 0
 
 class TTLCache:
-  def __init__(self) -> None:
-    self._data: Dict[str, CacheEntry] = {}
+  """
+  In-process SWR cache, bounded by entry count and an estimated byte budget.
+
+  Entries are kept in LRU order and evicted from the cold end once either
+  limit is exceeded. Expired entries are swept every sweep_interval seconds
+  (piggybacked on cache traffic), and a per-key lock only lives while some
+  request is holding or waiting on it. All deadlines use time.monotonic().
+  """
+
+  def __init__(
+    self,
+    max_entries: int = CACHE_MAX_ENTRIES,
+    max_bytes: int = CACHE_MAX_BYTES,
+    sweep_interval: float = CACHE_SWEEP_INTERVAL_SECONDS,
+    name: str = "default",
+  ) -> None:
+    self.name = name
+    self.max_entries = max(1, max_entries)
+    self.max_bytes = max(1, max_bytes)
+    self.sweep_interval = sweep_interval
+    self._data: "OrderedDict[str, CacheEntry]" = OrderedDict()
+    self._bytes = 0
     self._locks: Dict[str, asyncio.Lock] = {}
+    self._lock_users: Dict[str, int] = {}
     self._global = asyncio.Lock()
     self._refreshing: set[str] = set()
+    self._last_sweep = time.monotonic()
+    self._listeners: List[Callable[[str, Any], None]] = []
+    self._counters = {
+      "hits": 0,
+      "stale": 0,
+      "misses": 0,
+      "evicted_lru": 0,
+      "evicted_expired": 0,
+    }
+
+  def _drop(self, key: str) -> None:
+    e = self._data.pop(key, None)
+    if e is not None:
+      self._bytes -= e.size
 
   def get_entry(self, key: str) -> Optional[CacheEntry]:
     e = self._data.get(key)
     if not e:
       return None
-    now = time.time()
+    now = time.monotonic()
     if now >= e.expires_at:
-      self._data.pop(key, None)
+      self._drop(key)
+      self._counters["evicted_expired"] += 1
       return None
+    self._data.move_to_end(key)
     return e
 
-  def set(self, key: str, value: Any, ttl_seconds: int, stale_seconds: int) -> None:
-    now = time.time()
+  def set(self, key: str, value: Any, ttl_seconds: int, stale_seconds: int, size: Optional[int] = None) -> None:
+    """Store value; size is its byte cost if the caller already knows it (e.g. its encoded length), else estimated."""
+    now = time.monotonic()
+    self._drop(key)
+    size = _estimate_size(value) if size is None else size + 64
     self._data[key] = CacheEntry(
       value=value,
       stale_at=now + stale_seconds,
       expires_at=now + ttl_seconds,
+      size=size,
     )
+    self._bytes += size
+    self._maybe_sweep(now)
+    self._evict_over_budget()
+    for listener in self._listeners:
+      try:
+        listener(key, value)
+      except Exception as e:
+        logging.warning(f"Cache listener failed for {key}: {e}")
 
-  async def lock_for(self, key: str) -> asyncio.Lock:
-    async with self._global:
-      if key not in self._locks:
-        self._locks[key] = asyncio.Lock()
-      return self._locks[key]
+  def add_listener(self, listener: Callable[[str, Any], None]) -> None:
+    """Call listener(key, value) after every write."""
+    self._listeners.append(listener)
+
+  def _evict_over_budget(self) -> None:
+    # The entry just written sits at the hot end, so it is never the victim.
+    while len(self._data) > 1 and (len(self._data) > self.max_entries or self._bytes > self.max_bytes):
+      self._drop(next(iter(self._data)))
+      self._counters["evicted_lru"] += 1
+
+  def _maybe_sweep(self, now: float) -> None:
+    if now - self._last_sweep >= self.sweep_interval:
+      self.sweep(now)
+
+  def sweep(self, now: Optional[float] = None) -> int:
+    """Drop expired entries and idle per-key locks. Returns entries removed."""
+    now = time.monotonic() if now is None else now
+    self._last_sweep = now
+    expired = [k for k, e in self._data.items() if now >= e.expires_at]
+    for k in expired:
+      self._drop(k)
+    self._counters["evicted_expired"] += len(expired)
+
+    for k in [k for k, lock in self._locks.items() if not lock.locked() and k not in self._lock_users]:
+      self._locks.pop(k, None)
+    return len(expired)
+
+  async def freshness(self, key: str) -> Optional[float]:
+    """Seconds until key goes stale (negative once stale), None if absent or expired."""
+    e = self._data.get(key)
+    if not e:
+      return None
+    now = time.monotonic()
+    if now >= e.expires_at:
+      return None
+    return e.stale_at - now
+
+  async def peek(self, key: str) -> Optional[Tuple[Any, str]]:
+    """Cached value and HIT/STALE status without computing anything."""
+    e = self.get_entry(key)
+    if not e:
+      return None
+    return e.value, ("HIT" if time.monotonic() < e.stale_at else "STALE")
+
+  @asynccontextmanager
+  async def _hold(self, key: str) -> AsyncIterator[None]:
+    lock = self._locks.get(key)
+    if lock is None:
+      lock = self._locks[key] = asyncio.Lock()
+    self._lock_users[key] = self._lock_users.get(key, 0) + 1
+    try:
+      started = time.perf_counter()
+      async with lock:
+        STAGE_SECONDS.observe(time.perf_counter() - started, "cache_lock_wait")
+        yield
+    finally:
+      users = self._lock_users.get(key, 1) - 1
+      if users <= 0:
+        self._lock_users.pop(key, None)
+        if self._locks.get(key) is lock and not lock.locked():
+          self._locks.pop(key, None)
+      else:
+        self._lock_users[key] = users
 
   async def _refresh_in_background(
     self,
@@ -56,18 +183,55 @@ class TTLCache:
       self._refreshing.add(key)
 
     try:
-      lock = await self.lock_for(key)
-      async with lock:
+      async with self._hold(key):
         e = self.get_entry(key)
-        if e and time.time() < e.stale_at:
+        if e and time.monotonic() < e.stale_at:
+          REFRESHES.inc("skipped")
           return
 
-        value = await compute()
+        started = time.perf_counter()
+        try:
+          value = await compute()
+        except Exception:
+          REFRESHES.inc("error")
+          raise
         self.set(key, value, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+        REFRESH_SECONDS.observe(time.perf_counter() - started)
+        REFRESHES.inc("ok")
     finally:
       async with self._global:
         self._refreshing.discard(key)
 
+  @asynccontextmanager
+  async def claim(self, key: str) -> AsyncIterator[bool]:
+    """
+    Single-flight ownership of key without waiting for it: yields True while
+    this caller holds key's lock (store() the value before leaving), False if
+    another caller is already computing key.
+    """
+    lock = self._locks.get(key)
+    if lock is not None and lock.locked():
+      yield False
+      return
+    async with self._hold(key):
+      yield True
+
+  async def store(self, key: str, value: Any, ttl_seconds: int, stale_seconds: int) -> None:
+    self.set(key, value, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+
+  async def refresh(
+    self,
+    key: str,
+    ttl_seconds: int,
+    stale_seconds: int,
+    compute: Callable[[], Awaitable[Any]],
+  ) -> Any:
+    """Recompute key now, regardless of its current freshness."""
+    async with self._hold(key):
+      value = await compute()
+      self.set(key, value, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+      return value
+
   async def get_or_compute_swr(
     self,
     key: str,
@@ -75,27 +239,53 @@ class TTLCache:
     stale_seconds: int,
     compute: Callable[[], Awaitable[Any]],
   ) -> Tuple[Any, str]:
+    value, status = await self._get_or_compute_swr(key, ttl_seconds, stale_seconds, compute)
+    CACHE_REQUESTS.inc(self.name, status)
+    return value, status
+
+  async def _get_or_compute_swr(
+    self,
+    key: str,
+    ttl_seconds: int,
+    stale_seconds: int,
+    compute: Callable[[], Awaitable[Any]],
+  ) -> Tuple[Any, str]:
+    self._maybe_sweep(time.monotonic())
     e = self.get_entry(key)
     if e:
-      if time.time() < e.stale_at:
+      if time.monotonic() < e.stale_at:
+        self._counters["hits"] += 1
         return e.value, "HIT"
 
       asyncio.create_task(
         self._refresh_in_background(key, ttl_seconds, stale_seconds, compute)
       )
+      self._counters["stale"] += 1
       return e.value, "STALE"
 
-    lock = await self.lock_for(key)
-    async with lock:
+    async with self._hold(key):
       e2 = self.get_entry(key)
       if e2:
-        if time.time() < e2.stale_at:
+        if time.monotonic() < e2.stale_at:
+          self._counters["hits"] += 1
           return e2.value, "HIT"
         asyncio.create_task(
           self._refresh_in_background(key, ttl_seconds, stale_seconds, compute)
         )
+        self._counters["stale"] += 1
         return e2.value, "STALE"
 
       value = await compute()
       self.set(key, value, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
-      return value, "MISS"
\ No newline at end of file
+      self._counters["misses"] += 1
+      return value, "MISS"
+
+  def stats(self) -> Dict[str, Any]:
+    return {
+      "entries": len(self._data),
+      "max_entries": self.max_entries,
+      "bytes": self._bytes,
+      "max_bytes": self.max_bytes,
+      "locks": len(self._locks),
+      **self._counters,
+    }
@@ -0,0 +1,22 @@
+"""
+Compact JSON encoding for response bodies that are built once and cached.
+
+orjson is used when it is installed. Without it the standard library
+encoder produces the same compact, UTF-8 output that FastAPI's
+JSONResponse would render.
+"""
+import json
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # optional: falls back to the stdlib encoder
+    orjson = None
+
+ENCODER = "orjson" if orjson is not None else "json"
+
+
+def dumps(value: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(value, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
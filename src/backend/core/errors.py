@@ -1,9 +1,13 @@
 import logging
+from typing import Optional
 from fastapi import HTTPException, Request
 
-def raise_api_error(request: Request, status_code: int, error_code: str, message: str) -> None:
-    request_id = getattr(request.state, "request_id", None)
-    logging.warning(f"{error_code}: {message} (request_id={request_id})")
+def raise_api_error(request: Optional[Request], status_code: int, error_code: str, message: str) -> None:
+    request_id = getattr(getattr(request, "state", None), "request_id", None)
+    logging.warning(
+        "%s: %s (request_id=%s)", error_code, message, request_id,
+        extra={"error_code": error_code, "status": status_code},
+    )
     raise HTTPException(
         status_code=status_code,
         detail={"error": error_code, "message": message, "request_id": request_id},
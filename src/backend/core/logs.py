@@ -0,0 +1,173 @@
+import atexit
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from contextvars import ContextVar, Token
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional, Tuple
+
+# queue: JSON lines written by a background thread; sync: the old basicConfig file handler.
+LOG_MODE = os.getenv("LOG_MODE", "queue")
+LOG_FILE = os.getenv("LOG_FILE", "logs/app.log")
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Below WARNING, each call site may log this many records per second; the
+# rest are counted and dropped, so a traffic spike cannot grow logging cost.
+LOG_RATE_PER_SECOND = float(os.getenv("LOG_RATE_PER_SECOND", "20"))
+LOG_WARNING_RATE_PER_SECOND = float(os.getenv("LOG_WARNING_RATE_PER_SECOND", "50"))
+
+_context: ContextVar[Dict[str, Any]] = ContextVar("log_context", default={})
+
+# Attributes every LogRecord has; anything else was passed via extra=.
+_RESERVED = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime", "taskName"}
+
+
+def bind(**fields: Any) -> Token:
+    """Attach fields (request_id, ticker, ...) to every record logged from the current task."""
+    return _context.set({**_context.get(), **fields})
+
+
+def unbind(token: Token) -> None:
+    _context.reset(token)
+
+
+class ContextFilter(logging.Filter):
+    """Copies the caller's context fields onto the record before it changes threads."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        ctx = _context.get()
+        for k, v in ctx.items():
+            if not hasattr(record, k):
+                setattr(record, k, v)
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    """Token bucket per call site (logger, file, line) for records below ERROR."""
+
+    def __init__(self, rate: float = LOG_RATE_PER_SECOND, warning_rate: float = LOG_WARNING_RATE_PER_SECOND) -> None:
+        super().__init__()
+        self.rate = rate
+        self.warning_rate = warning_rate
+        self._buckets: Dict[Tuple[str, str, int], list] = {}
+        self._lock = threading.Lock()
+        self.dropped = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.ERROR:
+            return True
+        rate = self.warning_rate if record.levelno >= logging.WARNING else self.rate
+        if rate <= 0:
+            self.dropped += 1
+            return False
+
+        site = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(site)
+            if bucket is None:
+                bucket = self._buckets[site] = [rate, now]
+            tokens = min(rate, bucket[0] + (now - bucket[1]) * rate)
+            bucket[1] = now
+            if tokens < 1.0:
+                bucket[0] = tokens
+                self.dropped += 1
+                return False
+            bucket[0] = tokens - 1.0
+            return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        out: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        for k, v in record.__dict__.items():
+            if k not in _RESERVED and not k.startswith("_"):
+                out[k] = v
+        if record.exc_info:
+            out["exc"] = self.formatException(record.exc_info)
+        return json.dumps(out, default=str, separators=(",", ":"))
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """QueueHandler that drops (and counts) records when the writer falls behind instead of blocking."""
+
+    def __init__(self, q: "queue.Queue[Any]") -> None:
+        super().__init__(q)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+_listener: Optional[QueueListener] = None
+_handler: Optional[_DroppingQueueHandler] = None
+_limiter: Optional[RateLimitFilter] = None
+
+
+def setup_logging() -> None:
+    global _listener, _handler, _limiter
+
+    parent = os.path.dirname(LOG_FILE)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
+
+    if LOG_MODE == "sync":
+        logging.basicConfig(
+            filename=LOG_FILE,
+            level=LOG_LEVEL,
+            format="%(asctime)s - %(levelname)s - %(message)s",
+        )
+        return
+
+    if _listener is not None:
+        return
+
+    file_handler = logging.FileHandler(LOG_FILE)
+    file_handler.setFormatter(JsonFormatter())
+
+    _handler = _DroppingQueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+    _limiter = RateLimitFilter()
+    _handler.addFilter(_limiter)
+    _handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(_handler)
+
+    _listener = QueueListener(_handler.queue, file_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+
+
+def stop_logging() -> None:
+    """Flush queued records to disk and stop the writer thread."""
+    global _listener, _handler
+    if _listener is None:
+        return
+    _listener.stop()
+    for h in _listener.handlers:
+        h.close()
+    logging.getLogger().removeHandler(_handler)
+    _listener = None
+    _handler = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    return {
+        "mode": LOG_MODE,
+        "queued": _handler.queue.qsize() if _handler else 0,
+        "dropped_full": _handler.dropped if _handler else 0,
+        "dropped_rate": _limiter.dropped if _limiter else 0,
+    }
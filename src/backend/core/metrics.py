@@ -0,0 +1,212 @@
+import abc
+import bisect
+import os
+import threading
+import time
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BATCH_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+
+class _Noop:
+    """Stands in for a labelled child, and for a timer, while metrics are off."""
+
+    def inc(self, amount: float = 1.0) -> None:
+        pass
+
+    def observe(self, value: float) -> None:
+        pass
+
+    def __enter__(self) -> "_Noop":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        pass
+
+
+_NOOP = _Noop()
+
+
+def _fmt_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{v}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _fmt_value(v: float) -> str:
+    return repr(float(v)) if v != int(v) else str(int(v))
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self, lock: threading.Lock) -> None:
+        self.value = 0.0
+        self._lock = lock
+
+    def inc(self, amount: float = 1.0) -> None:
+        with self._lock:
+            self.value += amount
+
+
+class _HistogramChild:
+    __slots__ = ("buckets", "counts", "sum", "count", "_lock")
+
+    def __init__(self, buckets: Tuple[float, ...], lock: threading.Lock) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = lock
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> "_Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _Family(abc.ABC):
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @abc.abstractmethod
+    def _new_child(self) -> object:
+        """A fresh child for one label combination."""
+
+    def labels(self, *values: str):
+        if not METRICS_ENABLED:
+            return _NOOP
+        child = self._children.get(values)
+        if child is None:
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} {self.kind}"
+
+
+class Counter(_Family):
+    kind = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild(self._lock)
+
+    def inc(self, *values: str, amount: float = 1.0) -> None:
+        if METRICS_ENABLED:
+            self.labels(*values).inc(amount)
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in sorted(self._children.items()):
+            yield f"{self.name}{_fmt_labels(self.labelnames, values)} {_fmt_value(child.value)}"
+
+
+class Histogram(_Family):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets, self._lock)
+
+    def observe(self, value: float, *values: str) -> None:
+        if METRICS_ENABLED:
+            self.labels(*values).observe(value)
+
+    def time(self, *values: str):
+        """Context manager observing the elapsed seconds of its block."""
+        if not METRICS_ENABLED:
+            return _NOOP
+        return _Timer(self.labels(*values))
+
+    def render(self) -> Iterator[str]:
+        yield from super().render()
+        for values, child in sorted(self._children.items()):
+            with self._lock:
+                counts, total, n = list(child.counts), child.sum, child.count
+            cumulative = 0
+            for bound, c in zip((*self.buckets, float("inf")), counts):
+                cumulative += c
+                le = "+Inf" if bound == float("inf") else _fmt_value(bound)
+                labels = _fmt_labels(self.labelnames, values, 'le="' + le + '"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            yield f"{self.name}_sum{_fmt_labels(self.labelnames, values)} {_fmt_value(total)}"
+            yield f"{self.name}_count{_fmt_labels(self.labelnames, values)} {n}"
+
+
+_registry: List[_Family] = []
+
+STAGE_SECONDS = Histogram(
+    "pioni_stage_seconds",
+    "Time spent in each stage of computing and serving sentiment.",
+    ["stage"],
+)
+CACHE_REQUESTS = Counter(
+    "pioni_cache_requests_total",
+    "Cache lookups by cache (sentiment, feed) and outcome (HIT, STALE, MISS).",
+    ["cache", "outcome"],
+)
+REFRESHES = Counter(
+    "pioni_background_refresh_total",
+    "Background stale-while-revalidate refreshes by result.",
+    ["result"],
+)
+REFRESH_SECONDS = Histogram(
+    "pioni_background_refresh_seconds",
+    "Duration of background refreshes that ran a compute.",
+)
+RATE_LIMITED = Counter(
+    "pioni_rate_limit_rejections_total",
+    "Requests rejected by the rate limiter.",
+)
+FINBERT_BATCH_SIZE = Histogram(
+    "pioni_finbert_batch_size",
+    "Texts per FinBERT forward pass.",
+    buckets=BATCH_BUCKETS,
+)
+FINBERT_SKIPPED = Counter(
+    "pioni_finbert_skipped_total",
+    "Texts scored with VADER alone under the scoring budget, by reason (unambiguous, budget, deadline).",
+    ["reason"],
+)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def render() -> str:
+    """All metrics in Prometheus text exposition format."""
+    lines: List[str] = []
+    for family in _registry:
+        lines.extend(family.render())
+    return "\n".join(lines) + "\n"
@@ -1,9 +1,52 @@
+import logging
+import time
 from uuid import uuid4
-from fastapi import Request
-
-async def attach_request_id(request: Request, call_next):
-    request_id = uuid4().hex[:12]
-    request.state.request_id = request_id
-    response = await call_next(request)
-    response.headers["X-Request-ID"] = request_id
-    return response
\ No newline at end of file
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from backend.core.logs import bind, unbind
+
+_access_log = logging.getLogger("pioni.access")
+
+class RequestIdMiddleware:
+    """
+    Adds an X-Request-ID header to every response. Runs as plain ASGI,
+    without BaseHTTPMiddleware's extra task and body stream. Also binds the id to the logging context and writes one
+    access record per request with status, cache outcome and duration.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = uuid4().hex[:12]
+        scope.setdefault("state", {})["request_id"] = request_id
+        header = (b"x-request-id", request_id.encode("latin-1"))
+        token = bind(request_id=request_id)
+        start = time.perf_counter()
+        outcome: dict = {"status": 500, "cache": None}
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                outcome["status"] = message["status"]
+                headers = message.get("headers", [])
+                for k, v in headers:
+                    if k.lower() == b"x-cache":
+                        outcome["cache"] = v.decode("latin-1")
+                message["headers"] = [*headers, header]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            _access_log.info(
+                "%s %s %s",
+                scope["method"],
+                scope["path"],
+                outcome["status"],
+                extra={**outcome, "path": scope["path"], "duration_ms": round((time.perf_counter() - start) * 1000, 2)},
+            )
+            unbind(token)
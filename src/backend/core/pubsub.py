@@ -0,0 +1,115 @@
+import asyncio
+import os
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+STREAM_MAX_SUBSCRIBERS = int(os.getenv("STREAM_MAX_SUBSCRIBERS", "5000"))
+
+
+class Subscription:
+    """
+    One client's view of a set of topics.
+
+    Only the newest undelivered value per topic is kept, so a slow consumer
+    costs at most one pending payload per topic and simply skips values it
+    was too slow to read.
+    """
+
+    def __init__(self, topics: Iterable[str]) -> None:
+        self.topics: List[str] = list(dict.fromkeys(topics))
+        self._pending: Dict[str, Any] = {}
+        self._ready = asyncio.Event()
+        self.delivered = 0
+        self.dropped = 0
+
+    def offer(self, topic: str, value: Any) -> None:
+        if topic in self._pending:
+            self.dropped += 1
+        self._pending[topic] = value
+        self._ready.set()
+
+    def discard(self, topic: str) -> None:
+        """Drops the pending value for topic, if any (the client already has it)."""
+        self._pending.pop(topic, None)
+
+    async def next(self, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Pending updates keyed by topic, or None if nothing arrived within timeout."""
+        if not self._pending:
+            self._ready.clear()
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except asyncio.TimeoutError:
+                return None
+        updates, self._pending = self._pending, {}
+        self._ready.clear()
+        self.delivered += len(updates)
+        return updates
+
+
+class Broker:
+    """Fans one published value out to every subscriber of its topic, skipping repeats."""
+
+    def __init__(self, max_subscribers: int = STREAM_MAX_SUBSCRIBERS) -> None:
+        self.max_subscribers = max_subscribers
+        self._subs: Dict[str, Set[Subscription]] = {}
+        self._last: Dict[str, Any] = {}
+        self._count = 0
+        self.published = 0
+        self.suppressed = 0
+
+    def full(self) -> bool:
+        return self._count >= self.max_subscribers
+
+    def subscribe(self, topics: Iterable[str]) -> Optional[Subscription]:
+        if self.full():
+            return None
+        sub = Subscription(topics)
+        for t in sub.topics:
+            self._subs.setdefault(t, set()).add(sub)
+        self._count += 1
+        return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        removed = False
+        for t in sub.topics:
+            subs = self._subs.get(t)
+            if subs and sub in subs:
+                subs.discard(sub)
+                removed = True
+                if not subs:
+                    self._subs.pop(t, None)
+                    self._last.pop(t, None)
+        if removed:
+            self._count -= 1
+
+    def seed(self, topic: str, value: Any) -> None:
+        """Records what a new subscriber was already sent, so it is not pushed again."""
+        if topic in self._subs:
+            self._last.setdefault(topic, value)
+
+    def topics(self) -> List[str]:
+        return list(self._subs.keys())
+
+    def publish(self, topic: str, value: Any) -> int:
+        """Delivers value to the topic's subscribers unless it equals the last one. Returns receivers."""
+        subs = self._subs.get(topic)
+        if not subs:
+            return 0
+        if self._last.get(topic) == value:
+            self.suppressed += 1
+            return 0
+        self._last[topic] = value
+        self.published += 1
+        for sub in subs:
+            sub.offer(topic, value)
+        return len(subs)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "subscribers": self._count,
+            "topics": len(self._subs),
+            "published": self.published,
+            "suppressed": self.suppressed,
+        }
+
+
+broker = Broker()
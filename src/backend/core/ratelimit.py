@@ -1,39 +1,143 @@
+import math
 import os
 import time
-from collections import defaultdict, deque
-from fastapi import Request
+from collections import OrderedDict
+from typing import Callable, Dict, Tuple
+from starlette.routing import Match
+from starlette.types import ASGIApp, Receive, Scope, Send
 from starlette.responses import JSONResponse
 
+from backend.core.metrics import RATE_LIMITED
 from backend.settings import cors_origins
 
 class RateLimiter:
-    def __init__(self, max_requests: int, window_seconds: int) -> None:
-        self.max_requests = max_requests
+    """
+    GCRA limiter: max_requests per window_seconds, bursts up to max_requests.
+
+    Each key holds one float, its theoretical arrival time (TAT). Keys live in
+    an LRU table capped at max_keys; a key whose TAT has passed carries no
+    state worth keeping and is dropped as the table is touched, and if a flood
+    of distinct keys still fills it the least recently seen key is forgotten.
+    """
+
+    def __init__(
+        self,
+        max_requests: int,
+        window_seconds: int,
+        max_keys: int = 100_000,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.max_requests = max(1, max_requests)
         self.window_seconds = window_seconds
-        self.hits = defaultdict(deque)
+        self.max_keys = max(1, max_keys)
+        self._clock = clock
+        self._interval = window_seconds / self.max_requests
+        self._tolerance = window_seconds - self._interval
+        self._tat: "OrderedDict[str, float]" = OrderedDict()
+        self.rejected = 0
+        self.evicted = 0
 
     def allow(self, key: str) -> bool:
-        now = time.time()
-        q = self.hits[key]
-        while q and (now - q[0]) > self.window_seconds:
-            q.popleft()
-        if len(q) >= self.max_requests:
+        now = self._clock()
+        tat = self._tat.get(key)
+        if tat is None or tat < now:
+            tat = now
+        if tat - now > self._tolerance:
+            self.rejected += 1
             return False
-        q.append(now)
+
+        self._tat[key] = tat + self._interval
+        self._tat.move_to_end(key)
+        self._expire(now)
         return True
 
+    def retry_after(self, key: str) -> float:
+        """Seconds until key may make another request."""
+        tat = self._tat.get(key)
+        if tat is None:
+            return 0.0
+        return max(0.0, tat - self._clock() - self._tolerance)
+
+    def _expire(self, now: float) -> None:
+        while self._tat:
+            oldest, tat = next(iter(self._tat.items()))
+            if tat > now and len(self._tat) <= self.max_keys:
+                break
+            if tat > now:
+                self.evicted += 1
+            del self._tat[oldest]
+
+    def __len__(self) -> int:
+        return len(self._tat)
+
+    def stats(self) -> dict:
+        return {"keys": len(self._tat), "max_keys": self.max_keys, "rejected": self.rejected, "evicted": self.evicted}
+
 MAX_REQUESTS = int(os.getenv("RATE_LIMIT_MAX_REQUESTS", os.getenv("RATE_LIMIT_MAX", "30")))
 WINDOW_SECONDS = int(os.getenv("RATE_LIMIT_WINDOW_SECONDS", "60"))
+MAX_KEYS = int(os.getenv("RATE_LIMIT_MAX_KEYS", "100000"))
+# ip_route: per client per route template, so /sentiment/TSLA and
+# /sentiment/AAPL share one budget while /feed, /history and the probes keep
+# their own (the default); ip: one budget per client across every route;
+# ip_path: per concrete path.
+KEY_STRATEGY = os.getenv("RATE_LIMIT_KEY", "ip_route")
 
-limiter = RateLimiter(max_requests=MAX_REQUESTS, window_seconds=WINDOW_SECONDS)
+limiter = RateLimiter(max_requests=MAX_REQUESTS, window_seconds=WINDOW_SECONDS, max_keys=MAX_KEYS)
 
-def _cors_headers_for(request: Request) -> dict:
-    origin = request.headers.get("origin")
-    if not origin:
-        return {}
+def _header(scope: Scope, name: bytes) -> str:
+    for k, v in scope.get("headers", ()):
+        if k == name:
+            return v.decode("latin-1")
+    return ""
+
+def _client_ip(scope: Scope) -> str:
+    client = scope.get("client")
+    return _header(scope, b"x-forwarded-for").split(",")[0].strip() or (client[0] if client else "unknown")
+
+_TEMPLATE_CACHE_MAX = 4096
+_templates: "OrderedDict[Tuple[int, str, str], str]" = OrderedDict()
+
+def _route_template(scope: Scope) -> str:
+    # Route matching walks every route; a path's template never changes, so
+    # it is looked up once and kept in a small LRU.
+    router = getattr(scope.get("app"), "router", None)
+    method, path = scope.get("method", "GET"), scope["path"]
+    key = (id(router), method, path)
+    template = _templates.get(key)
+    if template is not None:
+        _templates.move_to_end(key)
+        return template
+
+    template = path
+    for route in getattr(router, "routes", []):
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            template = getattr(route, "path", path)
+            break
+    _templates[key] = template
+    if len(_templates) > _TEMPLATE_CACHE_MAX:
+        _templates.popitem(last=False)
+    return template
 
-    allowed = cors_origins()
-    if origin not in allowed:
+KEY_STRATEGIES: Dict[str, Callable[[Scope], str]] = {
+    "ip": _client_ip,
+    "ip_route": lambda scope: f"{_client_ip(scope)}:{_route_template(scope)}",
+    "ip_path": lambda scope: f"{_client_ip(scope)}:{scope['path']}",
+}
+
+if KEY_STRATEGY not in KEY_STRATEGIES:
+    raise ValueError(f"RATE_LIMIT_KEY must be one of {', '.join(KEY_STRATEGIES)}, got {KEY_STRATEGY!r}")
+
+_key_for = KEY_STRATEGIES[KEY_STRATEGY]
+
+def rate_limit_stats() -> dict:
+    return {"strategy": KEY_STRATEGY, **limiter.stats()}
+
+# CORS settings do not change at runtime, so the 429 path reuses one set.
+_ALLOWED_ORIGINS = frozenset(cors_origins())
+
+def _cors_headers(origin: str) -> dict:
+    if not origin or origin not in _ALLOWED_ORIGINS:
         return {}
 
     return {
@@ -44,22 +148,31 @@ def _cors_headers_for(request: Request) -> dict:
         "Access-Control-Allow-Headers": "*",
     }
 
-async def rate_limit_middleware(request: Request, call_next):
-    if request.method == "OPTIONS":
-        return await call_next(request)
-
-    ip = request.headers.get("x-forwarded-for", "").split(",")[0].strip() or (
-        request.client.host if request.client else "unknown"
+def _rejection(scope: Scope, key: str) -> JSONResponse:
+    RATE_LIMITED.inc()
+    request_id = scope.get("state", {}).get("request_id")
+    headers = _cors_headers(_header(scope, b"origin"))
+    headers["Retry-After"] = str(math.ceil(limiter.retry_after(key)))
+    return JSONResponse(
+        status_code=429,
+        content={"error": "RATE_LIMIT", "message": "Too many requests.", "request_id": request_id},
+        headers=headers,
     )
-    key = f"{ip}:{request.url.path}"
-
-    if not limiter.allow(key):
-        request_id = getattr(request.state, "request_id", None)
-        headers = _cors_headers_for(request)
-        return JSONResponse(
-            status_code=429,
-            content={"error": "RATE_LIMIT", "message": "Too many requests.", "request_id": request_id},
-            headers=headers,
-        )
-
-    return await call_next(request)
\ No newline at end of file
+
+class RateLimitMiddleware:
+    """Rejects requests over the limit with a 429 before they reach the app; OPTIONS preflights are never limited."""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+
+        key = _key_for(scope)
+        if not limiter.allow(key):
+            await _rejection(scope, key)(scope, receive, send)
+            return
+
+        await self.app(scope, receive, send)
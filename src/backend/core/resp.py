@@ -0,0 +1,272 @@
+import asyncio
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+
+class RespError(Exception):
+    pass
+
+
+# What a call can raise when the server is unreachable, slow or refuses the command.
+TRANSPORT_ERRORS = (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError)
+
+# DEL key only while it still holds value, in one step on the server.
+DELETE_IF_EQUALS = 'if redis.call("GET", KEYS[1]) == ARGV[1] then return redis.call("DEL", KEYS[1]) else return 0 end'
+
+
+def _encode(*args: Any) -> bytes:
+    out = [b"*%d\r\n" % len(args)]
+    for a in args:
+        if isinstance(a, bytes):
+            b = a
+        else:
+            b = str(a).encode("utf-8")
+        out.append(b"$%d\r\n%s\r\n" % (len(b), b))
+    return b"".join(out)
+
+
+async def _read_reply(reader: asyncio.StreamReader) -> Any:
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed by server")
+    kind, body = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return body.decode("utf-8")
+    if kind == b"-":
+        raise RespError(body.decode("utf-8"))
+    if kind == b":":
+        return int(body)
+    if kind == b"$":
+        n = int(body)
+        if n < 0:
+            return None
+        data = await reader.readexactly(n + 2)
+        return data[:-2]
+    if kind == b"*":
+        n = int(body)
+        if n < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(n)]
+    raise RespError(f"unexpected reply type: {line!r}")
+
+
+class RespClient:
+    """
+    Small asyncio client for the subset of the Redis protocol the cache needs.
+
+    Connections are pooled per event loop and reopened on failure.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 6379, db: int = 0, pool_size: int = 8, timeout: float = 1.0) -> None:
+        self.host = host
+        self.port = port
+        self.db = db
+        self.timeout = timeout
+        self._pool_size = pool_size
+        self._idle: Deque[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = deque()
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs: Any) -> "RespClient":
+        u = urlparse(url)
+        db = int((u.path or "/0").lstrip("/") or 0)
+        return cls(host=u.hostname or "127.0.0.1", port=u.port or 6379, db=db, **kwargs)
+
+    def _bind_loop(self) -> asyncio.Semaphore:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._idle.clear()
+            self._sem = asyncio.Semaphore(self._pool_size)
+        return self._sem  # type: ignore[return-value]
+
+    async def _connect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), self.timeout)
+        if self.db:
+            writer.write(_encode("SELECT", self.db))
+            await writer.drain()
+            await _read_reply(reader)
+        return reader, writer
+
+    async def execute(self, *args: Any) -> Any:
+        sem = self._bind_loop()
+        async with sem:
+            conn = self._idle.pop() if self._idle else await self._connect()
+            reader, writer = conn
+            try:
+                writer.write(_encode(*args))
+                await writer.drain()
+                reply = await asyncio.wait_for(_read_reply(reader), self.timeout)
+            except RespError:
+                self._idle.append(conn)
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            self._idle.append(conn)
+            return reply
+
+    async def ping(self) -> bool:
+        return (await self.execute("PING")) == "PONG"
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: Any, px: Optional[int] = None, nx: bool = False) -> bool:
+        args: List[Any] = ["SET", key, value]
+        if px is not None:
+            args += ["PX", int(px)]
+        if nx:
+            args.append("NX")
+        return (await self.execute(*args)) == "OK"
+
+    async def delete(self, *keys: str) -> int:
+        return await self.execute("DEL", *keys)
+
+    async def incrby(self, key: str, amount: int) -> int:
+        return await self.execute("INCRBY", key, int(amount))
+
+    async def expire(self, key: str, seconds: float) -> bool:
+        return (await self.execute("EXPIRE", key, max(1, int(seconds)))) == 1
+
+    async def delete_if_equals(self, key: str, value: Any) -> bool:
+        """Delete key only if it still holds value; atomic, so a lock that expired and was retaken elsewhere is left alone."""
+        return (await self.execute("EVAL", DELETE_IF_EQUALS, 1, key, value)) == 1
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+
+
+class FakeRedisServer:
+    """
+    In-process stand-in that speaks enough RESP for RespClient: PING, SELECT,
+    GET, SET (EX/PX/NX), DEL, EXISTS, INCRBY, EXPIRE, FLUSHALL, and EVAL of the
+    DELETE_IF_EQUALS script only. Meant for tests and local runs.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        self.host = host
+        self.port = port
+        self.commands = 0
+        self._data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    @property
+    def url(self) -> str:
+        return f"redis://{self.host}:{self.port}/0"
+
+    async def start(self) -> "FakeRedisServer":
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def _live(self, key: bytes) -> Optional[bytes]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        value, expires_at = item
+        if expires_at is not None and time.monotonic() >= expires_at:
+            self._data.pop(key, None)
+            return None
+        return value
+
+    def _dispatch(self, args: List[bytes]) -> bytes:
+        cmd = args[0].upper()
+        if cmd == b"PING":
+            return b"+PONG\r\n"
+        if cmd == b"SELECT" or cmd == b"FLUSHALL":
+            if cmd == b"FLUSHALL":
+                self._data.clear()
+            return b"+OK\r\n"
+        if cmd == b"GET":
+            value = self._live(args[1])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if cmd == b"EXISTS":
+            return b":%d\r\n" % sum(1 for k in args[1:] if self._live(k) is not None)
+        if cmd == b"DEL":
+            n = 0
+            for k in args[1:]:
+                if self._live(k) is not None:
+                    n += 1
+                self._data.pop(k, None)
+            return b":%d\r\n" % n
+        if cmd == b"INCRBY":
+            key = args[1]
+            current = self._live(key)
+            n = int(current or 0) + int(args[2])
+            self._data[key] = (b"%d" % n, self._data[key][1] if current is not None else None)
+            return b":%d\r\n" % n
+        if cmd == b"EXPIRE":
+            key = args[1]
+            current = self._live(key)
+            if current is None:
+                return b":0\r\n"
+            self._data[key] = (current, time.monotonic() + int(args[2]))
+            return b":1\r\n"
+        if cmd == b"EVAL":
+            if args[1].decode("utf-8") != DELETE_IF_EQUALS:
+                return b"-ERR only the DELETE_IF_EQUALS script is supported\r\n"
+            key, value = args[3], args[4]
+            if self._live(key) != value:
+                return b":0\r\n"
+            self._data.pop(key, None)
+            return b":1\r\n"
+        if cmd == b"SET":
+            key, value = args[1], args[2]
+            opts = [a.upper() for a in args[3:]]
+            expires_at = None
+            nx = False
+            i = 0
+            while i < len(opts):
+                if opts[i] == b"NX":
+                    nx = True
+                elif opts[i] in (b"PX", b"EX"):
+                    n = int(args[3 + i + 1])
+                    expires_at = time.monotonic() + (n / 1000.0 if opts[i] == b"PX" else n)
+                    i += 1
+                i += 1
+            if nx and self._live(key) is not None:
+                return b"$-1\r\n"
+            self._data[key] = (value, expires_at)
+            return b"+OK\r\n"
+        return b"-ERR unknown command '%s'\r\n" % cmd
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    args = await _read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                self.commands += 1
+                writer.write(self._dispatch(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Run the in-process Redis stand-in.")
+    parser.add_argument("--port", type=int, default=6379)
+    port = parser.parse_args().port
+
+    async def _main() -> None:
+        server = await FakeRedisServer(port=port).start()
+        print(f"fake redis listening on {server.url}")
+        await asyncio.Event().wait()
+
+    asyncio.run(_main())
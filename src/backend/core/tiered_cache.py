@@ -0,0 +1,330 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+
+from backend.core.cache import TTLCache
+from backend.core.metrics import CACHE_REQUESTS, REFRESH_SECONDS, REFRESHES
+from backend.core.resp import TRANSPORT_ERRORS, RespClient
+
+CACHE_L1_TTL_SECONDS = float(os.getenv("CACHE_L1_TTL_SECONDS", "5"))
+CACHE_LOCK_TTL_MS = int(os.getenv("CACHE_LOCK_TTL_MS", "30000"))
+CACHE_LOCK_POLL_MS = int(os.getenv("CACHE_LOCK_POLL_MS", "50"))
+CACHE_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "pioni:")
+
+_L2_ERRORS = TRANSPORT_ERRORS
+
+
+class TieredCache:
+    """
+    Two-level SWR cache: a short-lived in-process TTLCache (L1) in front of a
+    Redis-protocol store shared by every worker (L2).
+
+    L2 entries carry wall-clock stale/expiry stamps so all workers agree on
+    freshness. A SET NX lock per key makes sure only one worker computes a
+    missing or stale key; the others wait for its result. If L2 is unreachable
+    the cache degrades to L1-only behaviour instead of failing requests.
+    """
+
+    def __init__(
+        self,
+        client: RespClient,
+        l1: Optional[TTLCache] = None,
+        l1_ttl_seconds: float = CACHE_L1_TTL_SECONDS,
+        lock_ttl_ms: int = CACHE_LOCK_TTL_MS,
+        lock_poll_ms: int = CACHE_LOCK_POLL_MS,
+        prefix: str = CACHE_KEY_PREFIX,
+        name: str = "default",
+    ) -> None:
+        self.name = name
+        self.client = client
+        self.l1 = l1 if l1 is not None else TTLCache()
+        self.l1_ttl_seconds = l1_ttl_seconds
+        self.lock_ttl_ms = lock_ttl_ms
+        self.lock_poll_s = lock_poll_ms / 1000.0
+        self.prefix = prefix
+        self._refreshing: set[str] = set()
+        self._counters = {
+            "l2_hits": 0,
+            "l2_stale": 0,
+            "l2_misses": 0,
+            "l2_errors": 0,
+            "computes": 0,
+            "lock_waits": 0,
+        }
+
+    def _l2_key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _lock_key(self, key: str) -> str:
+        return f"{self.prefix}lock:{key}"
+
+    async def _l2_get(self, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            raw = await self.client.get(self._l2_key(key))
+        except _L2_ERRORS as e:
+            self._counters["l2_errors"] += 1
+            logging.warning(f"L2 cache read failed for {key}: {e}")
+            return None
+        if raw is None:
+            return None
+        try:
+            doc = json.loads(raw)
+        except ValueError:
+            return None
+        # The encoded length is what L1 charges for the value, so hits never re-encode it.
+        doc["size"] = len(raw)
+        return doc
+
+    async def _l2_set(self, key: str, value: Any, ttl_seconds: int, stale_seconds: int) -> Optional[int]:
+        """Writes value to L2; returns its encoded size, or None if the write failed."""
+        now = time.time()
+        doc = json.dumps({"v": value, "stale_at": now + stale_seconds, "expires_at": now + ttl_seconds})
+        try:
+            await self.client.set(self._l2_key(key), doc, px=int(ttl_seconds * 1000))
+        except _L2_ERRORS as e:
+            self._counters["l2_errors"] += 1
+            logging.warning(f"L2 cache write failed for {key}: {e}")
+            return None
+        return len(doc)
+
+    async def _acquire(self, key: str) -> Optional[str]:
+        """Returns a lock token, "" if L2 is down (caller proceeds alone), or None if held elsewhere."""
+        token = uuid.uuid4().hex
+        try:
+            ok = await self.client.set(self._lock_key(key), token, px=self.lock_ttl_ms, nx=True)
+        except _L2_ERRORS:
+            self._counters["l2_errors"] += 1
+            return ""
+        return token if ok else None
+
+    async def _release(self, key: str, token: str) -> None:
+        if not token:
+            return
+        try:
+            await self.client.delete_if_equals(self._lock_key(key), token)
+        except _L2_ERRORS:
+            self._counters["l2_errors"] += 1
+
+    def _fill_l1(self, key: str, value: Any, stale_at: float, size: Optional[int] = None) -> None:
+        fresh_for = min(self.l1_ttl_seconds, max(0.0, stale_at - time.time()))
+        if fresh_for > 0:
+            self.l1.set(key, value, ttl_seconds=fresh_for, stale_seconds=fresh_for, size=size)
+
+    async def _compute_and_store(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        self._counters["computes"] += 1
+        value = await compute()
+        await self.store(key, value, ttl_seconds, stale_seconds)
+        return value
+
+    async def store(self, key: str, value: Any, ttl_seconds: int, stale_seconds: int) -> None:
+        size = await self._l2_set(key, value, ttl_seconds, stale_seconds)
+        if size is not None:
+            self._fill_l1(key, value, time.time() + stale_seconds, size)
+        else:
+            # L2 is down (this write failed, and the read that led here found
+            # nothing), so L1 is the only copy: keep it for the whole window
+            # rather than recomputing against upstream every l1_ttl_seconds.
+            self.l1.set(key, value, ttl_seconds=ttl_seconds, stale_seconds=stale_seconds)
+
+    @asynccontextmanager
+    async def claim(self, key: str) -> AsyncIterator[bool]:
+        """
+        Single-flight ownership of key without waiting for it, in this worker
+        and across workers: yields True while this caller holds key's L1 and
+        L2 locks (store() the value before leaving), False if another caller
+        is already computing key.
+        """
+        lock = self.l1._locks.get(key)
+        if lock is not None and lock.locked():
+            yield False
+            return
+        async with self.l1._hold(key):
+            token = await self._acquire(key)
+            if token is None:
+                yield False
+                return
+            try:
+                yield True
+            finally:
+                await self._release(key, token)
+
+    async def _refresh_in_background(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> None:
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        try:
+            token = await self._acquire(key)
+            if token is None:
+                REFRESHES.inc("skipped")
+                return
+            try:
+                doc = await self._l2_get(key)
+                if doc and time.time() < doc["stale_at"]:
+                    REFRESHES.inc("skipped")
+                    return
+                started = time.perf_counter()
+                await self._compute_and_store(key, ttl_seconds, stale_seconds, compute)
+                REFRESH_SECONDS.observe(time.perf_counter() - started)
+                REFRESHES.inc("ok")
+            finally:
+                await self._release(key, token)
+        except Exception as e:
+            REFRESHES.inc("error")
+            logging.warning(f"Background refresh failed for {key}: {e}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def _read_through(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Optional[Tuple[Any, str]]:
+        doc = await self._l2_get(key)
+        if not doc:
+            return None
+        if time.time() < doc["stale_at"]:
+            self._counters["l2_hits"] += 1
+            self._fill_l1(key, doc["v"], doc["stale_at"], doc["size"])
+            return doc["v"], "HIT"
+
+        self._counters["l2_stale"] += 1
+        asyncio.create_task(self._refresh_in_background(key, ttl_seconds, stale_seconds, compute))
+        return doc["v"], "STALE"
+
+    def add_listener(self, listener: Callable[[str, Any], None]) -> None:
+        # Every value this worker serves passes through L1, including ones
+        # another worker computed, so listening there sees all updates.
+        self.l1.add_listener(listener)
+
+    async def peek(self, key: str) -> Optional[Tuple[Any, str]]:
+        e = self.l1.get_entry(key)
+        if e and time.monotonic() < e.stale_at:
+            return e.value, "HIT"
+        doc = await self._l2_get(key)
+        if not doc:
+            return None
+        if time.time() < doc["stale_at"]:
+            self._fill_l1(key, doc["v"], doc["stale_at"], doc["size"])
+            return doc["v"], "HIT"
+        return doc["v"], "STALE"
+
+    async def freshness(self, key: str) -> Optional[float]:
+        doc = await self._l2_get(key)
+        if not doc:
+            return await self.l1.freshness(key)
+        return doc["stale_at"] - time.time()
+
+    async def refresh(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        """Recompute key now unless another worker already holds its lock."""
+        token = await self._acquire(key)
+        if token is None:
+            return None
+        try:
+            return await self._compute_and_store(key, ttl_seconds, stale_seconds, compute)
+        finally:
+            await self._release(key, token)
+
+    async def get_or_compute_swr(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, str]:
+        value, status = await self._get_or_compute_swr(key, ttl_seconds, stale_seconds, compute)
+        CACHE_REQUESTS.inc(self.name, status)
+        return value, status
+
+    async def _get_or_compute_swr(
+        self,
+        key: str,
+        ttl_seconds: int,
+        stale_seconds: int,
+        compute: Callable[[], Awaitable[Any]],
+    ) -> Tuple[Any, str]:
+        e = self.l1.get_entry(key)
+        if e and time.monotonic() < e.stale_at:
+            return e.value, "HIT"
+
+        found = await self._read_through(key, ttl_seconds, stale_seconds, compute)
+        if found:
+            return found
+
+        # Single flight inside this worker first, then across workers via L2.
+        async with self.l1._hold(key):
+            e = self.l1.get_entry(key)
+            if e and time.monotonic() < e.stale_at:
+                return e.value, "HIT"
+
+            deadline = time.monotonic() + self.lock_ttl_ms / 1000.0
+            while True:
+                found = await self._read_through(key, ttl_seconds, stale_seconds, compute)
+                if found:
+                    return found
+
+                token = await self._acquire(key)
+                if token is not None:
+                    try:
+                        self._counters["l2_misses"] += 1
+                        value = await self._compute_and_store(key, ttl_seconds, stale_seconds, compute)
+                        return value, "MISS"
+                    finally:
+                        await self._release(key, token)
+
+                if time.monotonic() >= deadline:
+                    self._counters["l2_misses"] += 1
+                    value = await self._compute_and_store(key, ttl_seconds, stale_seconds, compute)
+                    return value, "MISS"
+
+                self._counters["lock_waits"] += 1
+                await asyncio.sleep(self.lock_poll_s)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "redis", "l1": self.l1.stats(), **self._counters}
+
+    async def close(self) -> None:
+        await self.client.close()
+
+
+Cache = Union[TTLCache, TieredCache]
+
+_caches: List[TieredCache] = []
+
+
+def make_cache(name: str) -> Cache:
+    """Builds the cache selected by CACHE_BACKEND (memory | redis); name labels its metrics."""
+    if os.getenv("CACHE_BACKEND", "memory").lower() == "redis":
+        cache = TieredCache(RespClient.from_url(os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0")), name=name)
+        _caches.append(cache)
+        return cache
+    return TTLCache(name=name)
+
+
+async def close_caches() -> None:
+    while _caches:
+        await _caches.pop().close()
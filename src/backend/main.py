@@ -1,25 +1,47 @@
-import os
-import logging
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from backend.api.routes import router
-from backend.core.middleware import attach_request_id
-from backend.settings import cors_origins
-from backend.core.ratelimit import rate_limit_middleware
-
-os.makedirs("logs", exist_ok=True)
-logging.basicConfig(
-    filename="logs/app.log",
-    level=logging.INFO,
-    format="%(asctime)s - %(levelname)s - %(message)s",
-)
+from backend.core.logs import setup_logging, stop_logging
+from backend.core.middleware import RequestIdMiddleware
+from backend.settings import cors_origins, is_mock_mode
+from backend.core.ratelimit import RateLimitMiddleware
+from backend.services.clients import open_registry, close_registry
+from backend.core.tiered_cache import close_caches
+from backend.services.prefetch import start_prefetcher, stop_prefetcher
+from backend.services.sentiment import FINBERT_TOP_N, newsapi_calls_per_refresh, prefetch_documents, documents_freshness
+from backend.services.stream import stop_keeper
+from backend.services.timeseries import close_store
+from backend.services.warmup import readiness, start_warmup, stop_warmup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Here rather than at import, so importing the app (tests, benches) does
+    # not start the log writer thread.
+    setup_logging()
+    app.state.clients = open_registry()
+    if is_mock_mode():
+        readiness.mark_ready()
+    else:
+        start_warmup(finbert=FINBERT_TOP_N > 0)
+        start_prefetcher(prefetch_documents, documents_freshness, calls_per_refresh=newsapi_calls_per_refresh())
+    try:
+        yield
+    finally:
+        await stop_warmup()
+        await stop_keeper()
+        await stop_prefetcher()
+        await close_caches()
+        close_registry()
+        close_store()
+        stop_logging()
 
-app = FastAPI(title="Pioni API", version="0.3.0")
+app = FastAPI(title="Pioni API", version="0.3.0", lifespan=lifespan)
 
-app.middleware("http")(attach_request_id)
+app.add_middleware(RequestIdMiddleware)
 
-app.middleware("http")(rate_limit_middleware)
+app.add_middleware(RateLimitMiddleware)
 
 app.add_middleware(
     CORSMiddleware,
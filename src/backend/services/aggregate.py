@@ -0,0 +1,267 @@
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from backend.services.scoring import AGE_HALF_LIFE_HOURS
+
+AGGREGATE_MAX_TICKERS = int(os.getenv("AGGREGATE_MAX_TICKERS", "2000"))
+
+# Per-second decay rate matching _age_weight.
+_DECAY = math.log(2) / (AGE_HALF_LIFE_HOURS * 3600.0)
+# Dated sums are kept relative to an anchor time; once an item is this many
+# e-folds newer than the anchor the anchor moves forward, long before exp()
+# gets anywhere near overflowing.
+_MAX_EXPONENT = 60.0
+
+# key -> (source, blended score before decay, epoch ts or None, document)
+Entry = Tuple[str, float, Optional[float], Dict[str, Any]]
+
+
+def item_key(item: Dict[str, Any]) -> str:
+    ident = item.get("id")
+    if ident:
+        return f"{item.get('source')}:{ident}"
+    return hashlib.blake2b(f"{item.get('source')}\0{item.get('text')}".encode("utf-8"), digest_size=12).hexdigest()
+
+
+def window_keys(items: Iterable[Dict[str, Any]]) -> List[str]:
+    """One key per item; repeats of the same item get their own key so they still count."""
+    seen: Dict[str, int] = {}
+    keys = []
+    for it in items:
+        k = item_key(it)
+        n = seen.get(k, 0)
+        seen[k] = n + 1
+        keys.append(k if n == 0 else f"{k}#{n}")
+    return keys
+
+
+class RunningAggregate:
+    """
+    Running per-source count, sum and sum of squares of age-weighted scores.
+
+    An item's weight exp(-decay * (now - ts)) factors into exp(decay * (ts -
+    anchor)), fixed when the item arrives, times exp(-decay * (now - anchor)),
+    shared by every dated item. So the sums only change when items enter or
+    leave the window, and reading them at any later time is O(sources).
+    Undated items have weight 1 and are summed separately.
+    """
+
+    def __init__(self, now: float) -> None:
+        self.anchor = now
+        self._entries: Dict[str, Entry] = {}
+        self._order: List[str] = []
+        self._dated: Dict[str, List[float]] = {}
+        self._undated: Dict[str, List[float]] = {}
+        self._columns: Optional[Tuple[Any, Any, Any, List[Dict[str, Any]]]] = None
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _add(self, source: str, raw: float, ts: Optional[float], sign: int) -> None:
+        if ts is None:
+            m = self._undated.setdefault(source, [0, 0.0, 0.0])
+            x = raw
+        else:
+            m = self._dated.setdefault(source, [0, 0.0, 0.0])
+            x = raw * math.exp(_DECAY * (ts - self.anchor))
+        m[0] += sign
+        m[1] += sign * x
+        m[2] += sign * x * x
+
+    def _rebase(self, now: float) -> None:
+        self.anchor = now
+        self._dated = {}
+        for source, raw, ts, _ in self._entries.values():
+            if ts is not None:
+                self._add(source, raw, ts, 1)
+
+    def update(self, keys: List[str], fresh: Dict[str, Entry], now: float) -> Tuple[int, int]:
+        """
+        Make the window exactly `keys`. Entries in `fresh` are added, or
+        replace the key's earlier entry (a VADER fallback rescored with
+        FinBERT); other keys already present keep their earlier scores.
+        Returns (added, removed), replacements counting as added.
+        """
+        keep = set(keys)
+        removed = [k for k in self._entries if k not in keep]
+        for k in removed:
+            source, raw, ts, _ = self._entries.pop(k)
+            self._add(source, raw, ts, -1)
+
+        added = 0
+        for k in keys:
+            if k not in fresh:
+                continue
+            if k in self._entries:
+                source, raw, ts, _ = self._entries.pop(k)
+                self._add(source, raw, ts, -1)
+            source, raw, ts, doc = fresh[k]
+            if ts is not None:
+                # Future timestamps (clock skew) count as brand new, as _age_weight does.
+                ts = min(ts, now)
+                if _DECAY * (ts - self.anchor) > _MAX_EXPONENT:
+                    self._rebase(now)
+            self._entries[k] = (source, raw, ts, doc)
+            self._add(source, raw, ts, 1)
+            added += 1
+
+        self._order = [k for k in keys if k in self._entries]
+        self._columns = None
+        if not self._entries:
+            self._dated, self._undated = {}, {}
+        return added, len(removed)
+
+    def model(self, key: str) -> str:
+        """The model the key's score came from."""
+        return self._entries[key][3].get("model", "vader")
+
+    def moments(self, now: float) -> Dict[str, Tuple[int, float, float]]:
+        """Per source (n, sum, sum of squares) of the scores weighted as of now."""
+        f = math.exp(-_DECAY * (now - self.anchor))
+        out: Dict[str, Tuple[int, float, float]] = {}
+        for source in {*self._dated, *self._undated}:
+            dn, ds, ds2 = self._dated.get(source, (0, 0.0, 0.0))
+            un, us, us2 = self._undated.get(source, (0, 0.0, 0.0))
+            if dn + un:
+                out[source] = (int(dn + un), ds * f + us, ds2 * f * f + us2)
+        return out
+
+    def weighted(self, now: float) -> List[Tuple[float, Dict[str, Any]]]:
+        """(score as of now, document) for every item in the window, in window order."""
+        out = []
+        for k in self._order:
+            _, raw, ts, doc = self._entries[k]
+            w = 1.0 if ts is None else math.exp(-_DECAY * max(0.0, now - ts))
+            out.append((raw * w, doc))
+        return out
+
+    def columns(self) -> Tuple[Any, Any, Any, List[Dict[str, Any]]]:
+        """
+        The window as numpy columns: (blended score before decay, epoch ts or
+        NaN, scored-by-FinBERT mask, documents), in window order. Built on first
+        use after each update, so repeated reads between refreshes are free.
+        """
+        if self._columns is None:
+            import numpy as np
+
+            entries = [self._entries[k] for k in self._order]
+            n = len(entries)
+            raw = np.fromiter((e[1] for e in entries), dtype=np.float64, count=n)
+            ts = np.fromiter((math.nan if e[2] is None else e[2] for e in entries), dtype=np.float64, count=n)
+            finbert = np.fromiter((e[3].get("model") == "finbert" for e in entries), dtype=bool, count=n)
+            self._columns = (raw, ts, finbert, [e[3] for e in entries])
+        return self._columns
+
+    def documents(self) -> List[Dict[str, Any]]:
+        return [self._entries[k][3] for k in self._order]
+
+
+class AggregateStore:
+    """Bounded LRU of RunningAggregate per ticker; an evicted ticker just rescores on its next refresh."""
+
+    def __init__(self, max_tickers: int = AGGREGATE_MAX_TICKERS) -> None:
+        self.max_tickers = max(1, max_tickers)
+        self._data: "OrderedDict[str, RunningAggregate]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.added = 0
+        self.removed = 0
+        self.reused = 0
+
+    def get(self, ticker: str, now: float) -> RunningAggregate:
+        with self._lock:
+            agg = self._data.get(ticker)
+            if agg is None:
+                agg = self._data[ticker] = RunningAggregate(now)
+                while len(self._data) > self.max_tickers:
+                    self._data.popitem(last=False)
+            else:
+                self._data.move_to_end(ticker)
+            return agg
+
+    def record(self, added: int, removed: int, total: int) -> None:
+        self.added += added
+        self.removed += removed
+        self.reused += total - added
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tickers": len(self._data),
+            "items_added": self.added,
+            "items_removed": self.removed,
+            "items_reused": self.reused,
+        }
+
+
+class StreamingAggregate:
+    """
+    Constant-size summary of a window too deep to keep: per-source count, sum
+    and sum of squares of (already age-weighted) scores, the k strongest
+    positive and negative documents for highlights, and the most recent
+    documents for the feed. Items are folded in one at a time and dropped.
+    """
+
+    def __init__(self, highlights: int = 2, keep_docs: int = 48) -> None:
+        self.k = max(0, highlights)
+        self.keep_docs = max(0, keep_docs)
+        self.moments: Dict[str, List[float]] = {}
+        self.finbert = 0
+        self._seq = itertools.count()
+        # Min-heaps of (key, seq, doc): the root is always the first to go.
+        self._pos: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._neg: List[Tuple[float, int, Dict[str, Any]]] = []
+        self._recent: List[Tuple[float, int, Dict[str, Any]]] = []
+
+    def __len__(self) -> int:
+        return int(sum(m[0] for m in self.moments.values()))
+
+    @staticmethod
+    def _push(heap: List[Tuple[float, int, Dict[str, Any]]], cap: int, entry: Tuple[float, int, Dict[str, Any]]) -> None:
+        if len(heap) < cap:
+            heapq.heappush(heap, entry)
+        elif cap and entry[0] > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def add(self, source: str, score: float, ts: Optional[float], doc: Dict[str, Any]) -> None:
+        m = self.moments.setdefault(source, [0, 0.0, 0.0])
+        m[0] += 1
+        m[1] += score
+        m[2] += score * score
+        if doc.get("model") == "finbert":
+            self.finbert += 1
+
+        seq = next(self._seq)
+        if score > 0:
+            self._push(self._pos, self.k, (score, seq, doc))
+        elif score < 0:
+            self._push(self._neg, self.k, (-score, seq, doc))
+        self._push(self._recent, self.keep_docs, (-math.inf if ts is None else ts, seq, doc))
+
+    def merge(self, other: "StreamingAggregate") -> None:
+        for source, (n, total, total2) in other.moments.items():
+            m = self.moments.setdefault(source, [0, 0.0, 0.0])
+            m[0] += n
+            m[1] += total
+            m[2] += total2
+        self.finbert += other.finbert
+        for mine, theirs, cap in ((self._pos, other._pos, self.k), (self._neg, other._neg, self.k), (self._recent, other._recent, self.keep_docs)):
+            for key, _, doc in theirs:
+                self._push(mine, cap, (key, next(self._seq), doc))
+
+    def highlights(self) -> List[Tuple[float, Dict[str, Any]]]:
+        """(score, document), strongest positive first, then strongest negative first."""
+        pos = [(key, doc) for key, _, doc in sorted(self._pos, reverse=True)]
+        neg = [(-key, doc) for key, _, doc in sorted(self._neg, reverse=True)]
+        return pos + neg
+
+    def documents(self) -> List[Dict[str, Any]]:
+        """The kept documents, newest first."""
+        return [doc for _, _, doc in sorted(self._recent, key=lambda e: (e[0], -e[1]), reverse=True)]
@@ -0,0 +1,256 @@
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Dict, Iterator, Optional, Tuple
+
+# praw, newsapi and requests cost a few hundred ms to import and are only
+# needed once a live request reaches an upstream, so they load on first use.
+if TYPE_CHECKING:
+    import praw
+    import requests
+    from newsapi import NewsApiClient
+
+REDDIT_USER_AGENT = "pioni_by_u/AquaBzy"
+
+UPSTREAM_POOL_SIZE = int(os.getenv("UPSTREAM_POOL_SIZE", "10"))
+REDDIT_CLIENT_POOL_SIZE = int(os.getenv("REDDIT_CLIENT_POOL_SIZE", "3"))
+
+# Upstream base URL overrides, for local fakes (see bench/fake_upstreams.py) or proxies.
+NEWSAPI_BASE_URL = os.getenv("NEWSAPI_BASE_URL", "").rstrip("/")
+REDDIT_URL = os.getenv("REDDIT_URL", "").rstrip("/")
+REDDIT_OAUTH_URL = os.getenv("REDDIT_OAUTH_URL", "").rstrip("/")
+_NEWSAPI_ORIGIN = "https://newsapi.org"
+
+
+@lru_cache(maxsize=None)
+def _rebased_session_class():
+    import requests
+
+    class _RebasedSession(requests.Session):
+        """A Session that sends requests for one origin to another base URL."""
+
+        def __init__(self, origin: str, base: str) -> None:
+            super().__init__()
+            self.origin = origin
+            self.base = base
+
+        def request(self, method, url, *args, **kwargs):
+            if isinstance(url, str) and url.startswith(self.origin):
+                url = self.base + url[len(self.origin):]
+            return super().request(method, url, *args, **kwargs)
+
+    return _RebasedSession
+
+
+def _pooled_session(pool_size: int, session: "Optional[requests.Session]" = None) -> "requests.Session":
+    import requests
+    from requests.adapters import HTTPAdapter
+
+    session = session or requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def _pool_counts(session: "Optional[requests.Session]") -> Tuple[int, int]:
+    """(connections opened, requests sent) across every urllib3 pool of a session."""
+    conns = reqs = 0
+    if session is None:
+        return conns, reqs
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        for key in list(adapter.poolmanager.pools.keys()):
+            pool = adapter.poolmanager.pools.get(key)
+            if pool is None:
+                continue
+            conns += pool.num_connections
+            reqs += pool.num_requests
+    return conns, reqs
+
+
+class ClientRegistry:
+    """
+    Long-lived upstream clients shared by every service.
+
+    NewsAPI goes through one keep-alive requests.Session. praw instances are not
+    safe to share across threads, so Reddit clients are checked out of a small
+    pool; each keeps its own session and its OAuth token until the token expires.
+    """
+
+    def __init__(self, pool_size: int = UPSTREAM_POOL_SIZE, reddit_pool_size: int = REDDIT_CLIENT_POOL_SIZE) -> None:
+        self.pool_size = pool_size
+        self.reddit_pool_size = reddit_pool_size
+        self._lock = threading.Lock()
+
+        self._news_session: "Optional[requests.Session]" = None
+        self._newsapi: "Optional[NewsApiClient]" = None
+        self._newsapi_key: Optional[str] = None
+
+        self._reddit_creds: Optional[Tuple[str, str]] = None
+        self._reddit_idle: "queue.LifoQueue[praw.Reddit]" = queue.LifoQueue()
+        self._reddit_sessions: "Dict[int, requests.Session]" = {}
+
+        self._counters = {
+            "newsapi_clients_created": 0,
+            "newsapi_checkouts": 0,
+            "reddit_clients_created": 0,
+            "reddit_checkouts": 0,
+        }
+
+    def newsapi(self) -> "Optional[NewsApiClient]":
+        api_key = os.getenv("NEWS_API_KEY")
+        if not api_key:
+            return None
+
+        with self._lock:
+            if self._newsapi is None or self._newsapi_key != api_key:
+                from newsapi import NewsApiClient
+
+                if self._news_session is None:
+                    self._news_session = _pooled_session(
+                        self.pool_size,
+                        _rebased_session_class()(_NEWSAPI_ORIGIN, NEWSAPI_BASE_URL) if NEWSAPI_BASE_URL else None,
+                    )
+                self._newsapi = NewsApiClient(api_key=api_key, session=self._news_session)
+                self._newsapi_key = api_key
+                self._counters["newsapi_clients_created"] += 1
+            self._counters["newsapi_checkouts"] += 1
+            return self._newsapi
+
+    def reddit_configured(self) -> bool:
+        return bool(os.getenv("REDDIT_CLIENT_ID") and os.getenv("REDDIT_CLIENT_SECRET"))
+
+    def _new_reddit(self, client_id: str, client_secret: str) -> "praw.Reddit":
+        import praw
+
+        session = _pooled_session(self.pool_size)
+        reddit = praw.Reddit(
+            client_id=client_id,
+            client_secret=client_secret,
+            user_agent=REDDIT_USER_AGENT,
+            requestor_kwargs={"session": session},
+            **({"reddit_url": REDDIT_URL} if REDDIT_URL else {}),
+            **({"oauth_url": REDDIT_OAUTH_URL} if REDDIT_OAUTH_URL else {}),
+        )
+        with self._lock:
+            self._reddit_sessions[id(reddit)] = session
+            self._counters["reddit_clients_created"] += 1
+        return reddit
+
+    @contextmanager
+    def reddit(self) -> "Iterator[praw.Reddit]":
+        client_id = os.getenv("REDDIT_CLIENT_ID")
+        client_secret = os.getenv("REDDIT_CLIENT_SECRET")
+        if not client_id or not client_secret:
+            raise RuntimeError("Reddit credentials missing")
+
+        creds = (client_id, client_secret)
+        with self._lock:
+            if self._reddit_creds != creds:
+                self._drain_reddit()
+                self._reddit_creds = creds
+            self._counters["reddit_checkouts"] += 1
+
+        try:
+            reddit = self._reddit_idle.get_nowait()
+        except queue.Empty:
+            reddit = self._new_reddit(client_id, client_secret)
+
+        try:
+            yield reddit
+        finally:
+            with self._lock:
+                keep = self._reddit_creds == creds and self._reddit_idle.qsize() < self.reddit_pool_size
+            if keep:
+                self._reddit_idle.put(reddit)
+            else:
+                self._close_reddit(reddit)
+
+    def _close_reddit(self, reddit: "praw.Reddit") -> None:
+        with self._lock:
+            session = self._reddit_sessions.pop(id(reddit), None)
+        if session is not None:
+            session.close()
+
+    def _drain_reddit(self) -> None:
+        # Caller holds self._lock.
+        while True:
+            try:
+                reddit = self._reddit_idle.get_nowait()
+            except queue.Empty:
+                return
+            session = self._reddit_sessions.pop(id(reddit), None)
+            if session is not None:
+                session.close()
+
+    def stats(self) -> Dict[str, Any]:
+        news_conns, news_reqs = _pool_counts(self._news_session)
+
+        reddit_conns = reddit_reqs = 0
+        with self._lock:
+            reddit_sessions = list(self._reddit_sessions.values())
+            counters = dict(self._counters)
+        for session in reddit_sessions:
+            c, r = _pool_counts(session)
+            reddit_conns += c
+            reddit_reqs += r
+
+        def reuse(conns: int, reqs: int) -> float:
+            return round(1.0 - conns / reqs, 4) if reqs else 0.0
+
+        return {
+            **counters,
+            "reddit_clients_idle": self._reddit_idle.qsize(),
+            "newsapi_connections": news_conns,
+            "newsapi_requests": news_reqs,
+            "newsapi_reuse_ratio": reuse(news_conns, news_reqs),
+            "reddit_connections": reddit_conns,
+            "reddit_requests": reddit_reqs,
+            "reddit_reuse_ratio": reuse(reddit_conns, reddit_reqs),
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._drain_reddit()
+            for session in self._reddit_sessions.values():
+                session.close()
+            self._reddit_sessions.clear()
+            news_session, self._news_session = self._news_session, None
+            self._newsapi = None
+        if news_session is not None:
+            news_session.close()
+
+
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def get_registry() -> ClientRegistry:
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
+
+
+def open_registry() -> ClientRegistry:
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ClientRegistry()
+        return _registry
+
+
+def close_registry() -> None:
+    global _registry
+    with _registry_lock:
+        if _registry is not None:
+            _registry.close()
+        _registry = None
@@ -0,0 +1,89 @@
+"""
+Array versions of the per-item scoring and aggregation steps.
+
+Large windows (hundreds to thousands of items per ticker) go through here:
+age weights, blends, per-source means, confidence and top-k highlights
+are each one or two numpy operations over columns of scores, epoch
+timestamps (NaN when undated) and source codes. Below COLUMNAR_MIN_ITEMS
+the plain Python paths in scoring.py and sentiment.py are faster, since
+each numpy call has a fixed overhead, so those stay in use there.
+"""
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from backend.services.scoring import AGE_HALF_LIFE_HOURS, FINBERT_WEIGHT, VADER_WEIGHT, confidence_from_moments
+
+SOURCES = ("news", "reddit")
+_CODES = {s: i for i, s in enumerate(SOURCES)}
+_OTHER = len(SOURCES)
+
+_DECAY = math.log(2) / (AGE_HALF_LIFE_HOURS * 3600.0)
+
+
+def epoch(ts: Optional[datetime]) -> float:
+    """Epoch seconds, NaN for None; naive datetimes are UTC, as in _age_weight."""
+    if ts is None:
+        return math.nan
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return ts.timestamp()
+
+
+def source_codes(sources: Iterable[str]) -> np.ndarray:
+    return np.fromiter((_CODES.get(s, _OTHER) for s in sources), dtype=np.int8)
+
+
+def age_weights(ts: np.ndarray, now: float) -> np.ndarray:
+    """exp(-decay * age) per item; undated (NaN) items weigh 1 and future ones count as brand new."""
+    w = np.exp(-_DECAY * np.maximum(0.0, now - ts))
+    return np.where(np.isnan(ts), 1.0, w)
+
+
+def blend(vader: np.ndarray, finbert: np.ndarray) -> np.ndarray:
+    """scoring.blend over columns; NaN in finbert means VADER only."""
+    return np.where(np.isnan(finbert), vader, VADER_WEIGHT * vader + FINBERT_WEIGHT * np.nan_to_num(finbert))
+
+
+def top_k(values: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k largest values, largest first, by partial selection."""
+    k = min(k, len(values))
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    idx = np.argpartition(-values, k - 1)[:k]
+    return idx[np.argsort(-values[idx], kind="stable")]
+
+
+def highlight_indices(scores: np.ndarray, k: int = 2) -> Tuple[List[int], List[int]]:
+    """Up to k most positive (> 0) and k most negative (< 0) items, strongest first."""
+    pos = [int(i) for i in top_k(scores, k) if scores[i] > 0]
+    neg = [int(i) for i in top_k(-scores, k) if scores[i] < 0]
+    return pos, neg
+
+
+def summarize(scores: np.ndarray, codes: np.ndarray) -> Dict[str, Any]:
+    """
+    Mean, variance, per-source count and mean, and confidence of a window of
+    (already age-weighted) scores.
+    """
+    n = len(scores)
+    counts = np.bincount(codes, minlength=_OTHER + 1)
+    sums = np.bincount(codes, weights=scores, minlength=_OTHER + 1)
+    has_news, has_reddit = bool(counts[_CODES["news"]]), bool(counts[_CODES["reddit"]])
+    mean = float(scores.mean()) if n else 0.0
+    var = float(scores.var()) if n else 0.0
+    return {
+        "n": n,
+        "mean": mean,
+        "counts": {s: int(counts[i]) for i, s in enumerate(SOURCES)},
+        "means": {s: float(sums[i] / counts[i]) for i, s in enumerate(SOURCES) if counts[i]},
+        "confidence": confidence_from_moments(n, var, has_news, has_reddit),
+    }
+
+
+def document_columns(docs: Sequence[Dict[str, Any]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(score, source code) columns of a document list."""
+    scores = np.fromiter((d["score"] for d in docs), dtype=np.float64, count=len(docs))
+    return scores, source_codes(d["source"] for d in docs)
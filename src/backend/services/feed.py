@@ -1,146 +1,168 @@
+import heapq
+import logging
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Tuple, Optional
+import time
+from typing import Any, Callable, Dict, List, Tuple, Optional
 from fastapi import Request
-from newsapi import NewsApiClient
-import praw
 from backend.settings import is_mock_mode
+from backend.core.metrics import STAGE_SECONDS
+from backend.core.tiered_cache import make_cache
+from backend.services import sentiment
+from backend.services.ingest import gather_sources
 from backend.services.scoring import vader_score
+from backend.services.sentiment import get_documents
 
-def _ago(ts: Optional[datetime]) -> str:
+# The feed has its own SWR entry per ticker, so dashboards polling it are
+# served from memory and concurrent misses for a ticker share one compute.
+# Cached items keep epoch timestamps; "ago" is rendered per response.
+FEED_CACHE_TTL_SECONDS = int(os.getenv("FEED_CACHE_TTL_SECONDS", "300"))
+FEED_CACHE_STALE_SECONDS = int(os.getenv("FEED_CACHE_STALE_SECONDS", "30"))
+FEED_MAX_ITEMS = int(os.getenv("FEED_MAX_ITEMS", "12"))
+
+_feed_cache = make_cache("feed")
+
+
+def feed_cache_stats() -> Dict[str, Any]:
+    return _feed_cache.stats()
+
+
+def _ago(ts: Optional[float], now: float) -> str:
     if not ts:
         return ""
-    now = datetime.now(timezone.utc)
-    if ts.tzinfo is None:
-        ts = ts.replace(tzinfo=timezone.utc)
-    mins = int((now - ts).total_seconds() // 60)
+    mins = max(0, int((now - ts) // 60))
     if mins < 60:
         return f"{mins} min ago"
     hrs = mins // 60
     return f"{hrs} h ago"
 
 
+def serialize(feed: Dict[str, Any], now: Optional[float] = None) -> Dict[str, Any]:
+    """The response body: each cached item with its timestamp rendered as "ago"."""
+    now = time.time() if now is None else now
+    items = []
+    for it in feed["items"]:
+        out = {k: v for k, v in it.items() if k != "ts"}
+        out["ago"] = _ago(it.get("ts"), now)
+        items.append(out)
+    return {"ticker": feed["ticker"], "items": items}
+
+
+def _mock_feed(ticker: str) -> Dict[str, Any]:
+    import random
+
+    now = time.time()
+    items: List[Dict[str, Any]] = []
+
+    for i in range(3):
+        items.append(
+            {
+                "id": f"news-{i}",
+                "type": "news",
+                "title": f"{ticker} mock news headline {i + 1}",
+                "source": "Mock Newswire",
+                "score": round(random.uniform(-1, 1), 2),
+                "ts": now - (i + 1) * 45 * 60,
+            }
+        )
+
+    for i in range(2):
+        items.append(
+            {
+                "id": f"reddit-{i}",
+                "type": "reddit",
+                "title": f"{ticker} mock Reddit thread {i + 1}",
+                "source": "r/mockstocks",
+                "score": round(random.uniform(-1, 1), 2),
+                "ts": now - (i + 4) * 30 * 60,
+            }
+        )
+
+    return {"ticker": ticker, "items": items}
+
+
 async def get_feed(ticker: str, request: Request) -> Tuple[Dict[str, Any], str]:
     ticker = ticker.upper()
     if is_mock_mode():
-        import random
-
-        items: List[Dict[str, Any]] = []
-
-        for i in range(3):
-            minutes_ago = (i + 1) * 45
-            ago_str = f"{minutes_ago} min ago" if minutes_ago < 180 else f"{minutes_ago // 60} h ago"
-            items.append(
-                {
-                    "id": f"news-{i}",
-                    "type": "news",
-                    "title": f"{ticker} mock news headline {i + 1}",
-                    "source": "Mock Newswire",
-                    "score": round(random.uniform(-1, 1), 2),
-                    "ago": ago_str,
-                }
-            )
-
-        for i in range(2):
-            minutes_ago = (i + 4) * 30
-            ago_str = f"{minutes_ago} min ago" if minutes_ago < 180 else f"{minutes_ago // 60} h ago"
-            items.append(
-                {
-                    "id": f"reddit-{i}",
-                    "type": "reddit",
-                    "title": f"{ticker} mock Reddit thread {i + 1}",
-                    "source": "r/mockstocks",
-                    "score": round(random.uniform(-1, 1), 2),
-                    "ago": ago_str,
-                }
-            )
-
-        return {"ticker": ticker, "items": items}, "MOCK"
-
+        return serialize(_mock_feed(ticker)), "MOCK"
+
+    # A feed miss rebuilt from an already cached document set never went
+    # upstream, so it reports the document cache's status instead.
+    docs_status: Dict[str, str] = {}
+
+    async def compute() -> Dict[str, Any]:
+        with STAGE_SECONDS.time("feed_documents"):
+            try:
+                docs, docs_status["status"] = await get_documents(ticker, request)
+            except Exception as e:
+                # The feed only shows VADER scores, so it should not fail
+                # with the sentiment compute (FinBERT down, upstream errors).
+                logging.warning(f"Feed for {ticker} falling back to VADER-only items: {e}")
+                docs = await _vader_documents(ticker)
+
+        with STAGE_SECONDS.time("feed_render"):
+            return _render(ticker, docs)
+
+    feed, cache_status = await _feed_cache.get_or_compute_swr(
+        f"feed:{ticker}",
+        ttl_seconds=FEED_CACHE_TTL_SECONDS,
+        stale_seconds=FEED_CACHE_STALE_SECONDS,
+        compute=compute,
+    )
+    if cache_status == "MISS":
+        cache_status = docs_status.get("status", cache_status)
+    return serialize(feed), cache_status
+
+
+def _vader_items(fetch: Callable[[str], List[Dict[str, Any]]], ticker: str) -> List[Dict[str, Any]]:
+    try:
+        items = fetch(ticker)
+    except Exception as e:
+        logging.warning(f"Feed source failed for {ticker}: {e}")
+        return []
+    return [
+        {
+            "id": it.get("id") or "",
+            "source": it["source"],
+            "origin": it.get("origin") or "",
+            "text": it["text"],
+            "ts": it["ts"].timestamp() if it.get("ts") else None,
+            "vader": vader_score(it["text"]),
+        }
+        for it in items
+    ]
+
+
+async def _vader_documents(ticker: str) -> Dict[str, Any]:
+    """Documents for the feed alone: each source fetched on its own, failures dropped, VADER scores only."""
+    news, reddit = await gather_sources(
+        lambda: _vader_items(sentiment.fetch_news_items, ticker),
+        lambda: _vader_items(sentiment.fetch_reddit_items, ticker),
+    )
+    return {"ticker": ticker, "items": [*news, *reddit]}
+
+
+def _render(ticker: str, docs: Dict[str, Any]) -> Dict[str, Any]:
+    """The FEED_MAX_ITEMS newest items, undated ones last, reddit reposts dropped."""
     items: List[Dict[str, Any]] = []
-
-    api_key = os.getenv("NEWS_API_KEY")
-    if api_key:
-        try:
-            newsapi = NewsApiClient(api_key=api_key)
-            query = f'{ticker} stock OR shares OR earnings'
-            res = newsapi.get_everything(q=query, language="en", page_size=10)
-            articles = res.get("articles") or []
-
-            for idx, a in enumerate(articles):
-                title = a.get("title")
-                if not title:
-                    continue
-
-                source_name = (a.get("source") or {}).get("name") or "News"
-                published_at = a.get("publishedAt")
-                dt = None
-                if published_at:
-                    try:
-                        dt = datetime.fromisoformat(published_at.replace("Z", "+00:00")).astimezone(timezone.utc)
-                    except Exception:
-                        dt = None
-
-                items.append(
-                    {
-                        "id": f"news-{idx}",
-                        "type": "news",
-                        "title": title,
-                        "source": source_name,
-                        "score": round(float(vader_score(title)), 2),
-                        "ago": _ago(dt),
-                    }
-                )
-        except Exception:
-            pass
-
-    client_id = os.getenv("REDDIT_CLIENT_ID")
-    client_secret = os.getenv("REDDIT_CLIENT_SECRET")
-    if client_id and client_secret:
-        try:
-            reddit = praw.Reddit(
-                client_id=client_id,
-                client_secret=client_secret,
-                user_agent="pioni_by_u/AquaBzy",
-            )
-
-            subs = ["stocks", "wallstreetbets", "investing"]
-            seen = set()
-
-            for sub in subs:
-                posts = reddit.subreddit(sub).search(query=ticker, sort="new", limit=5)
-                for p in posts:
-                    title = getattr(p, "title", None)
-                    if not title:
-                        continue
-                    if title in seen:
-                        continue
-                    seen.add(title)
-
-                    created = getattr(p, "created_utc", None)
-                    dt = datetime.fromtimestamp(created, tz=timezone.utc) if created else None
-
-                    items.append(
-                        {
-                            "id": f"reddit-{sub}-{len(seen)}",
-                            "type": "reddit",
-                            "title": title,
-                            "source": f"r/{sub}",
-                            "score": round(float(vader_score(title)), 2),
-                            "ago": _ago(dt),
-                        }
-                    )
-        except Exception:
-            pass
-
-    def _sort_key(x: Dict[str, Any]) -> int:
-        ago = x.get("ago") or ""
-        if "min" in ago:
-            return int(ago.split(" ")[0])
-        if "h" in ago:
-            return int(ago.split(" ")[0]) * 60
-        return 10**9
-
-    items.sort(key=_sort_key)
-
-    return {"ticker": ticker, "items": items[:12]}, "MISS"
\ No newline at end of file
+    seen = set()
+    for d in docs["items"]:
+        title = d["text"]
+        if d["source"] == "reddit":
+            if title in seen:
+                continue
+            seen.add(title)
+
+        items.append(
+            {
+                "id": d["id"] or f"{d['source']}-{len(items)}",
+                "type": d["source"],
+                "title": title,
+                "source": d["origin"] or ("News" if d["source"] == "news" else "Reddit"),
+                "score": round(float(d["vader"]), 2),
+                "ts": d.get("ts"),
+            }
+        )
+
+    # nlargest keeps input order among equal keys, like the stable sort it replaces.
+    newest = heapq.nlargest(FEED_MAX_ITEMS, items, key=lambda x: x["ts"] if x["ts"] else float("-inf"))
+    return {"ticker": ticker, "items": newest}
@@ -1,31 +1,69 @@
-import hashlib
-from datetime import date, timedelta
-from typing import Any, Dict, Tuple
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
 from fastapi import Request
 from backend.settings import is_mock_mode
-from backend.services.sentiment import get_sentiment
+from backend.core.errors import raise_api_error
+from backend.services.ingest import run_blocking
+from backend.services.timeseries import RESOLUTIONS, get_store
 
-def _stable_jitter(ticker: str, day_iso: str) -> float:
-    digest = hashlib.sha256(f"{ticker}:{day_iso}".encode("utf-8")).hexdigest()
-    n = int(digest[:8], 16)
-    r = (n % 1000) / 999.0
-    return (r - 0.5) * 0.24  
+DEFAULT_RANGE_SECONDS = 7 * 86400
+# 9999-12-31T23:59:59Z; also keeps epoch values inside SQLite's INTEGER range.
+MAX_EPOCH_SECONDS = 253402300799
 
-async def get_history(ticker: str, request: Request) -> Tuple[Dict[str, Any], str]:
+
+def _parse_time(value: Optional[str], default: int, request: Request, name: str) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        ts = int(float(value))
+    except (ValueError, OverflowError):
+        ts = None
+    if ts is not None:
+        if abs(ts) > MAX_EPOCH_SECONDS:
+            raise_api_error(request, 422, "INVALID_RANGE", f"'{name}' is out of range.")
+        return ts
+    try:
+        dt = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        raise_api_error(request, 422, "INVALID_RANGE", f"'{name}' must be an ISO date/time or epoch seconds.")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return int(dt.timestamp())
+
+
+async def get_history(
+    ticker: str,
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    resolution: str = "1d",
+) -> Tuple[Dict[str, Any], str]:
     ticker = ticker.upper()
 
     if is_mock_mode():
         return {"ticker": ticker, "history": []}, "MOCK"
 
-    sentiment_payload, cache_status = await get_sentiment(ticker, request)
-    base = float(sentiment_payload.get("sentiment") or 0.0)
+    if resolution != "raw" and resolution not in RESOLUTIONS:
+        raise_api_error(request, 422, "INVALID_RESOLUTION", f"resolution must be one of raw, {', '.join(RESOLUTIONS)}.")
+
+    now = int(datetime.now(timezone.utc).timestamp())
+    end_ts = _parse_time(end, now, request, "end")
+    start_ts = _parse_time(start, end_ts - DEFAULT_RANGE_SECONDS, request, "start")
+    if start_ts > end_ts:
+        raise_api_error(request, 422, "INVALID_RANGE", "'start' must not be after 'end'.")
+
+    points = await run_blocking(get_store().query, ticker, start_ts, end_ts, resolution)
 
-    today = date.today()
     history = []
-    for i in range(6, -1, -1):
-        d = (today - timedelta(days=i)).isoformat()
-        score = base + _stable_jitter(ticker, d)
-        score = max(-1.0, min(1.0, score))
-        history.append({"date": d, "score": round(score, 2)})
+    for p in points:
+        dt = datetime.fromtimestamp(p["ts"], tz=timezone.utc)
+        history.append({
+            "date": dt.date().isoformat() if resolution == "1d" else dt.isoformat(),
+            "ts": p["ts"],
+            "score": round(p["score"], 2),
+            "min": round(p["min"], 2),
+            "max": round(p["max"], 2),
+            "count": p["count"],
+        })
 
-    return {"ticker": ticker, "history": history}, cache_status
\ No newline at end of file
+    return {"ticker": ticker, "resolution": resolution, "history": history}, "HIT" if history else "MISS"
@@ -0,0 +1,29 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, List
+
+INGEST_MAX_WORKERS = int(os.getenv("INGEST_MAX_WORKERS", "16"))
+
+# Upstream SDKs (newsapi, praw) are blocking, so every call runs on a worker
+# thread instead of the event loop. Source-level calls and the per-subreddit
+# fan-out use separate pools so a source waiting on its own fan-out can never
+# starve the pool it is waiting on.
+_source_pool = ThreadPoolExecutor(max_workers=INGEST_MAX_WORKERS, thread_name_prefix="ingest")
+_fanout_pool = ThreadPoolExecutor(max_workers=INGEST_MAX_WORKERS, thread_name_prefix="ingest-fanout")
+
+
+async def run_blocking(fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_source_pool, functools.partial(fn, *args, **kwargs))
+
+
+async def gather_sources(*calls: Callable[[], Any]) -> List[Any]:
+    """Run each zero-arg blocking call on its own worker and wait for all of them."""
+    return list(await asyncio.gather(*(run_blocking(c) for c in calls)))
+
+
+def fan_out(fn: Callable[[Any], Any], args: Iterable[Any]) -> List[Any]:
+    """Blocking helper: call fn(arg) for every arg concurrently, results in input order."""
+    return list(_fanout_pool.map(fn, list(args)))
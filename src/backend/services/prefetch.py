@@ -0,0 +1,315 @@
+import asyncio
+import heapq
+import logging
+import math
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from backend.core.resp import TRANSPORT_ERRORS, RespClient
+
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "true").lower() == "true"
+PREFETCH_TICK_SECONDS = float(os.getenv("PREFETCH_TICK_SECONDS", "30"))
+PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "10"))
+PREFETCH_LEAD_SECONDS = float(os.getenv("PREFETCH_LEAD_SECONDS", "15"))
+PREFETCH_HALF_LIFE_SECONDS = float(os.getenv("PREFETCH_HALF_LIFE_SECONDS", "3600"))
+PREFETCH_MIN_SCORE = float(os.getenv("PREFETCH_MIN_SCORE", "2"))
+PREFETCH_MAX_TRACKED = int(os.getenv("PREFETCH_MAX_TRACKED", "1000"))
+PREFETCH_ON_DEMAND_RESERVE = float(os.getenv("PREFETCH_ON_DEMAND_RESERVE", "0.3"))
+NEWSAPI_DAILY_QUOTA = int(os.getenv("NEWSAPI_DAILY_QUOTA", "100"))
+QUOTA_KEY_PREFIX = os.getenv("CACHE_KEY_PREFIX", "pioni:") + "quota:"
+
+
+class PopularityTracker:
+    """Exponentially decayed request counts per ticker, bounded in size."""
+
+    def __init__(self, half_life_seconds: float = PREFETCH_HALF_LIFE_SECONDS, max_tracked: int = PREFETCH_MAX_TRACKED) -> None:
+        self.lam = math.log(2) / max(1e-9, half_life_seconds)
+        self.max_tracked = max(1, max_tracked)
+        self._scores: Dict[str, Tuple[float, float]] = {}
+        self._lock = threading.Lock()
+
+    def _decayed(self, score: float, at: float, now: float) -> float:
+        return score * math.exp(-self.lam * max(0.0, now - at))
+
+    def record(self, ticker: str, now: Optional[float] = None) -> None:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            score, at = self._scores.get(ticker, (0.0, now))
+            self._scores[ticker] = (self._decayed(score, at, now) + 1.0, now)
+            if len(self._scores) > 2 * self.max_tracked:
+                self._prune(now)
+
+    def _prune(self, now: float) -> None:
+        keep = heapq.nlargest(
+            self.max_tracked,
+            self._scores.items(),
+            key=lambda kv: self._decayed(kv[1][0], kv[1][1], now),
+        )
+        self._scores = dict(keep)
+
+    def score(self, ticker: str, now: Optional[float] = None) -> float:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            score, at = self._scores.get(ticker, (0.0, now))
+        return self._decayed(score, at, now)
+
+    def top(self, n: int, min_score: float = 0.0, now: Optional[float] = None) -> List[Tuple[str, float]]:
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            current = [(t, self._decayed(s, at, now)) for t, (s, at) in self._scores.items()]
+        return [kv for kv in heapq.nlargest(n, current, key=lambda kv: kv[1]) if kv[1] >= min_score]
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class QuotaBudget:
+    """
+    Upstream calls spent against a daily allowance that resets at UTC midnight.
+
+    Without a store the count is this process's own. With one (the Redis L2),
+    sync() adds the calls spent here since the last sync to a per-day counter
+    shared by every worker, which expires after the day and survives
+    restarts, and reads back the total. spend() stays synchronous so fetches
+    on worker threads can charge it; the shared count is at most one sync
+    behind.
+    """
+
+    def __init__(
+        self,
+        daily_quota: int = NEWSAPI_DAILY_QUOTA,
+        clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        store: Optional[RespClient] = None,
+        name: str = "newsapi",
+    ) -> None:
+        self.daily_quota = daily_quota
+        self._clock = clock
+        self.store = store
+        self.name = name
+        self._day = self._clock().date()
+        self._used = 0
+        self._pending = 0
+        self.sync_errors = 0
+        self._lock = threading.Lock()
+
+    def _roll(self) -> None:
+        today = self._clock().date()
+        if today != self._day:
+            self._day = today
+            self._used = 0
+            self._pending = 0
+
+    def spend(self, n: int = 1) -> None:
+        with self._lock:
+            self._roll()
+            self._used += n
+            self._pending += n
+
+    def used(self) -> int:
+        with self._lock:
+            self._roll()
+            return self._used
+
+    async def sync(self) -> None:
+        """Push calls spent here to the shared counter and take its total; a no-op without a store."""
+        if self.store is None:
+            return
+        with self._lock:
+            self._roll()
+            day, pending = self._day, self._pending
+        key = f"{QUOTA_KEY_PREFIX}{self.name}:{day.isoformat()}"
+        try:
+            total = await self.store.incrby(key, pending)
+            # Kept an hour past the reset, then it goes away on its own.
+            await self.store.expire(key, self.seconds_until_reset() + 3600)
+        except TRANSPORT_ERRORS as e:
+            self.sync_errors += 1
+            logging.warning(f"Quota sync failed for {self.name}; counting locally: {e}")
+            return
+        with self._lock:
+            if self._day == day:
+                # Calls spent while the INCRBY was in flight stay pending.
+                self._pending -= pending
+                self._used = max(self._used, total + self._pending)
+
+    async def close(self) -> None:
+        if self.store is not None:
+            await self.store.close()
+
+    def remaining(self) -> int:
+        return max(0, self.daily_quota - self.used())
+
+    def prefetch_budget(self, reserve_fraction: float) -> int:
+        """Calls left for prefetching after holding back a share of the day for on-demand misses."""
+        return max(0, self.remaining() - int(math.ceil(self.daily_quota * reserve_fraction)))
+
+    def seconds_until_reset(self) -> float:
+        now = self._clock()
+        midnight = datetime.combine(now.date() + timedelta(days=1), datetime.min.time(), tzinfo=timezone.utc)
+        return max(1.0, (midnight - now).total_seconds())
+
+
+class Prefetcher:
+    """
+    Refreshes the hottest tickers before their cache entries go stale.
+
+    Each tick takes the top-N tickers by decayed popularity and spreads the
+    remaining prefetch budget for the day evenly across them: a ticker is
+    refreshed at most once per (seconds left today * hot tickers * calls per
+    refresh / budget), where a refresh that pages through NewsAPI costs one
+    call per page.
+    The refreshed entry is kept fresh for that whole interval, so hot tickers
+    keep hitting the cache between refreshes. Cold tickers are never
+    prefetched; they are only fetched when someone asks for them.
+    """
+
+    def __init__(
+        self,
+        refresh: Callable[[str, float], Awaitable[Any]],
+        freshness: Callable[[str], Awaitable[Optional[float]]],
+        tracker: "PopularityTracker",
+        quota: "QuotaBudget",
+        top_n: int = PREFETCH_TOP_N,
+        min_score: float = PREFETCH_MIN_SCORE,
+        lead_seconds: float = PREFETCH_LEAD_SECONDS,
+        reserve_fraction: float = PREFETCH_ON_DEMAND_RESERVE,
+        tick_seconds: float = PREFETCH_TICK_SECONDS,
+        calls_per_refresh: int = 1,
+    ) -> None:
+        self._refresh = refresh
+        self._freshness = freshness
+        self.tracker = tracker
+        self.quota = quota
+        self.top_n = top_n
+        self.min_score = min_score
+        self.lead_seconds = lead_seconds
+        self.reserve_fraction = reserve_fraction
+        self.tick_seconds = tick_seconds
+        self.calls_per_refresh = max(1, calls_per_refresh)
+        self._last: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.refreshes = 0
+        self.failures = 0
+
+    def interval_for(self, hot_count: int) -> Optional[float]:
+        budget = self.quota.prefetch_budget(self.reserve_fraction)
+        if budget < self.calls_per_refresh or hot_count <= 0:
+            return None
+        return self.quota.seconds_until_reset() * hot_count * self.calls_per_refresh / budget
+
+    async def tick(self) -> int:
+        hot = self.tracker.top(self.top_n, min_score=self.min_score)
+        await self.quota.sync()
+        interval = self.interval_for(len(hot))
+        if interval is None:
+            return 0
+
+        refreshed = 0
+        for ticker, _ in hot:
+            # Other workers spend from the same counter between refreshes.
+            await self.quota.sync()
+            if self.quota.prefetch_budget(self.reserve_fraction) < self.calls_per_refresh:
+                break
+            now = time.monotonic()
+            if now - self._last.get(ticker, -math.inf) < interval:
+                continue
+
+            fresh_for = await self._freshness(ticker)
+            if fresh_for is not None and fresh_for > self.lead_seconds:
+                continue
+
+            try:
+                await self._refresh(ticker, interval + self.lead_seconds)
+                self.refreshes += 1
+                refreshed += 1
+            except Exception as e:
+                self.failures += 1
+                logging.warning(f"Prefetch failed for {ticker}: {e}")
+            self._last[ticker] = now
+
+        for ticker in [t for t in self._last if t not in dict(hot)]:
+            self._last.pop(ticker, None)
+        return refreshed
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.tick()
+            except Exception as e:
+                logging.warning(f"Prefetch tick failed: {e}")
+            await asyncio.sleep(self.tick_seconds)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        hot = self.tracker.top(self.top_n, min_score=self.min_score)
+        return {
+            "running": self._task is not None,
+            "hot": [{"ticker": t, "score": round(s, 3)} for t, s in hot],
+            "interval_seconds": self.interval_for(len(hot)),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+        }
+
+
+def _quota_store() -> Optional[RespClient]:
+    # Only the redis cache backend has an L2 to share the count through.
+    if os.getenv("CACHE_BACKEND", "memory").lower() != "redis":
+        return None
+    return RespClient.from_url(os.getenv("REDIS_URL", "redis://127.0.0.1:6379/0"))
+
+
+popularity = PopularityTracker()
+newsapi_quota = QuotaBudget(store=_quota_store())
+
+_prefetcher: Optional[Prefetcher] = None
+
+
+def start_prefetcher(
+    refresh: Callable[[str, float], Awaitable[Any]],
+    freshness: Callable[[str], Awaitable[Optional[float]]],
+    calls_per_refresh: int = 1,
+) -> Optional[Prefetcher]:
+    global _prefetcher
+    if not PREFETCH_ENABLED:
+        return None
+    if _prefetcher is None:
+        _prefetcher = Prefetcher(refresh, freshness, popularity, newsapi_quota, calls_per_refresh=calls_per_refresh)
+        _prefetcher.start()
+    return _prefetcher
+
+
+async def stop_prefetcher() -> None:
+    global _prefetcher
+    if _prefetcher is not None:
+        await _prefetcher.stop()
+        _prefetcher = None
+    await newsapi_quota.close()
+
+
+def prefetch_stats() -> Dict[str, Any]:
+    return {
+        "newsapi_quota": {
+            "daily": newsapi_quota.daily_quota,
+            "used": newsapi_quota.used(),
+            "remaining": newsapi_quota.remaining(),
+            "shared": newsapi_quota.store is not None,
+            "sync_errors": newsapi_quota.sync_errors,
+        },
+        "tracked_tickers": len(popularity),
+        "prefetcher": _prefetcher.stats() if _prefetcher else None,
+    }
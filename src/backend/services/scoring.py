@@ -1,13 +1,29 @@
+import abc
+import hashlib
+import inspect
 import math
+import os
+import re
+import shutil
+import tempfile
 import threading
+import time
+import unicodedata
+from collections import OrderedDict, deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from typing import Iterable, Optional
+from itertools import zip_longest
+from typing import Callable, Deque, Dict, Iterable, Optional, Tuple
 
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from backend.core.metrics import FINBERT_BATCH_SIZE, FINBERT_SKIPPED, STAGE_SECONDS
+
 _vader = None
 _finbert = None
+# (monotonic time, error) of the last failed FinBERT load.
+_finbert_failure: Optional[Tuple[float, "FinbertUnavailable"]] = None
 _lock = threading.Lock()
 
 @dataclass(frozen=True)
@@ -16,6 +32,11 @@ class ScoredItem:
     text: str
     score: float
     ts: Optional[datetime] = None
+    vader: float = 0.0
+    id: str = ""
+    origin: str = ""
+    blended: Optional[float] = None
+    model: str = "vader"
 
 def _get_vader() -> SentimentIntensityAnalyzer:
     global _vader
@@ -26,36 +47,228 @@ def _get_vader() -> SentimentIntensityAnalyzer:
 class FinbertUnavailable(Exception):
     pass
 
-def _get_finbert():
-    global _finbert
-    if _finbert is not None:
-        return _finbert
+FINBERT_MODEL_ID = os.getenv("FINBERT_MODEL_ID", "ProsusAI/finbert")
+FINBERT_BACKEND = os.getenv("FINBERT_BACKEND", "pipeline").lower()
+# Intra-op threads for the model runtime; 0 keeps the runtime default (all cores).
+FINBERT_THREADS = int(os.getenv("FINBERT_THREADS", "0"))
+FINBERT_ONNX_DIR = os.getenv("FINBERT_ONNX_DIR", "models/finbert-onnx")
+FINBERT_ONNX_QUANTIZE = os.getenv("FINBERT_ONNX_QUANTIZE", "true").lower() == "true"
+# Export a missing ONNX model during startup warmup; requests never export.
+FINBERT_ONNX_EXPORT = os.getenv("FINBERT_ONNX_EXPORT", "true").lower() == "true"
+# After a failed load, requests fail fast for this long before loading is tried again.
+FINBERT_RETRY_SECONDS = float(os.getenv("FINBERT_RETRY_SECONDS", "60"))
 
-    with _lock:
-        if _finbert is not None:
-            return _finbert
 
+def _signed(label: str, prob: float) -> float:
+    label = label.lower()
+    if "positive" in label:
+        return prob
+    if "negative" in label:
+        return -prob
+    return 0.0
+
+
+class FinbertScorer(abc.ABC):
+    """
+    A FinBERT backend. score() maps texts to the top label's probability,
+    signed by label: positive as is, negative negated, neutral as 0.
+    """
+
+    name = ""
+
+    @abc.abstractmethod
+    def score(self, texts: list[str]) -> list[float]:
+        ...
+
+
+class PipelineScorer(FinbertScorer):
+    """The transformers pipeline, full-precision PyTorch."""
+
+    name = "pipeline"
+
+    def __init__(self, model_id: str = FINBERT_MODEL_ID, threads: int = FINBERT_THREADS) -> None:
         try:
             from transformers import pipeline
         except ModuleNotFoundError as e:
             raise FinbertUnavailable("transformers not installed") from e
 
         try:
-            _finbert = pipeline(
-                "sentiment-analysis",
-                model="ProsusAI/finbert",
-                tokenizer="ProsusAI/finbert",
-            )
-            return _finbert
+            if threads > 0:
+                import torch
+                torch.set_num_threads(threads)
+            self._clf = pipeline("sentiment-analysis", model=model_id, tokenizer=model_id)
         except Exception as e:
             raise FinbertUnavailable(f"FinBERT failed to load: {e}") from e
 
+    def score(self, texts: list[str]) -> list[float]:
+        out = self._clf(texts, truncation=True, batch_size=max(1, min(len(texts), FINBERT_MAX_BATCH)))
+        return [_signed(r.get("label") or "", float(r.get("score") or 0.0)) for r in out]
+
+
+class OnnxScorer(FinbertScorer):
+    """
+    FinBERT on ONNX Runtime, by default with int8 dynamically quantized weights.
+
+    Serving needs onnxruntime and the tokenizer only. The model must already
+    be exported to model_dir, by export_finbert_onnx at build time or by
+    startup warmup (FINBERT_ONNX_EXPORT); a missing model is reported as
+    FinbertUnavailable right away.
+    """
+
+    name = "onnx"
+
+    def __init__(
+        self,
+        model_dir: str = FINBERT_ONNX_DIR,
+        threads: int = FINBERT_THREADS,
+        quantize: bool = FINBERT_ONNX_QUANTIZE,
+    ) -> None:
+        path = onnx_model_path(model_dir, quantize)
+        if not os.path.exists(path):
+            raise FinbertUnavailable(f"no exported FinBERT model at {path}; run export_finbert_onnx first")
+
+        try:
+            import numpy as np
+            import onnxruntime as ort
+            from transformers import AutoConfig, AutoTokenizer
+        except ModuleNotFoundError as e:
+            raise FinbertUnavailable(f"{e.name} not installed") from e
+
+        try:
+            opts = ort.SessionOptions()
+            opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            if threads > 0:
+                opts.intra_op_num_threads = threads
+                opts.inter_op_num_threads = 1
+            self._session = ort.InferenceSession(path, opts, providers=["CPUExecutionProvider"])
+            self._tokenizer = AutoTokenizer.from_pretrained(model_dir)
+            config = AutoConfig.from_pretrained(model_dir)
+        except Exception as e:
+            raise FinbertUnavailable(f"FinBERT ONNX model failed to load: {e}") from e
+
+        self._np = np
+        self._labels = [config.id2label[i] for i in range(len(config.id2label))]
+        self._inputs = {i.name for i in self._session.get_inputs()}
+
+    def score(self, texts: list[str]) -> list[float]:
+        np = self._np
+        enc = self._tokenizer(texts, padding=True, truncation=True, return_tensors="np")
+        feeds = {k: v.astype(np.int64) for k, v in enc.items() if k in self._inputs}
+        logits = self._session.run(None, feeds)[0]
+
+        logits = logits - logits.max(axis=1, keepdims=True)
+        probs = np.exp(logits)
+        probs /= probs.sum(axis=1, keepdims=True)
+        best = probs.argmax(axis=1)
+        return [_signed(self._labels[j], float(probs[i, j])) for i, j in enumerate(best)]
+
+
+def onnx_model_path(model_dir: str = FINBERT_ONNX_DIR, quantize: bool = FINBERT_ONNX_QUANTIZE) -> str:
+    return os.path.join(model_dir, "model.int8.onnx" if quantize else "model.onnx")
+
+
+def export_finbert_onnx(out_dir: str = FINBERT_ONNX_DIR, model_id: str = FINBERT_MODEL_ID, quantize: bool = True) -> str:
+    """
+    Export model_id to out_dir/model.onnx with its tokenizer and config; with
+    quantize, also write out_dir/model.int8.onnx with int8 dynamic weight
+    quantization. Returns the path OnnxScorer will load.
+
+    Everything is written to a scratch directory first and then moved into
+    out_dir file by file, model last, so several workers exporting at once
+    never leave a half-written model behind for OnnxScorer to load.
+    """
+    try:
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+    except ModuleNotFoundError as e:
+        raise FinbertUnavailable(f"exporting FinBERT to ONNX needs {e.name}") from e
+
+    os.makedirs(out_dir, exist_ok=True)
+    scratch = tempfile.mkdtemp(prefix=".export-", dir=out_dir)
+    try:
+        tokenizer = AutoTokenizer.from_pretrained(model_id)
+        model = AutoModelForSequenceClassification.from_pretrained(model_id).eval()
+        tokenizer.save_pretrained(scratch)
+        model.config.save_pretrained(scratch)
+
+        sample = tokenizer(["Shares rose after earnings."], return_tensors="pt")
+        # Positional order of BertForSequenceClassification.forward.
+        names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+        kwargs = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        fp32 = os.path.join(scratch, "model.onnx")
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                tuple(sample[n] for n in names),
+                fp32,
+                input_names=names,
+                output_names=["logits"],
+                dynamic_axes={**{n: {0: "batch", 1: "sequence"} for n in names}, "logits": {0: "batch"}},
+                opset_version=17,
+                **kwargs,
+            )
+        if quantize:
+            try:
+                from onnxruntime.quantization import QuantType, quantize_dynamic
+            except ModuleNotFoundError as e:
+                raise FinbertUnavailable(f"quantizing FinBERT needs {e.name}") from e
+            quantize_dynamic(fp32, os.path.join(scratch, "model.int8.onnx"), weight_type=QuantType.QInt8)
+
+        models = ("model.onnx", "model.int8.onnx")
+        for name in [n for n in os.listdir(scratch) if n not in models] + [n for n in models if os.path.exists(os.path.join(scratch, n))]:
+            os.replace(os.path.join(scratch, name), os.path.join(out_dir, name))
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return onnx_model_path(out_dir, quantize)
+
+
+FINBERT_BACKENDS = {"pipeline": PipelineScorer, "onnx": OnnxScorer}
+
+
+def make_finbert_scorer(backend: str = FINBERT_BACKEND, **kwargs) -> FinbertScorer:
+    cls = FINBERT_BACKENDS.get(backend)
+    if cls is None:
+        raise FinbertUnavailable(f"unknown FINBERT_BACKEND {backend!r}; expected one of {sorted(FINBERT_BACKENDS)}")
+    return cls(**kwargs)
+
+
+def _recent_failure() -> Optional["FinbertUnavailable"]:
+    failure = _finbert_failure
+    if failure is not None and time.monotonic() - failure[0] < FINBERT_RETRY_SECONDS:
+        return failure[1]
+    return None
+
+
+def _get_finbert() -> FinbertScorer:
+    global _finbert, _finbert_failure
+    if _finbert is not None:
+        return _finbert
+    err = _recent_failure()
+    if err is not None:
+        raise err
+
+    with _lock:
+        if _finbert is None:
+            err = _recent_failure()
+            if err is not None:
+                raise err
+            try:
+                _finbert = make_finbert_scorer()
+            except FinbertUnavailable as e:
+                _finbert_failure = (time.monotonic(), e)
+                raise
+            _finbert_failure = None
+        return _finbert
+
+
+AGE_HALF_LIFE_HOURS = 48.0
 
-def _age_weight(ts: Optional[datetime], half_life_hours: float = 48.0) -> float:
+
+def _age_weight(ts: Optional[datetime], half_life_hours: float = AGE_HALF_LIFE_HOURS, now: Optional[datetime] = None) -> float:
     if ts is None:
         return 1.0
 
-    now = datetime.now(timezone.utc)
+    now = now or datetime.now(timezone.utc)
     if ts.tzinfo is None:
         ts = ts.replace(tzinfo=timezone.utc)
 
@@ -64,34 +277,399 @@ def _age_weight(ts: Optional[datetime], half_life_hours: float = 48.0) -> float:
     return math.exp(-lam * age_hours)
 
 
+VADER_MODEL_VERSION = "vader-3.3.2"
+# Part of every FinBERT score-cache key; the ONNX backend scores slightly
+# differently, so it gets its own version and never reads pipeline scores.
+FINBERT_MODEL_VERSION = os.getenv(
+    "FINBERT_MODEL_VERSION",
+    FINBERT_MODEL_ID if FINBERT_BACKEND == "pipeline" else f"{FINBERT_MODEL_ID}+onnx{'-int8' if FINBERT_ONNX_QUANTIZE else ''}",
+)
+SCORE_CACHE_MAX_ENTRIES = int(os.getenv("SCORE_CACHE_MAX_ENTRIES", "50000"))
+
+_WS = re.compile(r"\s+")
+
+
+def _normalize(text: str) -> str:
+    # Case is kept on purpose: VADER boosts ALL-CAPS words.
+    return _WS.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+class ScoreCache:
+    """
+    Thread-safe LRU of per-text model scores.
+
+    Keys are a hash of the model version plus the normalized text, so the same
+    headline seen by another ticker or another refresh never reaches the model
+    twice, and bumping the model version invalidates everything.
+    """
+
+    def __init__(self, model_version: str, max_entries: int = SCORE_CACHE_MAX_ENTRIES) -> None:
+        self.model_version = model_version
+        self.max_entries = max(1, max_entries)
+        self._data: "OrderedDict[bytes, float]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> bytes:
+        return hashlib.blake2b(
+            f"{self.model_version}\0{_normalize(text)}".encode("utf-8"), digest_size=16
+        ).digest()
+
+    def __contains__(self, text: str) -> bool:
+        """Whether text has a score, without touching the LRU order or the hit counters."""
+        k = self.key(text)
+        with self._lock:
+            return k in self._data
+
+    def get(self, text: str) -> Optional[float]:
+        k = self.key(text)
+        with self._lock:
+            v = self._data.get(k)
+            if v is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(k)
+            self.hits += 1
+            return v
+
+    def put(self, text: str, score: float) -> None:
+        k = self.key(text)
+        with self._lock:
+            self._data[k] = score
+            self._data.move_to_end(k)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "model": self.model_version,
+                "entries": len(self._data),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+_vader_cache = ScoreCache(VADER_MODEL_VERSION)
+_finbert_cache = ScoreCache(FINBERT_MODEL_VERSION)
+
+
+def has_finbert_score(text: str) -> bool:
+    """Whether FinBERT has a cached score for text, without counting a cache lookup."""
+    return text in _finbert_cache
+
+
 def vader_score(text: str) -> float:
+    cached = _vader_cache.get(text)
+    if cached is not None:
+        return cached
+
     v = _get_vader()
-    return float(v.polarity_scores(text)["compound"])
+    score = float(v.polarity_scores(text)["compound"])
+    _vader_cache.put(text, score)
+    return score
+
+
+def _run_finbert(texts: list[str]) -> list[float]:
+    return _get_finbert().score(texts)
+
+
+FINBERT_BATCH_WINDOW_MS = float(os.getenv("FINBERT_BATCH_WINDOW_MS", "5"))
+FINBERT_MAX_BATCH = int(os.getenv("FINBERT_MAX_BATCH", "64"))
+# Weight of the newest batch in the per-text latency estimate.
+FINBERT_LATENCY_ALPHA = 0.2
+
+
+class FinbertBatcher:
+    """
+    Collects texts from concurrent callers and runs them as one forward pass.
+
+    A single worker thread waits for the first request, then keeps the batch
+    open for window_ms or until max_batch texts are queued. Each caller gets
+    a Future resolving to its own slice of the batch output.
+    """
+
+    def __init__(
+        self,
+        window_ms: float = FINBERT_BATCH_WINDOW_MS,
+        max_batch: int = FINBERT_MAX_BATCH,
+        runner: Callable[[list[str]], list[float]] = _run_finbert,
+    ) -> None:
+        self.window_s = max(0.0, window_ms) / 1000.0
+        self.max_batch = max(1, max_batch)
+        self._runner = runner
+        self._cond = threading.Condition()
+        self._pending: Deque[Tuple[list[str], Future]] = deque()
+        self._pending_texts = 0
+        self._thread: Optional[threading.Thread] = None
+        self.batches = 0
+        self.requests = 0
+        self.texts = 0
+        self.largest_batch = 0
+        self._inflight = 0
+        # Moving average of forward-pass milliseconds per text; None until a batch has run.
+        self.text_ms: Optional[float] = None
+
+    def submit(self, texts: list[str]) -> "Future[list[float]]":
+        fut: Future = Future()
+        if not texts:
+            fut.set_result([])
+            return fut
+
+        with self._cond:
+            self._pending.append((list(texts), fut))
+            self._pending_texts += len(texts)
+            self.requests += 1
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, name="finbert-batcher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return fut
+
+    def queue_depth(self) -> int:
+        with self._cond:
+            return self._pending_texts
+
+    def affordable(self, budget_ms: float) -> Optional[int]:
+        """
+        How many more texts could be submitted now and still come back within
+        budget_ms, given the queue ahead and recent per-text latency. None
+        until there is a latency estimate.
+        """
+        with self._cond:
+            if self.text_ms is None:
+                return None
+            ahead = self._pending_texts + self._inflight
+            per_text = max(self.text_ms, 1e-3)
+        spare = budget_ms - self.window_s * 1000.0 - ahead * per_text
+        return max(0, int(spare // per_text))
+
+    def _take_batch(self) -> list[Tuple[list[str], Future]]:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+
+            deadline = time.monotonic() + self.window_s
+            while self._pending_texts < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+            batch = [self._pending.popleft()]
+            size = len(batch[0][0])
+            while self._pending and size + len(self._pending[0][0]) <= self.max_batch:
+                texts, fut = self._pending.popleft()
+                batch.append((texts, fut))
+                size += len(texts)
+            self._pending_texts -= size
+            return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._take_batch()
+            texts = [t for req_texts, _ in batch for t in req_texts]
+            with self._cond:
+                self._inflight = len(texts)
+
+            started = time.perf_counter()
+            try:
+                scores = self._runner(texts)
+            except BaseException as e:
+                with self._cond:
+                    self._inflight = 0
+                for _, fut in batch:
+                    fut.set_exception(e)
+                continue
+
+            per_text = (time.perf_counter() - started) * 1000.0 / len(texts)
+            with self._cond:
+                self._inflight = 0
+                prev = self.text_ms
+                self.text_ms = per_text if prev is None else prev + FINBERT_LATENCY_ALPHA * (per_text - prev)
+
+            self.batches += 1
+            self.texts += len(texts)
+            self.largest_batch = max(self.largest_batch, len(texts))
+            FINBERT_BATCH_SIZE.observe(len(texts))
+
+            offset = 0
+            for req_texts, fut in batch:
+                fut.set_result(scores[offset:offset + len(req_texts)])
+                offset += len(req_texts)
+
+    def stats(self) -> dict:
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "texts": self.texts,
+            "largest_batch": self.largest_batch,
+            "avg_batch": round(self.texts / self.batches, 2) if self.batches else 0.0,
+            "queue_depth": self.queue_depth(),
+            "text_ms": round(self.text_ms, 3) if self.text_ms is not None else None,
+        }
+
+
+_batcher = FinbertBatcher()
+
+
+def _cache_late(texts: list[str], fut: Future) -> None:
+    if not fut.cancelled() and fut.exception() is None:
+        for text, sc in zip(texts, fut.result()):
+            _finbert_cache.put(text, sc)
+
+
+def _finbert_uncached(texts: list[str], timeout: Optional[float] = None) -> Dict[str, float]:
+    """
+    FinBERT scores for texts known to miss the cache. With a timeout, an
+    empty dict if the batch is not back in time; its scores still reach the
+    cache when it finishes.
+    """
+    if not texts:
+        return {}
+    fut = _batcher.submit(texts)
+    try:
+        result = fut.result(timeout)
+    except FutureTimeout:
+        fut.add_done_callback(lambda f: _cache_late(texts, f))
+        return {}
+    fresh = dict(zip(texts, result))
+    for text, sc in fresh.items():
+        _finbert_cache.put(text, sc)
+    return fresh
 
 
 def finbert_score(texts: list[str]) -> list[float]:
-    clf = _get_finbert()
-    out = clf(texts, truncation=True)
-
-    scores: list[float] = []
-    for r in out:
-        label = (r.get("label") or "").lower()
-        prob = float(r.get("score") or 0.0)
-
-        if "positive" in label:
-            scores.append(prob)
-        elif "negative" in label:
-            scores.append(-prob)
+    scores: list[Optional[float]] = [_finbert_cache.get(t) for t in texts]
+    missing = [i for i, sc in enumerate(scores) if sc is None]
+    if not missing:
+        return scores  # type: ignore[return-value]
+
+    fresh = _finbert_uncached(list(dict.fromkeys(texts[i] for i in missing)))
+    for i in missing:
+        scores[i] = fresh[texts[i]]
+    return scores  # type: ignore[return-value]
+
+
+# Time budget for scoring one request's texts, in ms. 0 (the default) always
+# waits for FinBERT on the top N; a budget turns on the deadline-aware cascade,
+# which also lets unambiguous VADER scores skip FinBERT.
+SCORING_BUDGET_MS = float(os.getenv("SCORING_BUDGET_MS", "0"))
+# Under a budget, texts with |VADER compound| at or above this skip FinBERT.
+VADER_UNAMBIGUOUS = float(os.getenv("VADER_UNAMBIGUOUS", "0.8"))
+
+_cascade_lock = threading.Lock()
+_cascade = {"calls": 0, "finbert": 0, "unambiguous": 0, "budget": 0, "deadline": 0}
+
+
+def _count(**deltas: int) -> None:
+    with _cascade_lock:
+        for k, v in deltas.items():
+            _cascade[k] += v
+    for reason in ("unambiguous", "budget", "deadline"):
+        if deltas.get(reason):
+            FINBERT_SKIPPED.inc(reason, amount=deltas[reason])
+
+
+def _finbert_within(ranked: list[str], deadline: float) -> Dict[str, float]:
+    """
+    FinBERT scores for ranked texts (most important first) as far as the
+    deadline allows: cached scores always, then as many uncached texts as the
+    batcher's latency estimate says fit, waiting no longer than the deadline.
+    """
+    fin: Dict[str, float] = {}
+    uncached = []
+    for text in dict.fromkeys(ranked):
+        sc = _finbert_cache.get(text)
+        if sc is None:
+            uncached.append(text)
         else:
-            scores.append(0.0)
+            fin[text] = sc
+
+    remaining_ms = (deadline - time.monotonic()) * 1000.0
+    allowed = _batcher.affordable(remaining_ms)
+    shed = 0
+    if allowed is not None and allowed < len(uncached):
+        shed = len(uncached) - allowed
+        uncached = uncached[:allowed]
+
+    fresh = _finbert_uncached(uncached, timeout=max(0.0, deadline - time.monotonic()))
+    fin.update(fresh)
+    _count(budget=shed, deadline=len(uncached) - len(fresh))
+    return fin
+
+
+def finbert_batch_stats() -> dict:
+    with _cascade_lock:
+        cascade = dict(_cascade)
+    return {**_batcher.stats(), "budget_ms": SCORING_BUDGET_MS, "cascade": cascade}
+
+
+def score_cache_stats() -> dict:
+    return {"vader": _vader_cache.stats(), "finbert": _finbert_cache.stats()}
+
+
+WARMUP_TEXTS = [
+    "Shares surged after the company beat earnings estimates.",
+    "The stock fell sharply on weak guidance.",
+]
 
-    return scores
+
+def warm_up(finbert: bool = True, texts: list[str] = WARMUP_TEXTS) -> dict:
+    """
+    Load the models and push a tiny batch through each, bypassing the score caches.
+
+    Returns {model: {"status", "ms"[, "error"]}}; status is ok, skipped or unavailable.
+    With the ONNX backend and FINBERT_ONNX_EXPORT, a missing model is exported first.
+    """
+    global _finbert_failure
+    report = {}
+
+    start = time.perf_counter()
+    v = _get_vader()
+    for text in texts:
+        v.polarity_scores(text)
+    report["vader"] = {"status": "ok", "ms": round((time.perf_counter() - start) * 1000, 1)}
+
+    if not finbert:
+        report["finbert"] = {"status": "skipped", "ms": 0.0}
+        return report
+
+    start = time.perf_counter()
+    try:
+        if FINBERT_BACKEND == "onnx" and FINBERT_ONNX_EXPORT and not os.path.exists(onnx_model_path()):
+            export_finbert_onnx(FINBERT_ONNX_DIR, FINBERT_MODEL_ID, FINBERT_ONNX_QUANTIZE)
+            # A request may have found the model missing meanwhile; load it now.
+            _finbert_failure = None
+        _run_finbert(texts)
+        report["finbert"] = {"status": "ok", "backend": FINBERT_BACKEND, "ms": round((time.perf_counter() - start) * 1000, 1)}
+    except FinbertUnavailable as e:
+        report["finbert"] = {"status": "unavailable", "backend": FINBERT_BACKEND, "ms": round((time.perf_counter() - start) * 1000, 1), "error": str(e)}
+    return report
+
+
+VADER_WEIGHT = 0.35
+FINBERT_WEIGHT = 0.65
+# Groups at least this large are weighted and blended as numpy columns (see
+# columnar.py); numpy is imported the first time one shows up.
+COLUMNAR_MIN_ITEMS = int(os.getenv("COLUMNAR_MIN_ITEMS", "64"))
 
 
 def blend(vader: float, finbert: Optional[float]) -> float:
     if finbert is None:
         return vader
-    return 0.35 * vader + 0.65 * finbert
+    return VADER_WEIGHT * vader + FINBERT_WEIGHT * finbert
 
 
 def compute_confidence(scores: list[float], has_news: bool, has_reddit: bool) -> float:
@@ -101,7 +679,15 @@ def compute_confidence(scores: list[float], has_news: bool, has_reddit: bool) ->
 
     mean = sum(scores) / n
     var = sum((s - mean) ** 2 for s in scores) / n
-    std = math.sqrt(var)
+    return confidence_from_moments(n, var, has_news, has_reddit)
+
+
+def confidence_from_moments(n: int, var: float, has_news: bool, has_reddit: bool) -> float:
+    """compute_confidence for callers that already track the count and variance."""
+    if n == 0:
+        return 0.0
+
+    std = math.sqrt(max(0.0, var))
 
     mix_bonus = 0.10 if (has_news and has_reddit) else 0.0
     volume = math.log(1 + n)
@@ -112,37 +698,107 @@ def compute_confidence(scores: list[float], has_news: bool, has_reddit: bool) ->
     return float(max(0.0, min(1.0, conf)))
 
 
-def score_items(items: Iterable[dict], finbert_top_n: int = 12) -> list[ScoredItem]:
-    items_list = list(items)
-    if not items_list:
-        return []
+def score_groups(
+    groups: Iterable[Iterable[dict]], finbert_top_n: int = 12, budget_ms: Optional[float] = None
+) -> list[list[ScoredItem]]:
+    """
+    Score several independent item lists with a single FinBERT call.
+
+    Each group still gets its own top-N by VADER magnitude; only the forward
+    pass over those texts is shared.
+
+    With a budget (budget_ms, default SCORING_BUDGET_MS; 0 disables it), the
+    top N is a ceiling rather than a quota: unambiguous VADER scores skip
+    FinBERT, the rest are cut to what recent FinBERT latency and queue depth
+    say fits, and whatever is not back by the deadline keeps its VADER score.
+    ScoredItem.model records which model each score came from. Each group's
+    results are in the same order as its items.
+    """
+    budget_ms = SCORING_BUDGET_MS if budget_ms is None else budget_ms
+    deadline = time.monotonic() + budget_ms / 1000.0 if budget_ms > 0 else None
+
+    prepared = []
+    unambiguous = 0
+    with STAGE_SECONDS.time("vader"):
+        for items in groups:
+            items = list(items)
+            vaders = [vader_score(it["text"]) for it in items]
+            top = _top_by_magnitude(vaders, finbert_top_n)
+            if deadline is not None:
+                ambiguous = [i for i in top if abs(vaders[i]) < VADER_UNAMBIGUOUS]
+                unambiguous += len(top) - len(ambiguous)
+                top = ambiguous
+            prepared.append((items, vaders, top))
+
+    with STAGE_SECONDS.time("finbert"):
+        if deadline is None:
+            fin_texts = [items[i]["text"] for items, _, top in prepared for i in top]
+            fin = dict(zip(fin_texts, finbert_score(fin_texts))) if fin_texts else {}
+        else:
+            # Interleave the groups rank by rank so shedding trims every group's tail evenly.
+            ranked = [
+                text
+                for rank in zip_longest(*([items[i]["text"] for i in top] for items, _, top in prepared))
+                for text in rank
+                if text is not None
+            ]
+            fin = _finbert_within(ranked, deadline) if ranked else {}
+            _count(calls=1, unambiguous=unambiguous)
 
-    vader_scored = []
-    for it in items_list:
-        text = it["text"]
-        vs = vader_score(text)
-        vader_scored.append((it, vs))
-
-    vader_scored.sort(key=lambda t: abs(t[1]), reverse=True)
-    top = vader_scored[:finbert_top_n]
-
-    fin_texts = [t[0]["text"] for t in top]
-    fin_scores = finbert_score(fin_texts)
-
-    fin_map = {id(top[i][0]): fin_scores[i] for i in range(len(top))}
-
-    scored: list[ScoredItem] = []
-    for it, vs in vader_scored:
-        fb = fin_map.get(id(it))
-        final = blend(vs, fb)
-        w = _age_weight(it.get("ts"))
-        scored.append(
-            ScoredItem(
-                source=it["source"],
-                text=it["text"],
-                score=round(final * w, 4),
-                ts=it.get("ts"),
-            )
+    now = datetime.now(timezone.utc)
+    results = [_scored(items, vaders, [fin.get(items[i]["text"]) for i in top], top, now) for items, vaders, top in prepared]
+
+    if deadline is not None:
+        _count(finbert=sum(s.model == "finbert" for scored in results for s in scored))
+    return results
+
+
+def _top_by_magnitude(vaders: list[float], n: int) -> list[int]:
+    """Indices of the n largest |VADER| scores, largest first."""
+    if n <= 0:
+        return []
+    if len(vaders) >= COLUMNAR_MIN_ITEMS:
+        import numpy as np
+
+        from backend.services import columnar
+        return columnar.top_k(np.abs(np.asarray(vaders, dtype=np.float64)), n).tolist()
+    return sorted(range(len(vaders)), key=lambda i: abs(vaders[i]), reverse=True)[:n]
+
+
+def _scored(items: list[dict], vaders: list[float], fin_scores: list[Optional[float]], top: list[int], now: datetime) -> list[ScoredItem]:
+    """ScoredItems in input order, with FinBERT blended in for the top indices that got a score."""
+    finbert: list[Optional[float]] = [None] * len(items)
+    for i, fb in zip(top, fin_scores):
+        finbert[i] = fb
+
+    if len(items) >= COLUMNAR_MIN_ITEMS:
+        import numpy as np
+
+        from backend.services import columnar
+        ts = np.fromiter((columnar.epoch(it.get("ts")) for it in items), dtype=np.float64, count=len(items))
+        fin = np.array([math.nan if fb is None else fb for fb in finbert], dtype=np.float64)
+        finals = columnar.blend(np.asarray(vaders, dtype=np.float64), fin)
+        weighted = np.round(finals * columnar.age_weights(ts, now.timestamp()), 4)
+        finals, weighted = finals.tolist(), weighted.tolist()
+    else:
+        finals = [blend(vs, fb) for vs, fb in zip(vaders, finbert)]
+        weighted = [round(f * _age_weight(it.get("ts"), now=now), 4) for f, it in zip(finals, items)]
+
+    return [
+        ScoredItem(
+            source=it["source"],
+            text=it["text"],
+            score=score,
+            ts=it.get("ts"),
+            vader=vs,
+            id=it.get("id") or "",
+            origin=it.get("origin") or "",
+            blended=final,
+            model="vader" if fb is None else "finbert",
         )
+        for it, vs, fb, final, score in zip(items, vaders, finbert, finals, weighted)
+    ]
+
 
-    return scored
\ No newline at end of file
+def score_items(items: Iterable[dict], finbert_top_n: int = 12, budget_ms: Optional[float] = None) -> list[ScoredItem]:
+    return score_groups([items], finbert_top_n=finbert_top_n, budget_ms=budget_ms)[0]
@@ -1,16 +1,40 @@
+import asyncio
+import heapq
+import itertools
 import os
+import re
 import logging
-from typing import Dict
+import math
+import time
+from contextlib import AsyncExitStack
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
 from datetime import datetime, timezone
 
 from fastapi import Request
-from newsapi import NewsApiClient
-import praw
 
 from backend.settings import is_mock_mode
+from backend.core.encoding import dumps
 from backend.core.errors import raise_api_error
-from backend.services.scoring import score_items, compute_confidence, FinbertUnavailable
-from backend.core.cache import TTLCache
+from backend.core.logs import bind, unbind
+from backend.core.metrics import STAGE_SECONDS
+from backend.services.scoring import (
+    COLUMNAR_MIN_ITEMS,
+    FinbertUnavailable,
+    _age_weight,
+    compute_confidence,
+    confidence_from_moments,
+    has_finbert_score,
+    score_groups,
+    score_items,
+)
+from backend.services import scoring
+from backend.services.aggregate import AggregateStore, Entry, RunningAggregate, StreamingAggregate, window_keys
+from backend.core.tiered_cache import make_cache
+from backend.core.pubsub import broker
+from backend.services.ingest import fan_out, gather_sources, run_blocking
+from backend.services.clients import get_registry
+from backend.services.prefetch import newsapi_quota, popularity
+from backend.services.timeseries import get_store
 
 SOURCE_LABEL = {"news": "newsapi", "reddit": "reddit"}
 
@@ -27,67 +51,648 @@ MOCK_ERROR_TICKERS = {
     "LIMIT": ("RATE_LIMIT", 429, "Upstream data provider rate-limited us (simulated in mock mode)."),
 }
 
-_cache = TTLCache()
+_cache = make_cache("sentiment")
+# Per-ticker running sums, so a refresh only scores items it has not seen.
+_running = AggregateStore()
 CACHE_TTL_SECONDS = int(os.getenv("SENTIMENT_CACHE_TTL_SECONDS", "300"))
 CACHE_STALE_SECONDS = int(os.getenv("SENTIMENT_CACHE_STALE_SECONDS", "60"))
+# Encode each sentiment payload once, when it is computed, and cache the
+# body next to it so /sentiment/{ticker} hits skip validation and encoding.
+PRESERIALIZED_RESPONSES = os.getenv("PRESERIALIZED_RESPONSES", "true").lower() == "true"
+
+
+def _publish_update(key: str, value: Any) -> None:
+    """Push a ticker's new sentiment (or error) to its stream subscribers."""
+    if not key.startswith("docs:") or not isinstance(value, dict):
+        return
+    ticker = key[len("docs:"):]
+    error = value.get("error")
+    if error:
+        broker.publish(ticker, {"event": "error", "data": {"ticker": ticker, **error}})
+    else:
+        broker.publish(ticker, {"event": "sentiment", "data": value.get("sentiment")})
+
+
+def _record_snapshot(key: str, value: Any) -> None:
+    """Append each freshly computed sentiment to the history store."""
+    if not key.startswith("docs:") or not isinstance(value, dict):
+        return
+    payload = value.get("sentiment")
+    if value.get("error") or not payload:
+        return
+    try:
+        get_store().record(key[len("docs:"):], value["fetched_at"], payload["sentiment"], payload.get("confidence") or 0.0)
+    except Exception as e:
+        logging.warning(f"History snapshot failed for {key}: {e}")
+
+
+_cache.add_listener(_publish_update)
+_cache.add_listener(_record_snapshot)
+
+
+SUBREDDITS = ["stocks", "wallstreetbets", "investing"]
+BATCH_MAX_TICKERS = int(os.getenv("BATCH_MAX_TICKERS", "25"))
+BATCH_QUERY_CHUNK = int(os.getenv("BATCH_QUERY_CHUNK", "8"))
+# Texts per ticker that go to FinBERT after VADER; 0 scores with VADER only.
+FINBERT_TOP_N = int(os.getenv("FINBERT_TOP_N", "12"))
+
+# Window depth: NewsAPI articles per ticker and Reddit posts per subreddit.
+WINDOW_NEWS_DEPTH = int(os.getenv("WINDOW_NEWS_DEPTH", "20"))
+WINDOW_REDDIT_DEPTH = int(os.getenv("WINDOW_REDDIT_DEPTH", "15"))
+# Deep windows: page through upstream results and fold them into a
+# fixed-size StreamingAggregate, STREAM_CHUNK_SIZE items at a time, instead
+# of holding the whole window. FINBERT_TOP_N then applies per chunk.
+STREAMING_INGEST = os.getenv("STREAMING_INGEST", "false").lower() == "true"
+STREAM_CHUNK_SIZE = int(os.getenv("STREAM_CHUNK_SIZE", "64"))
+STREAM_KEEP_DOCS = int(os.getenv("STREAM_KEEP_DOCS", "48"))
+_MIN_CHUNK_BUDGET_MS = 0.001
+NEWSAPI_PAGE_SIZE = 100
+
+
+def _news_item(a: Dict[str, Any], idx: int) -> Optional[Dict[str, Any]]:
+    title = a.get("title")
+    if not title:
+        return None
+    ts = a.get("publishedAt")
+    dt = None
+    if ts:
+        try:
+            dt = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc)
+        except Exception:
+            dt = None
+    origin = (a.get("source") or {}).get("name") or "News"
+    return {"source": "news", "text": title, "ts": dt, "id": a.get("url") or f"news-{idx}", "origin": origin}
+
+
+def _reddit_item(p: Any, sub: str, n: int) -> Optional[Dict[str, Any]]:
+    title = getattr(p, "title", None)
+    if not title:
+        return None
+    created = getattr(p, "created_utc", None)
+    dt = datetime.fromtimestamp(created, tz=timezone.utc) if created else None
+    post_id = getattr(p, "id", None)
+    return {
+        "source": "reddit",
+        "text": title,
+        "ts": dt,
+        "id": f"reddit-{post_id}" if post_id else f"reddit-{sub}-{n}",
+        "origin": f"r/{sub}",
+    }
 
 
 def fetch_news_items(ticker: str):
-    api_key = os.getenv("NEWS_API_KEY")
-    if not api_key:
+    newsapi = get_registry().newsapi()
+    if newsapi is None:
         logging.warning("NEWS_API_KEY missing; falling back to mock news items.")
-        return [{"source": "news", "text": f"{ticker} mock news headline", "ts": None}]
+        return [{"source": "news", "text": f"{ticker} mock news headline", "ts": None, "id": "news-0", "origin": "Mock Newswire"}]
 
-    newsapi = NewsApiClient(api_key=api_key)
     query = f"{ticker} stock OR shares OR earnings"
-    articles = newsapi.get_everything(q=query, language="en", page_size=20)["articles"]
+    newsapi_quota.spend()
+    articles = newsapi.get_everything(q=query, language="en", page_size=min(NEWSAPI_PAGE_SIZE, WINDOW_NEWS_DEPTH))["articles"]
 
     items = []
-    for a in articles or []:
-        title = a.get("title")
-        if not title:
-            continue
-        ts = a.get("publishedAt")
-        dt = None
-        if ts:
-            try:
-                dt = datetime.fromisoformat(ts.replace("Z", "+00:00")).astimezone(timezone.utc)
-            except Exception:
-                dt = None
-        items.append({"source": "news", "text": title, "ts": dt})
+    for idx, a in enumerate(articles or []):
+        item = _news_item(a, idx)
+        if item:
+            items.append(item)
     return items
 
 
 def fetch_reddit_items(ticker: str):
-    client_id = os.getenv("REDDIT_CLIENT_ID")
-    client_secret = os.getenv("REDDIT_CLIENT_SECRET")
-    if not client_id or not client_secret:
+    registry = get_registry()
+    if not registry.reddit_configured():
         logging.warning("Reddit credentials missing; falling back to mock reddit items.")
-        return [{"source": "reddit", "text": f"{ticker} mock reddit thread", "ts": None}]
+        return [{"source": "reddit", "text": f"{ticker} mock reddit thread", "ts": None, "id": "reddit-0", "origin": "r/mockstocks"}]
 
-    reddit = praw.Reddit(
-        client_id=client_id,
-        client_secret=client_secret,
-        user_agent="pioni_by_u/AquaBzy",
-    )
+    def search(sub: str):
+        found = []
+        with registry.reddit() as reddit:
+            posts = reddit.subreddit(sub).search(query=ticker, sort="top", limit=WINDOW_REDDIT_DEPTH)
+            for n, p in enumerate(posts):
+                item = _reddit_item(p, sub, n)
+                if item:
+                    found.append(item)
+        return found
 
-    subreddits = ["stocks", "wallstreetbets", "investing"]
     items = []
-    for sub in subreddits:
-        posts = reddit.subreddit(sub).search(query=ticker, sort="top", limit=15)
-        for p in posts:
-            title = getattr(p, "title", None)
-            if not title:
-                continue
-            created = getattr(p, "created_utc", None)
-            dt = datetime.fromtimestamp(created, tz=timezone.utc) if created else None
-            items.append({"source": "reddit", "text": title, "ts": dt})
+    for found in fan_out(search, SUBREDDITS):
+        items.extend(found)
     return items
 
 
+def newsapi_calls_per_refresh() -> int:
+    """NewsAPI calls one document refresh spends: one query, or one per page when streaming deep windows."""
+    if not STREAMING_INGEST:
+        return 1
+    page_size = max(1, min(NEWSAPI_PAGE_SIZE, WINDOW_NEWS_DEPTH))
+    return max(1, math.ceil(WINDOW_NEWS_DEPTH / page_size))
+
+
+def iter_news_items(ticker: str, depth: int = WINDOW_NEWS_DEPTH) -> Iterator[Dict[str, Any]]:
+    """
+    Up to depth news items for a ticker, one NewsAPI page at a time.
+
+    A failing first page raises like fetch_news_items; a later one ends the
+    stream, so the items already yielded (and folded) still count.
+    """
+    newsapi = get_registry().newsapi()
+    if newsapi is None:
+        yield from fetch_news_items(ticker)
+        return
+
+    query = f"{ticker} stock OR shares OR earnings"
+    page_size = max(1, min(NEWSAPI_PAGE_SIZE, depth))
+    seen = 0
+    for page in itertools.count(1):
+        newsapi_quota.spend()
+        try:
+            articles = newsapi.get_everything(q=query, language="en", page_size=page_size, page=page)["articles"] or []
+        except Exception as e:
+            if page == 1:
+                raise
+            logging.warning(f"NewsAPI page {page} for {ticker} failed; keeping the first {seen} articles: {e}")
+            return
+        for a in articles[:depth - seen]:
+            item = _news_item(a, seen)
+            seen += 1
+            if item:
+                yield item
+        if seen >= depth or len(articles) < page_size:
+            return
+
+
+def iter_reddit_items(ticker: str, sub: str, depth: int = WINDOW_REDDIT_DEPTH) -> Iterator[Dict[str, Any]]:
+    """Up to depth posts mentioning a ticker in one subreddit; praw fetches the listing 100 at a time."""
+    registry = get_registry()
+    if not registry.reddit_configured():
+        if sub == SUBREDDITS[0]:
+            yield from fetch_reddit_items(ticker)
+        return
+
+    with registry.reddit() as reddit:
+        for n, p in enumerate(reddit.subreddit(sub).search(query=ticker, sort="top", limit=depth)):
+            item = _reddit_item(p, sub, n)
+            if item:
+                yield item
+
+
+def _mention_patterns(tickers: List[str]) -> Dict[str, "re.Pattern[str]"]:
+    return {t: re.compile(rf"(?<![A-Za-z0-9])\$?{re.escape(t)}(?![A-Za-z0-9])") for t in tickers}
+
+
+def _chunks(seq: List[str], size: int) -> List[List[str]]:
+    size = max(1, size)
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+def fetch_news_items_multi(tickers: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    One NewsAPI OR-query per chunk of tickers; articles are attributed to every
+    symbol their title/description mentions. Tickers nothing was attributed
+    to come back empty so the caller can fall back to a per-ticker query.
+    """
+    newsapi = get_registry().newsapi()
+    if newsapi is None:
+        return {t: fetch_news_items(t) for t in tickers}
+
+    out: Dict[str, List[Dict[str, Any]]] = {t: [] for t in tickers}
+    for chunk in _chunks(tickers, BATCH_QUERY_CHUNK):
+        patterns = _mention_patterns(chunk)
+        query = f"({' OR '.join(chunk)}) AND (stock OR shares OR earnings)"
+        newsapi_quota.spend()
+        articles = newsapi.get_everything(q=query, language="en", page_size=min(100, 20 * len(chunk)))["articles"]
+        for idx, a in enumerate(articles or []):
+            item = _news_item(a, idx)
+            if not item:
+                continue
+            haystack = f"{a.get('title') or ''} {a.get('description') or ''}"
+            for t, pat in patterns.items():
+                if pat.search(haystack):
+                    out[t].append(dict(item))
+    return out
+
+
+def fetch_reddit_items_multi(tickers: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+    """One search per subreddit per chunk of tickers, attributed by title mention."""
+    registry = get_registry()
+    if not registry.reddit_configured():
+        return {t: fetch_reddit_items(t) for t in tickers}
+
+    out: Dict[str, List[Dict[str, Any]]] = {t: [] for t in tickers}
+
+    def search(job: Tuple[str, Tuple[str, ...]]):
+        sub, chunk = job
+        found = []
+        with registry.reddit() as reddit:
+            posts = reddit.subreddit(sub).search(query=" OR ".join(chunk), sort="top", limit=min(100, 15 * len(chunk)))
+            for n, p in enumerate(posts):
+                item = _reddit_item(p, sub, n)
+                if item:
+                    found.append((chunk, item))
+        return found
+
+    jobs = [(sub, tuple(chunk)) for chunk in _chunks(tickers, BATCH_QUERY_CHUNK) for sub in SUBREDDITS]
+    for found in fan_out(search, jobs):
+        for chunk, item in found:
+            for t, pat in _mention_patterns(list(chunk)).items():
+                if pat.search(item["text"]):
+                    out[t].append(dict(item))
+    return out
+
+
+def cache_stats() -> Dict[str, Any]:
+    return _cache.stats()
+
+
+def aggregate_stats() -> Dict[str, Any]:
+    return _running.stats()
+
+
+def _document(s: Any) -> Dict[str, Any]:
+    ts = getattr(s, "ts", None)
+    return {
+        "id": getattr(s, "id", "") or "",
+        "source": s.source,
+        "origin": getattr(s, "origin", "") or "",
+        "text": s.text,
+        "ts": ts.timestamp() if ts else None,
+        "vader": float(getattr(s, "vader", s.score)),
+        "score": s.score,
+        "model": getattr(s, "model", "vader"),
+    }
+
+
+def _coverage_error(ticker: str, has_news: bool, has_reddit: bool) -> Optional[Dict[str, Any]]:
+    if not has_news and has_reddit:
+        return {"status": 422, "error": "NO_NEWS", "message": f"No recent news articles found for {ticker}."}
+    if not has_reddit and has_news:
+        return {"status": 422, "error": "NO_REDDIT", "message": f"No relevant Reddit mentions found for {ticker}."}
+    if not has_news and not has_reddit:
+        return {"status": 404, "error": "NO_DATA", "message": f"OOPS! No sentiment data found for {ticker}."}
+    return None
+
+
+def _zero_error(ticker: str) -> Dict[str, Any]:
+    return {"status": 422, "error": "ZERO_SENTIMENT", "message": f"Sentiment for {ticker} is exactly neutral based on recent data."}
+
+
+def _highlight(score: float, d: Dict[str, Any]) -> Dict[str, Any]:
+    return {"source": SOURCE_LABEL.get(d["source"], d["source"]), "text": d["text"], "score": round(score, 4), "model": d.get("model", "vader")}
+
+
+def _highlights(scored: List[Tuple[float, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    top_pos = heapq.nlargest(2, scored, key=lambda p: p[0])
+    top_neg = heapq.nsmallest(2, scored, key=lambda p: p[0])
+    return [
+        *[_highlight(score, d) for score, d in top_pos if score > 0],
+        *[_highlight(score, d) for score, d in top_neg if score < 0],
+    ]
+
+
+def _payload(ticker: str, mean: float, sources: Dict[str, float], confidence: float, highlights: List[Dict[str, Any]], finbert: int, n: int) -> Dict[str, Any]:
+    return {
+        "ticker": ticker,
+        "sentiment": round(mean, 4),
+        "sources": sources,
+        "confidence": round(confidence, 4),
+        "highlights": highlights,
+        "scoring": {"finbert": finbert, "vader": n - finbert},
+    }
+
+
+def _response_body(payload: Optional[Dict[str, Any]]) -> Optional[str]:
+    """The /sentiment/{ticker} body for payload; kept as text so the Redis tier can store it as well."""
+    if not PRESERIALIZED_RESPONSES or payload is None:
+        return None
+    return dumps(payload).decode("utf-8")
+
+
+def _aggregate(ticker: str, docs: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Sentiment payload for a scored document set, or the error it should surface."""
+    if len(docs) >= COLUMNAR_MIN_ITEMS:
+        return _aggregate_columnar(ticker, docs)
+
+    news_scores = [d["score"] for d in docs if d["source"] == "news"]
+    reddit_scores = [d["score"] for d in docs if d["source"] == "reddit"]
+    error = _coverage_error(ticker, bool(news_scores), bool(reddit_scores))
+    if error:
+        return None, error
+
+    scores = [d["score"] for d in docs]
+
+    combined_score = sum(scores) / len(scores) if scores else 0.0
+    if round(combined_score, 4) == 0:
+        return None, _zero_error(ticker)
+
+    sources: Dict[str, float] = {}
+    if news_scores:
+        sources["newsapi"] = round(sum(news_scores) / len(news_scores), 4)
+    if reddit_scores:
+        sources["reddit"] = round(sum(reddit_scores) / len(reddit_scores), 4)
+
+    confidence = compute_confidence(scores, has_news=bool(news_scores), has_reddit=bool(reddit_scores))
+    highlights = _highlights([(d["score"], d) for d in docs])
+    finbert = sum(1 for d in docs if d.get("model") == "finbert")
+
+    return _payload(ticker, combined_score, sources, confidence, highlights, finbert, len(docs)), None
+
+
+def _aggregate_columnar(ticker: str, docs: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """_aggregate for large document sets, over numpy columns."""
+    from backend.services import columnar
+
+    scores, codes = columnar.document_columns(docs)
+    summary = columnar.summarize(scores, codes)
+    error = _coverage_error(ticker, bool(summary["counts"]["news"]), bool(summary["counts"]["reddit"]))
+    if error:
+        return None, error
+    if round(summary["mean"], 4) == 0:
+        return None, _zero_error(ticker)
+
+    sources = {SOURCE_LABEL[src]: round(m, 4) for src, m in summary["means"].items()}
+    pos, neg = columnar.highlight_indices(scores)
+    highlights = [_highlight(float(scores[i]), docs[i]) for i in (*pos, *neg)]
+    finbert = sum(1 for d in docs if d.get("model") == "finbert")
+
+    return _payload(ticker, summary["mean"], sources, summary["confidence"], highlights, finbert, len(docs)), None
+
+
+def _aggregate_running(ticker: str, agg: RunningAggregate, now: float) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """_aggregate over a RunningAggregate: same payload, read from running sums instead of a pass over the docs."""
+    moments = agg.moments(now)
+    error = _coverage_error(ticker, "news" in moments, "reddit" in moments)
+    if error:
+        return None, error
+
+    n = sum(m[0] for m in moments.values())
+    total = sum(m[1] for m in moments.values())
+    mean = total / n
+    if round(mean, 4) == 0:
+        return None, _zero_error(ticker)
+
+    sources = {SOURCE_LABEL[src]: round(moments[src][1] / moments[src][0], 4) for src in ("news", "reddit")}
+    var = sum(m[2] for m in moments.values()) / n - mean * mean
+    confidence = confidence_from_moments(n, var, has_news=True, has_reddit=True)
+
+    if len(agg) >= COLUMNAR_MIN_ITEMS:
+        from backend.services import columnar
+
+        raw, ts, finbert_mask, docs = agg.columns()
+        scores = raw * columnar.age_weights(ts, now)
+        pos, neg = columnar.highlight_indices(scores)
+        highlights = [_highlight(float(scores[i]), docs[i]) for i in (*pos, *neg)]
+        finbert = int(finbert_mask.sum())
+    else:
+        weighted = agg.weighted(now)
+        highlights = _highlights(weighted)
+        finbert = sum(1 for _, d in weighted if d.get("model") == "finbert")
+
+    return _payload(ticker, mean, sources, confidence, highlights, finbert, n), None
+
+
+def _document_set(ticker: str, scored: List[Any]) -> Dict[str, Any]:
+    docs = [_document(s) for s in scored]
+    payload, error = _aggregate(ticker, docs)
+    return {
+        "ticker": ticker,
+        "fetched_at": datetime.now(timezone.utc).timestamp(),
+        "items": docs,
+        "sentiment": payload,
+        "body": _response_body(payload),
+        "error": error,
+    }
+
+
+def _unscored(ticker: str, items: List[Dict[str, Any]], now: float) -> Tuple[RunningAggregate, List[str], List[Tuple[str, Dict[str, Any]]]]:
+    """
+    The ticker's running aggregate, the window keys, and the items to score.
+
+    Those are the items it has not scored yet, so FINBERT_TOP_N picks its
+    texts among the new items of each refresh rather than over the whole
+    window, and the aggregate can differ slightly from scoring the same
+    window from scratch. Items that kept their VADER score (FinBERT missed
+    the deadline or was shed) are scored again once FinBERT has cached a
+    score for their text, so a fallback is not kept for the item's lifetime.
+    """
+    agg = _running.get(ticker, now)
+    keys = window_keys(items)
+    return agg, keys, [
+        (k, it)
+        for k, it in zip(keys, items)
+        if k not in agg or (agg.model(k) == "vader" and has_finbert_score(it["text"]))
+    ]
+
+
+def _entry(s: Any) -> Entry:
+    ts = getattr(s, "ts", None)
+    raw = getattr(s, "blended", None)
+    if raw is None:
+        # Scorers that only report the decayed score: undo today's weight.
+        w = _age_weight(ts)
+        raw = s.score / w if w > 0 else 0.0
+    return s.source, float(raw), ts.timestamp() if ts else None, _document(s)
+
+
+def _entries_by_key(fresh: List[Tuple[str, Dict[str, Any]]], scored: List[Any]) -> Dict[str, Entry]:
+    """Window entries for scored items, matched to their keys by (source, id, text) rather than by position."""
+    keys_for: Dict[Tuple[str, str, str], List[str]] = {}
+    for k, it in fresh:
+        keys_for.setdefault((it["source"], it.get("id") or "", it["text"]), []).append(k)
+    entries = {}
+    for s in scored:
+        keys = keys_for.get((s.source, getattr(s, "id", "") or "", s.text))
+        if keys:
+            entries[keys.pop(0)] = _entry(s)
+    return entries
+
+
+def _advance(ticker: str, agg: RunningAggregate, keys: List[str], fresh: List[Tuple[str, Dict[str, Any]]], scored: List[Any]) -> Dict[str, Any]:
+    """Fold newly scored items into the running aggregate and build the document set from it."""
+    now = datetime.now(timezone.utc).timestamp()
+    with STAGE_SECONDS.time("aggregate"):
+        added, removed = agg.update(keys, _entries_by_key(fresh, scored), now)
+        _running.record(added, removed, len(agg))
+        payload, error = _aggregate_running(ticker, agg, now)
+    return {
+        "ticker": ticker,
+        "fetched_at": now,
+        "items": agg.documents(),
+        "sentiment": payload,
+        "body": _response_body(payload),
+        "error": error,
+    }
+
+
+def _timed(stage: str, fn, *args, **kwargs):
+    with STAGE_SECONDS.time(stage):
+        return fn(*args, **kwargs)
+
+
+def _source_streams(ticker: str) -> List[Callable[[], Iterator[Dict[str, Any]]]]:
+    return [
+        lambda: iter_news_items(ticker),
+        *[(lambda sub=sub: iter_reddit_items(ticker, sub)) for sub in SUBREDDITS],
+    ]
+
+
+def _fold(stream: Callable[[], Iterator[Dict[str, Any]]], chunk_size: int, deadline: Optional[float] = None) -> StreamingAggregate:
+    """
+    Score one upstream stream chunk by chunk into a StreamingAggregate; at most one chunk is held at a time.
+
+    deadline (time.monotonic()) is shared by every chunk of the compute, so
+    each chunk's scoring budget is whatever the earlier chunks left; past it,
+    chunks keep their VADER scores. None scores without a budget.
+    """
+    agg = StreamingAggregate(keep_docs=STREAM_KEEP_DOCS)
+    items = stream()
+    while True:
+        chunk = list(itertools.islice(items, max(1, chunk_size)))
+        if not chunk:
+            return agg
+        # budget_ms=0 would disable the budget, so an exhausted one stays just above it.
+        budget_ms = 0.0 if deadline is None else max(_MIN_CHUNK_BUDGET_MS, (deadline - time.monotonic()) * 1000.0)
+        for s in _timed("score", score_items, chunk, finbert_top_n=FINBERT_TOP_N, budget_ms=budget_ms):
+            doc = _document(s)
+            agg.add(s.source, s.score, doc["ts"], doc)
+
+
+def _aggregate_streaming(ticker: str, agg: StreamingAggregate) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """_aggregate over a StreamingAggregate."""
+    moments = agg.moments
+    error = _coverage_error(ticker, "news" in moments, "reddit" in moments)
+    if error:
+        return None, error
+
+    n = len(agg)
+    mean = sum(m[1] for m in moments.values()) / n
+    if round(mean, 4) == 0:
+        return None, _zero_error(ticker)
+
+    sources = {SOURCE_LABEL[src]: round(m[1] / m[0], 4) for src, m in moments.items() if src in SOURCE_LABEL}
+    var = sum(m[2] for m in moments.values()) / n - mean * mean
+    confidence = confidence_from_moments(n, var, has_news=True, has_reddit=True)
+    highlights = [_highlight(score, d) for score, d in agg.highlights()]
+    return _payload(ticker, mean, sources, confidence, highlights, agg.finbert, n), None
+
+
+async def _streamed_documents(ticker: str, request: Optional[Request]) -> Dict[str, Any]:
+    """Document set for a deep window: every source streams and folds on its own worker, then the summaries merge."""
+    started = time.perf_counter()
+    budget_ms = scoring.SCORING_BUDGET_MS
+    deadline = time.monotonic() + budget_ms / 1000.0 if budget_ms > 0 else None
+    try:
+        parts = await gather_sources(*[(lambda st=st: _fold(st, STREAM_CHUNK_SIZE, deadline)) for st in _source_streams(ticker)])
+    except FinbertUnavailable as e:
+        raise_api_error(request, 503, "FINBERT_UNAVAILABLE", str(e))
+
+    agg = parts[0]
+    for part in parts[1:]:
+        agg.merge(part)
+    with STAGE_SECONDS.time("aggregate"):
+        payload, error = _aggregate_streaming(ticker, agg)
+
+    logging.info(
+        "Streamed documents for %s", ticker,
+        extra={"items": len(agg), "kept": len(agg.documents()), "duration_ms": round((time.perf_counter() - started) * 1000, 2)},
+    )
+    return {
+        "ticker": ticker,
+        "fetched_at": datetime.now(timezone.utc).timestamp(),
+        "items": agg.documents(),
+        "sentiment": payload,
+        "body": _response_body(payload),
+        "error": error,
+    }
+
+
+def _documents_compute(ticker: str, request: Optional[Request]):
+    async def compute():
+        if STREAMING_INGEST:
+            return await _streamed_documents(ticker, request)
+
+        started = time.perf_counter()
+        news_items, reddit_items = await gather_sources(
+            lambda: _timed("news_fetch", fetch_news_items, ticker),
+            lambda: _timed("reddit_fetch", fetch_reddit_items, ticker),
+        )
+        fetched = time.perf_counter()
+
+        items = [*news_items, *reddit_items]
+        agg, keys, fresh = _unscored(ticker, items, datetime.now(timezone.utc).timestamp())
+        scored = []
+        if fresh:
+            try:
+                scored = await run_blocking(_timed, "score", score_items, [it for _, it in fresh], finbert_top_n=FINBERT_TOP_N)
+            except FinbertUnavailable as e:
+                raise_api_error(request, 503, "FINBERT_UNAVAILABLE", str(e))
+
+        docset = _advance(ticker, agg, keys, fresh, scored)
+        logging.info(
+            "Computed documents for %s", ticker,
+            extra={
+                "items": len(items),
+                "scored": len(fresh),
+                "fetch_ms": round((fetched - started) * 1000, 2),
+                "score_ms": round((time.perf_counter() - fetched) * 1000, 2),
+            },
+        )
+        return docset
+
+    return compute
+
+
+async def get_documents(ticker: str, request: Request) -> Tuple[Dict[str, Any], str]:
+    """
+    The cached, scored document set for a ticker.
+
+    One entry holds every fetched headline/post with its scores plus the
+    sentiment aggregate derived from them, so /sentiment and /sentiment/feed
+    share a single upstream fetch and a single scoring pass per refresh.
+    """
+    ticker = ticker.upper()
+    token = bind(ticker=ticker)
+    popularity.record(ticker)
+
+    try:
+        return await _cache.get_or_compute_swr(
+            f"docs:{ticker}",
+            ttl_seconds=CACHE_TTL_SECONDS,
+            stale_seconds=CACHE_STALE_SECONDS,
+            compute=_documents_compute(ticker, request),
+        )
+    finally:
+        unbind(token)
+
+
+async def prefetch_documents(ticker: str, fresh_for: float) -> None:
+    """Refresh a ticker ahead of demand and keep it fresh for fresh_for seconds."""
+    stale_seconds = max(CACHE_STALE_SECONDS, int(fresh_for))
+    await _cache.refresh(
+        f"docs:{ticker}",
+        ttl_seconds=stale_seconds + max(0, CACHE_TTL_SECONDS - CACHE_STALE_SECONDS),
+        stale_seconds=stale_seconds,
+        compute=_documents_compute(ticker, None),
+    )
+
+
+async def documents_freshness(ticker: str) -> Optional[float]:
+    return await _cache.freshness(f"docs:{ticker}")
+
+
 async def get_sentiment(ticker: str, request: Request):
+    payload, _, cache_status = await get_sentiment_response(ticker, request)
+    return payload, cache_status
+
+
+async def get_sentiment_response(ticker: str, request: Request) -> Tuple[Dict[str, Any], Optional[str], str]:
+    """
+    The sentiment payload, its pre-encoded response body and the cache status.
+
+    The body is None in mock mode and for entries cached without one
+    (PRESERIALIZED_RESPONSES off); callers then render the payload as usual.
+    """
     ticker = ticker.upper()
-    logging.info(f"Request received for sentiment: {ticker}")
+    logging.info("Request received for sentiment: %s", ticker)
 
     if is_mock_mode():
         if ticker in MOCK_ERROR_TICKERS:
@@ -97,62 +702,160 @@ async def get_sentiment(ticker: str, request: Request):
         mock = MOCK_DATA.get(ticker)
         if not mock:
             raise_api_error(request, 404, "INVALID_TICKER", "We couldn't find that ticker in the mock dataset.")
-        return {"ticker": ticker, **mock, "highlights": []}, "MOCK"
+        return {"ticker": ticker, **mock, "highlights": []}, None, "MOCK"
 
-    cache_key = f"sentiment:{ticker}"
+    docs, cache_status = await get_documents(ticker, request)
+    error = docs.get("error")
+    if error:
+        raise_api_error(request, error["status"], error["error"], error["message"])
+    return docs["sentiment"], docs.get("body"), cache_status
 
-    async def compute():
-        news_items = fetch_news_items(ticker)
-        reddit_items = fetch_reddit_items(ticker)
 
-        if not news_items and reddit_items:
-            raise_api_error(request, 422, "NO_NEWS", f"No recent news articles found for {ticker}.")
-        if not reddit_items and news_items:
-            raise_api_error(request, 422, "NO_REDDIT", f"No relevant Reddit mentions found for {ticker}.")
-        if not news_items and not reddit_items:
-            raise_api_error(request, 404, "NO_DATA", f"OOPS! No sentiment data found for {ticker}.")
+async def _compute_batch(tickers: List[str], request: Optional[Request]) -> Dict[str, Dict[str, Any]]:
+    """Document sets for several tickers from combined upstream queries and one scoring pass."""
+    news_map, reddit_map = await gather_sources(
+        lambda: _timed("news_fetch", fetch_news_items_multi, tickers),
+        lambda: _timed("reddit_fetch", fetch_reddit_items_multi, tickers),
+    )
+
+    missing_news = [t for t in tickers if not news_map.get(t)]
+    missing_reddit = [t for t in tickers if not reddit_map.get(t)]
+    fallbacks = await gather_sources(
+        *[(lambda t=t: fetch_news_items(t)) for t in missing_news],
+        *[(lambda t=t: fetch_reddit_items(t)) for t in missing_reddit],
+    )
+    for t, items in zip(missing_news, fallbacks[:len(missing_news)]):
+        news_map[t] = items
+    for t, items in zip(missing_reddit, fallbacks[len(missing_news):]):
+        reddit_map[t] = items
 
+    now = datetime.now(timezone.utc).timestamp()
+    pending = [_unscored(t, [*news_map[t], *reddit_map[t]], now) for t in tickers]
+    scored_groups: List[List[Any]] = [[] for _ in tickers]
+    if any(fresh for _, _, fresh in pending):
         try:
-            scored = score_items([*news_items, *reddit_items], finbert_top_n=12)
+            scored_groups = await run_blocking(
+                _timed, "score", score_groups, [[it for _, it in fresh] for _, _, fresh in pending], finbert_top_n=FINBERT_TOP_N
+            )
         except FinbertUnavailable as e:
             raise_api_error(request, 503, "FINBERT_UNAVAILABLE", str(e))
-        
-        scores = [s.score for s in scored]
-
-        combined_score = round(sum(scores) / len(scores), 4) if scores else 0.0
-        if combined_score == 0:
-            raise_api_error(request, 422, "ZERO_SENTIMENT", f"Sentiment for {ticker} is exactly neutral based on recent data.")
-
-        sources: Dict[str, float] = {}
-        news_scores = [s.score for s in scored if s.source == "news"]
-        reddit_scores = [s.score for s in scored if s.source == "reddit"]
-        if news_scores:
-            sources["newsapi"] = round(sum(news_scores) / len(news_scores), 4)
-        if reddit_scores:
-            sources["reddit"] = round(sum(reddit_scores) / len(reddit_scores), 4)
-
-        confidence = round(compute_confidence(scores, has_news=bool(news_scores), has_reddit=bool(reddit_scores)), 4)
-
-        top_pos = sorted(scored, key=lambda s: s.score, reverse=True)[:2]
-        top_neg = sorted(scored, key=lambda s: s.score)[:2]
-        highlights = [
-            *[
-                {"source": SOURCE_LABEL.get(s.source, s.source), "text": s.text, "score": round(s.score, 4)}
-                for s in top_pos if s.score > 0
-            ],
-            *[
-                {"source": SOURCE_LABEL.get(s.source, s.source), "text": s.text, "score": round(s.score, 4)}
-                for s in top_neg if s.score < 0
-            ],
-        ]
-
-        return {"ticker": ticker, "sentiment": combined_score, "sources": sources, "confidence": confidence, "highlights": highlights}
-
-    return await _cache.get_or_compute_swr(
-        cache_key,
-        ttl_seconds=CACHE_TTL_SECONDS,
-        stale_seconds=CACHE_STALE_SECONDS,
-        compute=compute,
-    )
-    
-    
\ No newline at end of file
+
+    return {
+        t: _advance(t, agg, keys, fresh, scored)
+        for t, (agg, keys, fresh), scored in zip(tickers, pending, scored_groups)
+    }
+
+
+async def _compute_claimed(tickers: List[str], request: Optional[Request]) -> Tuple[Dict[str, Tuple[Dict[str, Any], str]], List[str]]:
+    """
+    Batch-compute the tickers this caller can claim through the cache's
+    single-flight lock, so a batch and concurrent single or batch requests
+    never compute the same ticker twice.
+
+    Returns (ticker -> (document set, cache status)) for the claimed tickers,
+    and the tickers another caller was already computing.
+    """
+    resolved: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    owned_elsewhere: List[str] = []
+    async with AsyncExitStack() as claims:
+        claimed = []
+        for t in tickers:
+            if not await claims.enter_async_context(_cache.claim(f"docs:{t}")):
+                owned_elsewhere.append(t)
+                continue
+            # The previous owner may have stored it between our peek and the claim.
+            hit = await _cache.peek(f"docs:{t}")
+            if hit is not None and hit[1] == "HIT":
+                resolved[t] = hit
+            else:
+                claimed.append(t)
+
+        if claimed:
+            docsets = await _compute_batch(claimed, request)
+            for t in claimed:
+                await _cache.store(f"docs:{t}", docsets[t], ttl_seconds=CACHE_TTL_SECONDS, stale_seconds=CACHE_STALE_SECONDS)
+                resolved[t] = (docsets[t], "MISS")
+    return resolved, owned_elsewhere
+
+
+_batch_refreshing: set = set()
+
+
+async def _refresh_batch(tickers: List[str]) -> None:
+    tickers = [t for t in tickers if t not in _batch_refreshing]
+    if not tickers:
+        return
+    _batch_refreshing.update(tickers)
+    try:
+        # Tickers someone else is already refreshing are left to them.
+        await _compute_claimed(tickers, None)
+    except Exception as e:
+        logging.warning(f"Batch refresh failed for {','.join(tickers)}: {e}")
+    finally:
+        _batch_refreshing.difference_update(tickers)
+
+
+def _batch_result(ticker: str, cache_status: str, sentiment: Optional[Dict[str, Any]], error: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    return {"ticker": ticker, "cache": cache_status, "sentiment": sentiment, "error": error}
+
+
+async def get_sentiment_batch(tickers: List[str], request: Request) -> Tuple[List[Dict[str, Any]], str]:
+    """
+    Sentiment for several tickers in one call.
+
+    Cached tickers are answered directly (stale ones are refreshed together in
+    the background); the misses share combined upstream queries and a single
+    scoring pass, and are cached like any single-ticker result.
+    """
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if not tickers:
+        raise_api_error(request, 422, "INVALID_TICKERS", "Provide at least one ticker.")
+    if len(tickers) > BATCH_MAX_TICKERS:
+        raise_api_error(request, 422, "TOO_MANY_TICKERS", f"At most {BATCH_MAX_TICKERS} tickers per batch.")
+
+    if is_mock_mode():
+        results = []
+        for t in tickers:
+            if t in MOCK_ERROR_TICKERS:
+                error_code, status_code, msg = MOCK_ERROR_TICKERS[t]
+                results.append(_batch_result(t, "MOCK", None, {"status": status_code, "error": error_code, "message": msg}))
+            elif t in MOCK_DATA:
+                results.append(_batch_result(t, "MOCK", {"ticker": t, **MOCK_DATA[t], "highlights": []}, None))
+            else:
+                results.append(_batch_result(t, "MOCK", None, {"status": 404, "error": "INVALID_TICKER", "message": "We couldn't find that ticker in the mock dataset."}))
+        return results, "MOCK"
+
+    found: Dict[str, Tuple[Dict[str, Any], str]] = {}
+    missing: List[str] = []
+    stale: List[str] = []
+    for t in tickers:
+        popularity.record(t)
+        hit = await _cache.peek(f"docs:{t}")
+        if hit is None:
+            missing.append(t)
+            continue
+        found[t] = hit
+        if hit[1] == "STALE":
+            stale.append(t)
+
+    if missing:
+        resolved, owned_elsewhere = await _compute_claimed(missing, request)
+        found.update(resolved)
+        # Wait for the callers computing the rest; they come back as hits.
+        waited = await asyncio.gather(*(
+            _cache.get_or_compute_swr(
+                f"docs:{t}",
+                ttl_seconds=CACHE_TTL_SECONDS,
+                stale_seconds=CACHE_STALE_SECONDS,
+                compute=_documents_compute(t, request),
+            )
+            for t in owned_elsewhere
+        ))
+        found.update(zip(owned_elsewhere, waited))
+
+    if stale:
+        asyncio.create_task(_refresh_batch(stale))
+
+    results = [_batch_result(t, found[t][1], found[t][0]["sentiment"], found[t][0]["error"]) for t in tickers]
+    statuses = {r["cache"] for r in results}
+    return results, statuses.pop() if len(statuses) == 1 else "MIXED"
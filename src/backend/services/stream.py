@@ -0,0 +1,115 @@
+import asyncio
+import json
+import logging
+import os
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from fastapi import HTTPException, Request
+
+from backend.core.errors import raise_api_error
+from backend.core.pubsub import broker
+from backend.services.sentiment import BATCH_MAX_TICKERS, get_documents, get_sentiment
+from backend.settings import is_mock_mode
+
+STREAM_HEARTBEAT_SECONDS = float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"))
+STREAM_REFRESH_SECONDS = float(os.getenv("STREAM_REFRESH_SECONDS", "15"))
+
+_keeper: Optional[asyncio.Task] = None
+
+
+async def _keep_fresh() -> None:
+    # One SWR read per subscribed ticker per tick, however many clients are
+    # watching it. Stale entries refresh in the background and the cache
+    # listener pushes the new value to every subscriber.
+    while True:
+        for ticker in broker.topics():
+            try:
+                await get_documents(ticker, None)
+            except HTTPException:
+                pass
+            except Exception as e:
+                logging.warning(f"Stream refresh failed for {ticker}: {e}")
+        await asyncio.sleep(STREAM_REFRESH_SECONDS)
+
+
+def _ensure_keeper() -> None:
+    global _keeper
+    if is_mock_mode():
+        return
+    if _keeper is None or _keeper.done():
+        _keeper = asyncio.create_task(_keep_fresh())
+
+
+async def stop_keeper() -> None:
+    global _keeper
+    if _keeper is not None:
+        _keeper.cancel()
+        try:
+            await _keeper
+        except asyncio.CancelledError:
+            pass
+        _keeper = None
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+def check_tickers(tickers: List[str], request: Request) -> List[str]:
+    """Validated, de-duplicated tickers for a stream; raises before the response starts."""
+    tickers = list(dict.fromkeys(t.strip().upper() for t in tickers if t.strip()))
+    if not tickers:
+        raise_api_error(request, 422, "INVALID_TICKERS", "Provide at least one ticker.")
+    if len(tickers) > BATCH_MAX_TICKERS:
+        raise_api_error(request, 422, "TOO_MANY_TICKERS", f"At most {BATCH_MAX_TICKERS} tickers per stream.")
+    if broker.full():
+        raise_api_error(request, 503, "STREAM_FULL", "Too many open streams, try again shortly.")
+    return tickers
+
+
+async def _initial(ticker: str, request: Request) -> Dict[str, Any]:
+    try:
+        payload, _ = await get_sentiment(ticker, request)
+        return {"event": "sentiment", "data": payload}
+    except HTTPException as e:
+        detail = e.detail if isinstance(e.detail, dict) else {"message": str(e.detail)}
+        return {"event": "error", "data": {"ticker": ticker, "status": e.status_code, **detail}}
+
+
+async def sentiment_events(tickers: List[str], request: Request) -> AsyncIterator[str]:
+    """
+    SSE frames: current values first, then one frame per change, heartbeats in between.
+
+    The subscription is taken here rather than in the route, so it only exists
+    while this generator runs and its finally always releases it.
+    """
+    sub = broker.subscribe(tickers)
+    if sub is None:
+        # Filled up between check_tickers and the first chunk.
+        yield _sse("error", {"status": 503, "error": "STREAM_FULL", "message": "Too many open streams, try again shortly."})
+        return
+    _ensure_keeper()
+    try:
+        for ticker in sub.topics:
+            msg = await _initial(ticker, request)
+            # A miss computed by _initial has already been published to this
+            # subscription; the client gets that value right here instead.
+            broker.seed(ticker, msg)
+            sub.discard(ticker)
+            yield _sse(msg["event"], msg["data"])
+
+        while True:
+            updates = await sub.next(timeout=STREAM_HEARTBEAT_SECONDS)
+            if updates is None:
+                if await request.is_disconnected():
+                    return
+                yield ": keepalive\n\n"
+                continue
+            for msg in updates.values():
+                yield _sse(msg["event"], msg["data"])
+    finally:
+        broker.unsubscribe(sub)
+
+
+def stream_stats() -> Dict[str, Any]:
+    return broker.stats()
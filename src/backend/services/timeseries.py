@@ -0,0 +1,213 @@
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+HISTORY_DB_PATH = os.getenv("HISTORY_DB_PATH", "data/history.sqlite3")
+HISTORY_MAX_POINTS = int(os.getenv("HISTORY_MAX_POINTS", "2000"))
+# Snapshots waiting for the writer; beyond this, new ones are dropped.
+HISTORY_QUEUE_MAX = int(os.getenv("HISTORY_QUEUE_MAX", "10000"))
+
+# Bucket widths kept as pre-aggregated rollups; "raw" reads the snapshots table.
+RESOLUTIONS = {"1m": 60, "1h": 3600, "1d": 86400}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    ticker TEXT NOT NULL,
+    ts INTEGER NOT NULL,
+    score REAL NOT NULL,
+    confidence REAL NOT NULL,
+    PRIMARY KEY (ticker, ts)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollups (
+    ticker TEXT NOT NULL,
+    res INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    n INTEGER NOT NULL,
+    sum_score REAL NOT NULL,
+    sum_conf REAL NOT NULL,
+    min_score REAL NOT NULL,
+    max_score REAL NOT NULL,
+    PRIMARY KEY (ticker, res, bucket)
+) WITHOUT ROWID;
+"""
+
+_UPSERT_ROLLUP = """
+INSERT INTO rollups (ticker, res, bucket, n, sum_score, sum_conf, min_score, max_score)
+VALUES (?, ?, ?, 1, ?, ?, ?, ?)
+ON CONFLICT (ticker, res, bucket) DO UPDATE SET
+    n = n + 1,
+    sum_score = sum_score + excluded.sum_score,
+    sum_conf = sum_conf + excluded.sum_conf,
+    min_score = MIN(min_score, excluded.min_score),
+    max_score = MAX(max_score, excluded.max_score)
+"""
+
+_STOP = object()
+
+
+class SentimentStore:
+    """
+    Append-only sentiment snapshots in SQLite, clustered by (ticker, ts).
+
+    Every append also folds the point into 1m/1h/1d rollup rows, so a
+    downsampled read is a primary-key range scan over exactly the buckets it
+    returns. Writes go through a queue to one writer thread and never block
+    the event loop; reads use a connection per calling thread (WAL mode).
+    """
+
+    def __init__(self, path: str = HISTORY_DB_PATH, queue_max: int = HISTORY_QUEUE_MAX) -> None:
+        self.path = path
+        parent = os.path.dirname(path)
+        if parent:
+            os.makedirs(parent, exist_ok=True)
+
+        conn = self._connect()
+        conn.executescript(_SCHEMA)
+        conn.close()
+
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max(1, queue_max))
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._local = threading.local()
+        self.appended = 0
+        self.dropped = 0
+        self.write_errors = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def record(self, ticker: str, ts: float, score: float, confidence: float) -> None:
+        """
+        Queue a snapshot for writing. Repeats of the same (ticker, second) are
+        ignored; so is everything past queue_max while the writer is behind.
+        """
+        with self._writer_lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name="history-writer", daemon=True)
+                self._writer.start()
+        try:
+            self._queue.put_nowait((ticker, int(ts), float(score), float(confidence)))
+        except queue.Full:
+            self.dropped += 1
+
+    def _write_loop(self) -> None:
+        conn = self._connect()
+        while True:
+            item = self._queue.get()
+            batch = [item]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            rows = [b for b in batch if b is not _STOP]
+            try:
+                if rows:
+                    self._append(conn, rows)
+            except Exception as e:
+                # e.g. "database is locked" with several workers: lose this
+                # batch, keep the writer alive for the next one.
+                self.write_errors += 1
+                self.dropped += len(rows)
+                logging.warning(f"History write of {len(rows)} snapshots failed: {e}")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+            if len(rows) != len(batch):
+                conn.close()
+                return
+
+    def _append(self, conn: sqlite3.Connection, rows: List[Tuple[str, int, float, float]]) -> None:
+        with conn:
+            for ticker, ts, score, conf in rows:
+                cur = conn.execute(
+                    "INSERT OR IGNORE INTO snapshots (ticker, ts, score, confidence) VALUES (?, ?, ?, ?)",
+                    (ticker, ts, score, conf),
+                )
+                if not cur.rowcount:
+                    continue
+                self.appended += 1
+                for width in RESOLUTIONS.values():
+                    conn.execute(_UPSERT_ROLLUP, (ticker, width, ts - ts % width, score, conf, score, score))
+
+    def flush(self) -> None:
+        """Block until every queued snapshot is on disk."""
+        self._queue.join()
+
+    def query(
+        self,
+        ticker: str,
+        start: int,
+        end: int,
+        resolution: str = "1d",
+        limit: int = HISTORY_MAX_POINTS,
+    ) -> List[Dict[str, Any]]:
+        conn = self._reader()
+        if resolution == "raw":
+            rows = conn.execute(
+                "SELECT ts, score, score, score, 1, confidence FROM snapshots "
+                "WHERE ticker = ? AND ts >= ? AND ts <= ? ORDER BY ts DESC LIMIT ?",
+                (ticker, start, end, limit),
+            ).fetchall()
+        else:
+            width = RESOLUTIONS[resolution]
+            rows = conn.execute(
+                "SELECT bucket, sum_score / n, min_score, max_score, n, sum_conf / n FROM rollups "
+                "WHERE ticker = ? AND res = ? AND bucket >= ? AND bucket <= ? ORDER BY bucket DESC LIMIT ?",
+                (ticker, width, start - start % width, end, limit),
+            ).fetchall()
+
+        rows.reverse()
+        return [
+            {"ts": ts, "score": avg, "min": lo, "max": hi, "count": n, "confidence": conf}
+            for ts, avg, lo, hi, n, conf in rows
+        ]
+
+    def close(self) -> None:
+        with self._writer_lock:
+            if self._writer is not None:
+                try:
+                    self._queue.put(_STOP, timeout=5)
+                except queue.Full:
+                    pass
+                self._writer.join(timeout=5)
+                self._writer = None
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+_store: Optional[SentimentStore] = None
+_store_lock = threading.Lock()
+
+
+def get_store() -> SentimentStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = SentimentStore()
+    return _store
+
+
+def close_store() -> None:
+    global _store
+    with _store_lock:
+        if _store is not None:
+            _store.close()
+        _store = None
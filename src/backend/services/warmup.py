@@ -0,0 +1,86 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from backend.services import scoring
+
+WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "true").lower() == "true"
+# Without FinBERT every uncached live request fails with 503, so a deploy can
+# choose to stay unready instead of taking traffic it cannot serve.
+WARMUP_REQUIRE_FINBERT = os.getenv("WARMUP_REQUIRE_FINBERT", "false").lower() == "true"
+
+log = logging.getLogger(__name__)
+
+
+class Readiness:
+    """Warmup state behind /ready: pending -> warming -> ready | failed."""
+
+    def __init__(self) -> None:
+        self.state = "pending"
+        self.models: Dict[str, Dict[str, Any]] = {}
+        self.error: Optional[str] = None
+        self.started_at: Optional[float] = None
+        self.duration_ms: Optional[float] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def mark_ready(self) -> None:
+        self.state = "ready"
+
+    def snapshot(self) -> Dict[str, Any]:
+        out: Dict[str, Any] = {"status": self.state, "models": self.models}
+        if self.duration_ms is not None:
+            out["warmup_ms"] = self.duration_ms
+        if self.error:
+            out["error"] = self.error
+        return out
+
+
+readiness = Readiness()
+_task: Optional["asyncio.Task[None]"] = None
+
+
+def _run(finbert: bool) -> None:
+    readiness.state = "warming"
+    readiness.started_at = time.perf_counter()
+    try:
+        readiness.models = scoring.warm_up(finbert=finbert)
+    except Exception as e:
+        readiness.state = "failed"
+        readiness.error = f"{type(e).__name__}: {e}"
+        log.exception("Model warmup failed")
+        return
+    finally:
+        readiness.duration_ms = round((time.perf_counter() - readiness.started_at) * 1000, 1)
+
+    if WARMUP_REQUIRE_FINBERT and readiness.models.get("finbert", {}).get("status") == "unavailable":
+        readiness.state = "failed"
+        readiness.error = readiness.models["finbert"].get("error")
+        log.error("FinBERT unavailable and WARMUP_REQUIRE_FINBERT is set; staying unready")
+        return
+
+    readiness.mark_ready()
+    log.info("Warmup finished in %sms", readiness.duration_ms, extra={"models": readiness.models})
+
+
+def start_warmup(finbert: bool = True) -> Optional["asyncio.Task[None]"]:
+    """Warm the models in a worker thread; /ready flips once it finishes."""
+    global _task
+    if not WARMUP_ENABLED:
+        readiness.mark_ready()
+        return None
+    if _task is None:
+        _task = asyncio.create_task(asyncio.to_thread(_run, finbert))
+    return _task
+
+
+async def stop_warmup() -> None:
+    global _task
+    if _task is not None:
+        # The worker thread cannot be interrupted; just stop waiting for it.
+        _task.cancel()
+        _task = None
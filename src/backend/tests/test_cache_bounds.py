@@ -0,0 +1,57 @@
+import asyncio
+import time
+
+from backend.core.cache import TTLCache
+
+
+def test_lru_eviction_by_entry_count():
+    cache = TTLCache(max_entries=2)
+    cache.set("a", 1, ttl_seconds=60, stale_seconds=30)
+    cache.set("b", 2, ttl_seconds=60, stale_seconds=30)
+    assert cache.get_entry("a") is not None
+    cache.set("c", 3, ttl_seconds=60, stale_seconds=30)
+
+    assert cache.get_entry("b") is None
+    assert cache.get_entry("a").value == 1
+    assert cache.get_entry("c").value == 3
+    assert cache.stats()["evicted_lru"] == 1
+
+
+def test_eviction_by_byte_budget():
+    cache = TTLCache(max_entries=100, max_bytes=400)
+    for i in range(10):
+        cache.set(f"k{i}", {"text": "x" * 100}, ttl_seconds=60, stale_seconds=30)
+
+    stats = cache.stats()
+    assert stats["bytes"] <= 400
+    assert stats["entries"] < 10
+    assert cache.get_entry("k9") is not None
+
+
+def test_sweep_drops_expired_entries(monkeypatch):
+    cache = TTLCache(sweep_interval=10)
+    cache.set("old", 1, ttl_seconds=1, stale_seconds=1)
+    cache.set("new", 2, ttl_seconds=600, stale_seconds=300)
+
+    real = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: real + 5)
+    assert cache.sweep() == 1
+    assert cache.stats()["entries"] == 1
+    assert cache.stats()["bytes"] == cache.get_entry("new").size
+
+
+async def test_per_key_locks_are_released():
+    cache = TTLCache()
+
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "v"
+
+    results = await asyncio.gather(
+        *[cache.get_or_compute_swr(f"t{i % 5}", 60, 30, compute) for i in range(20)]
+    )
+
+    assert {status for _, status in results} <= {"MISS", "HIT"}
+    stats = cache.stats()
+    assert stats["misses"] == 5
+    assert stats["locks"] == 0
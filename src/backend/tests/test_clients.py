@@ -0,0 +1,58 @@
+from fastapi.testclient import TestClient
+
+def test_registry_reuses_newsapi_client(monkeypatch):
+    from backend.services.clients import ClientRegistry
+
+    monkeypatch.setenv("NEWS_API_KEY", "test-key")
+    registry = ClientRegistry()
+
+    first = registry.newsapi()
+    second = registry.newsapi()
+    assert first is second
+
+    stats = registry.stats()
+    assert stats["newsapi_clients_created"] == 1
+    assert stats["newsapi_checkouts"] == 2
+    registry.close()
+
+
+def test_registry_pools_reddit_clients(monkeypatch):
+    from backend.services.clients import ClientRegistry
+
+    monkeypatch.setenv("REDDIT_CLIENT_ID", "id")
+    monkeypatch.setenv("REDDIT_CLIENT_SECRET", "secret")
+    registry = ClientRegistry(reddit_pool_size=2)
+
+    with registry.reddit() as a:
+        pass
+    with registry.reddit() as b:
+        pass
+    assert a is b
+
+    with registry.reddit() as c:
+        with registry.reddit() as d:
+            assert c is not d
+
+    stats = registry.stats()
+    assert stats["reddit_clients_created"] == 2
+    assert stats["reddit_checkouts"] == 4
+    assert stats["reddit_clients_idle"] == 2
+    registry.close()
+
+
+def test_missing_news_key_returns_no_client(monkeypatch):
+    from backend.services.clients import ClientRegistry
+
+    monkeypatch.delenv("NEWS_API_KEY", raising=False)
+    registry = ClientRegistry()
+    assert registry.newsapi() is None
+    registry.close()
+
+
+def test_stats_endpoint_reports_clients():
+    from backend.main import app
+
+    with TestClient(app) as client:
+        r = client.get("/stats", headers={"X-Forwarded-For": "10.0.0.2"})
+        assert r.status_code == 200
+        assert "newsapi_reuse_ratio" in r.json()["clients"]
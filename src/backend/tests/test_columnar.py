@@ -0,0 +1,86 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from backend.services import scoring
+from backend.services.aggregate import RunningAggregate, window_keys
+
+WORDS = ["beats", "misses", "great", "terrible", "steady", "soars", "crashes", "ok", "strong", "weak", "guidance", "lawsuit"]
+
+
+def _items(n, seed=5):
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc)
+    items = []
+    for i in range(n):
+        ts = None if i % 7 == 0 else now - timedelta(minutes=rng.randrange(1, 5000))
+        if i % 11 == 0 and ts is not None:
+            ts = ts.replace(tzinfo=None)
+        text = " ".join(rng.choice(WORDS) for _ in range(5)) + f" {i}"
+        items.append({"source": "news" if i % 3 else "reddit", "text": text, "ts": ts, "id": f"x{i}"})
+    return items
+
+
+@pytest.fixture
+def stub_finbert(monkeypatch):
+    batcher = scoring.FinbertBatcher(window_ms=0, runner=lambda texts: [((len(t) % 7) - 3) / 3 for t in texts])
+    monkeypatch.setattr(scoring, "_batcher", batcher)
+    scoring._finbert_cache.clear()
+
+
+def _score(monkeypatch, items, min_items):
+    monkeypatch.setattr(scoring, "COLUMNAR_MIN_ITEMS", min_items)
+    return scoring.score_items(items, finbert_top_n=40, budget_ms=0)
+
+
+def test_columnar_scoring_matches_python_path(monkeypatch, stub_finbert):
+    items = _items(300)
+    python = _score(monkeypatch, items, 10**9)
+    columnar = _score(monkeypatch, items, 1)
+
+    assert [s.text for s in columnar] == [it["text"] for it in items]
+    assert [s.text for s in python] == [it["text"] for it in items]
+    assert [s.model for s in columnar] == [s.model for s in python]
+    assert sum(s.model == "finbert" for s in columnar) == 40
+    for a, b in zip(python, columnar):
+        assert a.blended == pytest.approx(b.blended)
+        assert a.score == pytest.approx(b.score, abs=1e-4)
+
+
+def test_columnar_aggregate_matches_python_path(monkeypatch, stub_finbert):
+    import backend.services.sentiment as sentiment_mod
+
+    docs = [sentiment_mod._document(s) for s in _score(monkeypatch, _items(500), 10**9)]
+
+    monkeypatch.setattr(sentiment_mod, "COLUMNAR_MIN_ITEMS", 10**9)
+    python, _ = sentiment_mod._aggregate("TSLA", docs)
+    monkeypatch.setattr(sentiment_mod, "COLUMNAR_MIN_ITEMS", 1)
+    columnar, _ = sentiment_mod._aggregate("TSLA", docs)
+
+    assert columnar["sentiment"] == pytest.approx(python["sentiment"], abs=1e-4)
+    assert columnar["sources"] == pytest.approx(python["sources"], abs=1e-4)
+    assert columnar["confidence"] == pytest.approx(python["confidence"], abs=1e-4)
+    assert columnar["scoring"] == python["scoring"]
+    assert [h["text"] for h in columnar["highlights"]] == [h["text"] for h in python["highlights"]]
+
+
+def test_columnar_running_highlights_match_python_path(monkeypatch, stub_finbert):
+    import backend.services.sentiment as sentiment_mod
+
+    items = _items(400)
+    scored = _score(monkeypatch, items, 10**9)
+    now = datetime.now(timezone.utc).timestamp()
+    agg = RunningAggregate(now)
+    keys = window_keys(items)
+    agg.update(keys, {k: sentiment_mod._entry(s) for k, s in zip(keys, scored)}, now)
+
+    monkeypatch.setattr(sentiment_mod, "COLUMNAR_MIN_ITEMS", 10**9)
+    python, _ = sentiment_mod._aggregate_running("TSLA", agg, now)
+    monkeypatch.setattr(sentiment_mod, "COLUMNAR_MIN_ITEMS", 1)
+    columnar, _ = sentiment_mod._aggregate_running("TSLA", agg, now)
+
+    assert [h["text"] for h in columnar["highlights"]] == [h["text"] for h in python["highlights"]]
+    assert [h["score"] for h in columnar["highlights"]] == pytest.approx([h["score"] for h in python["highlights"]], abs=1e-4)
+    assert columnar["scoring"] == python["scoring"]
+    assert columnar["sentiment"] == python["sentiment"]
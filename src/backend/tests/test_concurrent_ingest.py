@@ -0,0 +1,54 @@
+import importlib
+import time
+from fastapi.testclient import TestClient
+
+def test_cold_miss_fetches_sources_concurrently(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    def slow_news(ticker: str):
+        time.sleep(0.3)
+        return [{"source": "news", "text": f"{ticker} good news", "ts": None}]
+
+    def slow_reddit(ticker: str):
+        time.sleep(0.3)
+        return [{"source": "reddit", "text": f"{ticker} bad reddit", "ts": None}]
+
+    class FakeScored:
+        def __init__(self, source, text, score):
+            self.source = source
+            self.text = text
+            self.score = score
+
+    def fake_score_items(items, finbert_top_n=12):
+        return [FakeScored(it["source"], it["text"], 0.2 if it["source"] == "news" else -0.1) for it in items]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", slow_news)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", slow_reddit)
+    monkeypatch.setattr(sentiment_mod, "score_items", fake_score_items)
+
+    client = TestClient(main_mod.app)
+
+    start = time.perf_counter()
+    r = client.get("/sentiment/TSLA", headers={"X-Forwarded-For": "10.0.0.1"})
+    elapsed = time.perf_counter() - start
+
+    assert r.status_code == 200
+    assert r.headers.get("x-cache") == "MISS"
+    assert elapsed < 0.55
+
+
+def test_fan_out_keeps_input_order():
+    from backend.services.ingest import fan_out
+
+    def work(n):
+        time.sleep(0.05 * (3 - n))
+        return n * 10
+
+    start = time.perf_counter()
+    assert fan_out(work, [0, 1, 2]) == [0, 10, 20]
+    assert time.perf_counter() - start < 0.25
@@ -0,0 +1,130 @@
+import importlib
+from datetime import datetime, timedelta, timezone
+from fastapi.testclient import TestClient
+
+def test_sentiment_and_feed_share_one_fetch(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    calls = {"news": 0, "reddit": 0, "score": 0}
+    now = datetime.now(timezone.utc)
+
+    def fake_news(ticker: str):
+        calls["news"] += 1
+        return [{"source": "news", "text": f"{ticker} beats estimates", "ts": now - timedelta(minutes=5), "id": "n1", "origin": "Reuters"}]
+
+    def fake_reddit(ticker: str):
+        calls["reddit"] += 1
+        return [{"source": "reddit", "text": f"{ticker} is overvalued", "ts": now - timedelta(hours=2), "id": "r1", "origin": "r/stocks"}]
+
+    def fake_score_items(items, finbert_top_n=12):
+        calls["score"] += 1
+        return [
+            ScoredItem(
+                source=it["source"],
+                text=it["text"],
+                score=0.4 if it["source"] == "news" else -0.2,
+                ts=it["ts"],
+                vader=0.5 if it["source"] == "news" else -0.3,
+                id=it["id"],
+                origin=it["origin"],
+            )
+            for it in items
+        ]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", fake_news)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", fake_reddit)
+    monkeypatch.setattr(sentiment_mod, "score_items", fake_score_items)
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.0.3"}
+
+    r1 = client.get("/sentiment/TSLA", headers=headers)
+    assert r1.status_code == 200
+    assert r1.headers.get("x-cache") == "MISS"
+
+    r2 = client.get("/sentiment/feed/TSLA", headers=headers)
+    assert r2.status_code == 200
+    assert r2.headers.get("x-cache") == "HIT"
+
+    items = r2.json()["items"]
+    assert [i["id"] for i in items] == ["n1", "r1"]
+    assert items[0]["source"] == "Reuters"
+    assert items[0]["score"] == 0.5
+    assert items[1]["type"] == "reddit"
+
+    assert calls == {"news": 1, "reddit": 1, "score": 1}
+
+
+def test_feed_still_served_when_sentiment_errors(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda ticker: [])
+    monkeypatch.setattr(
+        sentiment_mod,
+        "fetch_reddit_items",
+        lambda ticker: [{"source": "reddit", "text": "only reddit", "ts": None, "id": "r1", "origin": "r/stocks"}],
+    )
+    monkeypatch.setattr(
+        sentiment_mod,
+        "score_items",
+        lambda items, finbert_top_n=12: [ScoredItem(source="reddit", text="only reddit", score=0.1, vader=0.1, id="r1", origin="r/stocks")],
+    )
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.0.4"}
+
+    r1 = client.get("/sentiment/NVDA", headers=headers)
+    assert r1.status_code == 422
+    assert r1.json()["error"] == "NO_NEWS"
+
+    r2 = client.get("/sentiment/feed/NVDA", headers=headers)
+    assert r2.status_code == 200
+    assert [i["id"] for i in r2.json()["items"]] == ["r1"]
+
+
+def test_feed_degrades_to_vader_when_documents_fail(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.services.feed as feed_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(feed_mod)
+    importlib.reload(main_mod)
+
+    def broken_reddit(ticker):
+        raise RuntimeError("reddit is down")
+
+    def boom(*args, **kwargs):
+        raise sentiment_mod.FinbertUnavailable("FinBERT not installed")
+
+    monkeypatch.setattr(
+        sentiment_mod,
+        "fetch_news_items",
+        lambda ticker: [{"source": "news", "text": "Shares soar on great results", "ts": None, "id": "n1", "origin": "Reuters"}],
+    )
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", broken_reddit)
+    monkeypatch.setattr(sentiment_mod, "score_items", boom)
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.0.7"}
+
+    r = client.get("/sentiment/feed/AMD", headers=headers)
+    assert r.status_code == 200
+    items = r.json()["items"]
+    assert [i["id"] for i in items] == ["n1"]
+    assert items[0]["score"] > 0
@@ -0,0 +1,59 @@
+import asyncio
+import importlib
+import time
+
+
+def _docs(ticker, n, now):
+    items = [
+        {"id": f"n{i}", "source": "news", "origin": "Reuters", "text": f"headline {i}", "ts": now - i * 600, "vader": 0.1, "score": 0.1}
+        for i in range(n)
+    ]
+    items.append({"id": "r0", "source": "reddit", "origin": "r/stocks", "text": "undated", "ts": None, "vader": -0.2, "score": -0.2})
+    items.reverse()
+    return {"ticker": ticker, "items": items}
+
+
+def test_render_keeps_newest_with_epoch_timestamps():
+    import backend.services.feed as feed_mod
+
+    now = time.time()
+    feed = feed_mod._render("TSLA", _docs("TSLA", 20, now))
+
+    assert [i["id"] for i in feed["items"]] == [f"n{i}" for i in range(feed_mod.FEED_MAX_ITEMS)]
+    assert all("ago" not in i for i in feed["items"])
+
+    # The cached payload stays the same; only its serialization ages.
+    assert feed_mod.serialize(feed, now=now)["items"][1]["ago"] == "10 min ago"
+    assert feed_mod.serialize(feed, now=now + 3600)["items"][1]["ago"] == "1 h ago"
+    assert "ts" not in feed_mod.serialize(feed, now=now)["items"][0]
+
+    few = feed_mod._render("TSLA", _docs("TSLA", 2, now))
+    assert [i["id"] for i in few["items"]] == ["n0", "n1", "r0"]
+    assert feed_mod.serialize(few, now=now)["items"][-1]["ago"] == ""
+
+
+async def test_concurrent_feed_requests_share_one_compute(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.feed as feed_mod
+    importlib.reload(feed_mod)
+
+    calls = {"docs": 0}
+
+    async def fake_documents(ticker, request):
+        calls["docs"] += 1
+        await asyncio.sleep(0.05)
+        return _docs(ticker, 3, time.time()), "MISS"
+
+    monkeypatch.setattr(feed_mod, "get_documents", fake_documents)
+
+    results = await asyncio.gather(*(feed_mod.get_feed("amd", None) for _ in range(5)))
+
+    assert calls["docs"] == 1
+    assert [status for _, status in results].count("MISS") == 1
+    assert all(payload == results[0][0] for payload, _ in results)
+
+    payload, status = await feed_mod.get_feed("AMD", None)
+    assert status == "HIT"
+    assert calls["docs"] == 1
+    assert payload["items"][0]["ago"] == "0 min ago"
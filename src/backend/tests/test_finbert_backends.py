@@ -0,0 +1,78 @@
+import importlib.util
+
+import pytest
+
+from backend.services import scoring
+
+
+class _FixedScorer(scoring.FinbertScorer):
+    name = "fixed"
+
+    def __init__(self):
+        self.calls = []
+
+    def score(self, texts):
+        self.calls.append(list(texts))
+        return [0.5 if "up" in t else -0.5 for t in texts]
+
+
+def test_run_finbert_goes_through_the_selected_scorer(monkeypatch):
+    scorer = _FixedScorer()
+    monkeypatch.setattr(scoring, "_finbert", scorer)
+
+    assert scoring._run_finbert(["shares up", "shares down"]) == [0.5, -0.5]
+    assert scorer.calls == [["shares up", "shares down"]]
+
+
+def test_unknown_backend_is_reported_as_unavailable():
+    with pytest.raises(scoring.FinbertUnavailable, match="FINBERT_BACKEND"):
+        scoring.make_finbert_scorer("tensorrt")
+
+
+@pytest.mark.skipif(importlib.util.find_spec("onnxruntime") is not None, reason="onnxruntime is installed")
+def test_onnx_backend_without_runtime_is_unavailable(tmp_path):
+    (tmp_path / "model.int8.onnx").touch()
+    with pytest.raises(scoring.FinbertUnavailable, match="not installed"):
+        scoring.make_finbert_scorer("onnx", model_dir=str(tmp_path))
+
+
+def test_onnx_backend_never_exports_on_load(tmp_path):
+    with pytest.raises(scoring.FinbertUnavailable, match="no exported FinBERT model"):
+        scoring.make_finbert_scorer("onnx", model_dir=str(tmp_path))
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_load_failures_are_cached_until_the_retry_window_passes(monkeypatch):
+    calls = []
+
+    def failing(backend=None, **kwargs):
+        calls.append(backend)
+        raise scoring.FinbertUnavailable("no model")
+
+    monkeypatch.setattr(scoring, "_finbert", None)
+    monkeypatch.setattr(scoring, "_finbert_failure", None)
+    monkeypatch.setattr(scoring, "make_finbert_scorer", failing)
+
+    for _ in range(3):
+        with pytest.raises(scoring.FinbertUnavailable, match="no model"):
+            scoring._get_finbert()
+    assert len(calls) == 1
+
+    monkeypatch.setattr(scoring, "FINBERT_RETRY_SECONDS", 0)
+    with pytest.raises(scoring.FinbertUnavailable):
+        scoring._get_finbert()
+    assert len(calls) == 2
+
+
+def test_scorer_without_score_cannot_be_built():
+    class Incomplete(scoring.FinbertScorer):
+        name = "incomplete"
+
+    with pytest.raises(TypeError):
+        Incomplete()
+
+
+def test_signed_scores_follow_the_label():
+    assert scoring._signed("Positive", 0.9) == 0.9
+    assert scoring._signed("negative", 0.8) == -0.8
+    assert scoring._signed("neutral", 0.99) == 0.0
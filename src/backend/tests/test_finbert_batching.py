@@ -0,0 +1,62 @@
+import threading
+import pytest
+
+def test_concurrent_callers_share_one_forward_pass():
+    from backend.services.scoring import FinbertBatcher
+
+    calls = []
+
+    def runner(texts):
+        calls.append(list(texts))
+        return [float(len(t)) for t in texts]
+
+    batcher = FinbertBatcher(window_ms=100, max_batch=64, runner=runner)
+
+    barrier = threading.Barrier(8)
+    results = {}
+
+    def caller(i):
+        texts = ["x" * (i + 1), "y" * (i + 10)]
+        barrier.wait()
+        results[i] = batcher.submit(texts).result(timeout=5)
+
+    threads = [threading.Thread(target=caller, args=(i,)) for i in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i in range(8):
+        assert results[i] == [float(i + 1), float(i + 10)]
+
+    assert len(calls) < 8
+    assert batcher.stats()["texts"] == 16
+
+
+def test_batch_respects_max_size():
+    from backend.services.scoring import FinbertBatcher
+
+    sizes = []
+
+    def runner(texts):
+        sizes.append(len(texts))
+        return [0.0] * len(texts)
+
+    batcher = FinbertBatcher(window_ms=50, max_batch=4, runner=runner)
+    futures = [batcher.submit(["a", "b"]) for _ in range(5)]
+    for f in futures:
+        assert f.result(timeout=5) == [0.0, 0.0]
+
+    assert max(sizes) <= 4
+    assert sum(sizes) == 10
+
+
+def test_runner_errors_reach_every_caller():
+    from backend.services.scoring import FinbertBatcher, FinbertUnavailable
+
+    def runner(texts):
+        raise FinbertUnavailable("transformers not installed")
+
+    batcher = FinbertBatcher(window_ms=1, runner=runner)
+    with pytest.raises(FinbertUnavailable):
+        batcher.submit(["a"]).result(timeout=5)
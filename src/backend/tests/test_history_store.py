@@ -0,0 +1,122 @@
+import importlib
+import sqlite3
+from types import SimpleNamespace
+from fastapi.testclient import TestClient
+
+from backend.services.timeseries import SentimentStore
+
+
+def test_store_rolls_up_and_ignores_repeats(tmp_path):
+    store = SentimentStore(str(tmp_path / "h.sqlite3"))
+    day = 86400 * 20000
+
+    store.record("TSLA", day + 10, 0.2, 0.5)
+    store.record("TSLA", day + 10, 0.9, 0.5)
+    store.record("TSLA", day + 70, 0.4, 0.7)
+    store.record("TSLA", day + 86400 + 5, -0.3, 0.6)
+    store.record("AAPL", day + 20, 0.8, 0.9)
+    store.flush()
+
+    assert store.appended == 4
+
+    raw = store.query("TSLA", day, day + 2 * 86400, "raw")
+    assert [p["ts"] for p in raw] == [day + 10, day + 70, day + 86400 + 5]
+
+    minutes = store.query("TSLA", day, day + 86399, "1m")
+    assert [(p["ts"], p["count"]) for p in minutes] == [(day, 1), (day + 60, 1)]
+
+    days = store.query("TSLA", day + 3600, day + 2 * 86400, "1d")
+    assert [p["ts"] for p in days] == [day, day + 86400]
+    assert days[0]["count"] == 2
+    assert abs(days[0]["score"] - 0.3) < 1e-9
+    assert (days[0]["min"], days[0]["max"]) == (0.2, 0.4)
+
+    assert [p["ts"] for p in store.query("TSLA", day, day + 2 * 86400, "raw", limit=2)] == [day + 70, day + 86400 + 5]
+    store.close()
+
+
+def test_writer_survives_a_failed_batch_and_queue_is_bounded(tmp_path):
+    store = SentimentStore(str(tmp_path / "h.sqlite3"), queue_max=3)
+    append = store._append
+    calls = []
+
+    def flaky_append(conn, rows):
+        calls.append(len(rows))
+        if len(calls) == 1:
+            raise sqlite3.OperationalError("database is locked")
+        append(conn, rows)
+
+    store._append = flaky_append
+    store.record("TSLA", 100, 0.1, 0.5)
+    store.flush()
+    assert store.write_errors == 1
+
+    store.record("TSLA", 200, 0.2, 0.5)
+    store.flush()
+    assert store.appended == 1
+    assert [p["ts"] for p in store.query("TSLA", 0, 1000, "raw")] == [200]
+
+    # A stalled writer can queue at most queue_max snapshots.
+    store._append = lambda conn, rows: None
+    store.close()
+    store._writer = SimpleNamespace(is_alive=lambda: True)  # looks started, never drains
+    for i in range(10):
+        store.record("TSLA", 300 + i, 0.3, 0.5)
+    assert store._queue.qsize() == 3
+    assert store.dropped == 1 + 7
+
+
+def test_history_route_reads_recorded_snapshots(monkeypatch, tmp_path):
+    monkeypatch.setenv("MOCK", "false")
+    monkeypatch.setenv("HISTORY_DB_PATH", str(tmp_path / "history.sqlite3"))
+
+    import backend.services.timeseries as ts_mod
+    import backend.services.sentiment as sentiment_mod
+    import backend.services.history as history_mod
+    import backend.main as main_mod
+    importlib.reload(ts_mod)
+    importlib.reload(sentiment_mod)
+    importlib.reload(history_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: [{"source": "news", "text": "up", "ts": None}])
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: [{"source": "reddit", "text": "flat", "ts": None}])
+    monkeypatch.setattr(
+        sentiment_mod,
+        "score_items",
+        lambda items, finbert_top_n=12: [ScoredItem(source=it["source"], text=it["text"], score=0.5 if it["source"] == "news" else 0.1) for it in items],
+    )
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.2.1"}
+
+    empty = client.get("/sentiment/history/NVDA", headers=headers)
+    assert empty.status_code == 200
+    assert empty.headers.get("x-cache") == "MISS"
+    assert empty.json()["history"] == []
+
+    assert client.get("/sentiment/NVDA", headers=headers).status_code == 200
+    ts_mod.get_store().flush()
+
+    r = client.get("/sentiment/history/NVDA?resolution=raw", headers=headers)
+    assert r.status_code == 200
+    assert r.headers.get("x-cache") == "HIT"
+    history = r.json()["history"]
+    assert len(history) == 1
+    assert history[0]["score"] == 0.3
+
+    bad = client.get("/sentiment/history/NVDA?resolution=5m", headers=headers)
+    assert bad.status_code == 422
+    assert bad.json()["error"] == "INVALID_RESOLUTION"
+
+    for value in ("inf", "1e400", "1e300", "nan"):
+        bad = client.get(f"/sentiment/history/NVDA?start={value}", headers=headers)
+        assert bad.status_code == 422
+        assert bad.json()["error"] == "INVALID_RANGE"
+
+    bad = client.get("/sentiment/history/NVDA?start=yesterday", headers=headers)
+    assert bad.status_code == 422
+
+    ts_mod.close_store()
@@ -0,0 +1,166 @@
+import importlib
+import math
+import time
+from datetime import datetime, timedelta, timezone
+
+from backend.services.aggregate import RunningAggregate, window_keys
+from backend.services.scoring import _age_weight
+
+
+def test_running_sums_decay_like_age_weight():
+    t0 = 1_700_000_000.0
+    agg = RunningAggregate(t0)
+    items = {
+        "a": ("news", 0.6, t0 - 3600),
+        "b": ("reddit", -0.4, t0 - 86400),
+        "c": ("news", 0.2, None),
+    }
+    agg.update(list(items), {k: (*v, {}) for k, v in items.items()}, t0)
+    agg.update(["a", "c"], {}, t0)
+
+    later = t0 + 5 * 3600
+    moments = agg.moments(later)
+    assert "reddit" not in moments
+
+    w = math.exp(-math.log(2) / 48.0 * ((later - (t0 - 3600)) / 3600.0))
+    n, total, sq = moments["news"]
+    assert n == 2
+    assert abs(total - (0.6 * w + 0.2)) < 1e-12
+    assert abs(sq - ((0.6 * w) ** 2 + 0.04)) < 1e-12
+
+
+def test_window_keys_keep_repeats_apart():
+    items = [{"source": "news", "text": "same"}, {"source": "news", "text": "same"}, {"source": "news", "id": "u1", "text": "x"}]
+    keys = window_keys(items)
+    assert len(set(keys)) == 3
+    assert keys[2] == "news:u1"
+
+
+async def test_refresh_scores_only_new_items(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    now = datetime.now(timezone.utc)
+    news = [
+        {"source": "news", "text": "beats estimates", "ts": now - timedelta(hours=1), "id": "n1", "origin": "Reuters"},
+        {"source": "news", "text": "guidance cut", "ts": now - timedelta(hours=30), "id": "n2", "origin": "AP"},
+    ]
+    reddit = [{"source": "reddit", "text": "holding", "ts": None, "id": "r1", "origin": "r/stocks"}]
+    scored_texts = []
+
+    def fake_score_items(items, finbert_top_n=12):
+        items = list(items)
+        scored_texts.extend(it["text"] for it in items)
+        raw = {"beats estimates": 0.7, "guidance cut": -0.5, "holding": 0.1, "new contract": 0.4}
+        return [
+            ScoredItem(
+                source=it["source"],
+                text=it["text"],
+                score=round(raw[it["text"]] * _age_weight(it["ts"]), 4),
+                ts=it["ts"],
+                id=it["id"],
+                origin=it["origin"],
+                blended=raw[it["text"]],
+            )
+            for it in items
+        ]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: list(news))
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: list(reddit))
+    monkeypatch.setattr(sentiment_mod, "score_items", fake_score_items)
+
+    await sentiment_mod._documents_compute("NVDA", None)()
+    assert len(scored_texts) == 3
+
+    news[1] = {"source": "news", "text": "new contract", "ts": now - timedelta(minutes=5), "id": "n3", "origin": "AP"}
+    scored_texts.clear()
+    docset = await sentiment_mod._documents_compute("NVDA", None)()
+    assert scored_texts == ["new contract"]
+    assert [d["id"] for d in docset["items"]] == ["n1", "n3", "r1"]
+
+    full = sentiment_mod._document_set("NVDA", fake_score_items([*news, *reddit]))
+    assert docset["sentiment"]["sentiment"] == full["sentiment"]["sentiment"]
+    assert docset["sentiment"]["sources"] == full["sentiment"]["sources"]
+    assert abs(docset["sentiment"]["confidence"] - full["sentiment"]["confidence"]) < 1e-3
+    assert [h["text"] for h in docset["sentiment"]["highlights"]] == [h["text"] for h in full["sentiment"]["highlights"]]
+    assert sentiment_mod.aggregate_stats()["items_removed"] == 1
+
+
+async def test_refresh_with_real_scoring_keeps_keys_and_scores_together(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+    monkeypatch.setattr(sentiment_mod, "FINBERT_TOP_N", 0)
+
+    from backend.services.scoring import score_items, vader_score
+
+    now = datetime.now(timezone.utc)
+    # Input order differs from |VADER| order, which score_items once returned.
+    news = [
+        {"source": "news", "text": "company holds meeting", "ts": now - timedelta(hours=1), "id": "a", "origin": "AP"},
+        {"source": "news", "text": "terrible awful collapse, huge losses", "ts": now - timedelta(hours=2), "id": "b", "origin": "AP"},
+        {"source": "news", "text": "great results, shares soar", "ts": now - timedelta(hours=3), "id": "c", "origin": "AP"},
+    ]
+    reddit = [{"source": "reddit", "text": "good buy", "ts": None, "id": "r", "origin": "r/stocks"}]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: list(news))
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: list(reddit))
+
+    await sentiment_mod._documents_compute("AMD", None)()
+    del news[1]
+    docset = await sentiment_mod._documents_compute("AMD", None)()
+
+    for d in docset["items"]:
+        assert d["vader"] == vader_score(d["text"])
+    assert [d["id"] for d in docset["items"]] == ["a", "c", "r"]
+
+    full = sentiment_mod._document_set("AMD", score_items([*news, *reddit], finbert_top_n=0))
+    assert abs(docset["sentiment"]["sentiment"] - full["sentiment"]["sentiment"]) < 1e-3
+    for source, mean in full["sentiment"]["sources"].items():
+        assert abs(docset["sentiment"]["sources"][source] - mean) < 1e-3
+    assert [h["text"] for h in docset["sentiment"]["highlights"]] == [h["text"] for h in full["sentiment"]["highlights"]]
+
+
+async def test_vader_fallbacks_are_rescored_once_finbert_caught_up(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+
+    from backend.services import scoring
+
+    def slow_runner(texts):
+        time.sleep(0.3)
+        return [0.6] * len(texts)
+
+    monkeypatch.setattr(scoring, "_batcher", scoring.FinbertBatcher(window_ms=0, runner=slow_runner))
+    monkeypatch.setattr(scoring, "SCORING_BUDGET_MS", 50.0)
+    scoring._finbert_cache.clear()
+
+    now = datetime.now(timezone.utc)
+    news = [{"source": "news", "text": "Shares of the company moved on Thursday", "ts": now - timedelta(hours=1), "id": "n1", "origin": "AP"}]
+    reddit = [{"source": "reddit", "text": "Stock holds steady ahead of the report", "ts": None, "id": "r1", "origin": "r/stocks"}]
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: list(news))
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: list(reddit))
+
+    first = await sentiment_mod._documents_compute("INTC", None)()
+    assert {d["model"] for d in first["items"]} == {"vader"}
+
+    # The batch that missed the deadline still finishes and fills the cache.
+    deadline = time.monotonic() + 5
+    while not all(scoring.has_finbert_score(it["text"]) for it in [*news, *reddit]) and time.monotonic() < deadline:
+        time.sleep(0.02)
+
+    second = await sentiment_mod._documents_compute("INTC", None)()
+    assert {d["model"] for d in second["items"]} == {"finbert"}
+    assert second["sentiment"]["scoring"] == {"finbert": 2, "vader": 0}
+    assert sentiment_mod.aggregate_stats()["items_removed"] == 0
+
+    # Upgraded entries are reused from then on.
+    _, _, fresh = sentiment_mod._unscored("INTC", [*news, *reddit], now.timestamp())
+    assert fresh == []
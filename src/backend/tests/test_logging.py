@@ -0,0 +1,69 @@
+import json
+import logging
+
+from backend.core.logs import ContextFilter, JsonFormatter, RateLimitFilter, bind, unbind
+
+
+def _record(level=logging.INFO, msg="hello %s", args=("world",), lineno=10, extra=None):
+    return logging.getLogger("pioni.test").makeRecord("pioni.test", level, "x.py", lineno, msg, args, None, extra=extra)
+
+
+def test_records_carry_context_and_extra_as_json():
+    token = bind(request_id="abc123", ticker="TSLA")
+    try:
+        record = _record(extra={"duration_ms": 1.5, "cache": "HIT"})
+        assert ContextFilter().filter(record)
+    finally:
+        unbind(token)
+
+    out = json.loads(JsonFormatter().format(record))
+    assert out["msg"] == "hello world"
+    assert out["level"] == "INFO"
+    assert (out["request_id"], out["ticker"], out["cache"], out["duration_ms"]) == ("abc123", "TSLA", "HIT", 1.5)
+
+    bare = _record()
+    ContextFilter().filter(bare)
+    assert "request_id" not in json.loads(JsonFormatter().format(bare))
+
+
+def test_rate_limit_is_per_call_site_and_spares_errors():
+    f = RateLimitFilter(rate=5, warning_rate=5)
+
+    assert sum(f.filter(_record()) for _ in range(100)) == 5
+    assert sum(f.filter(_record(lineno=11)) for _ in range(3)) == 3
+    assert all(f.filter(_record(level=logging.ERROR)) for _ in range(20))
+    assert f.dropped == 95
+
+
+async def test_ticker_binding_ends_with_the_document_lookup(monkeypatch):
+    import importlib
+
+    from backend.core import logs
+
+    monkeypatch.setenv("MOCK", "false")
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+
+    seen = []
+
+    async def fake_swr(key, ttl_seconds, stale_seconds, compute):
+        seen.append(logs._context.get().get("ticker"))
+        return {}, "HIT"
+
+    monkeypatch.setattr(sentiment_mod._cache, "get_or_compute_swr", fake_swr)
+
+    await sentiment_mod.get_documents("tsla", None)
+    await sentiment_mod.get_documents("amd", None)
+    assert seen == ["TSLA", "AMD"]
+    assert "ticker" not in logs._context.get()
+
+
+def test_importing_the_app_does_not_start_logging():
+    import importlib
+
+    from backend.core import logs
+    import backend.main as main_mod
+
+    logs.stop_logging()
+    importlib.reload(main_mod)
+    assert logs._listener is None
@@ -0,0 +1,76 @@
+import importlib
+from fastapi.testclient import TestClient
+
+from backend.core import metrics
+
+
+def test_histogram_and_counter_render_prometheus_text():
+    h = metrics.Histogram("test_seconds", "Test histogram.", ["stage"], buckets=(0.1, 1.0))
+    c = metrics.Counter("test_total", "Test counter.", ["outcome"])
+    try:
+        h.observe(0.05, "a")
+        h.observe(0.5, "a")
+        h.observe(5, "a")
+        with h.time("b"):
+            pass
+        c.inc("HIT")
+        c.inc("HIT")
+
+        text = metrics.render()
+        assert "# TYPE test_seconds histogram" in text
+        assert 'test_seconds_bucket{stage="a",le="0.1"} 1' in text
+        assert 'test_seconds_bucket{stage="a",le="1"} 2' in text
+        assert 'test_seconds_bucket{stage="a",le="+Inf"} 3' in text
+        assert 'test_seconds_count{stage="a"} 3' in text
+        assert 'test_seconds_count{stage="b"} 1' in text
+        assert 'test_total{outcome="HIT"} 2' in text
+    finally:
+        metrics._registry.remove(h)
+        metrics._registry.remove(c)
+
+
+def test_disabled_metrics_are_noops(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_ENABLED", False)
+    c = metrics.Counter("test_disabled_total", "Off.")
+    try:
+        c.inc()
+        assert c.labels() is metrics._NOOP
+        assert c._children == {}
+    finally:
+        metrics._registry.remove(c)
+
+
+def test_metrics_endpoint_reports_stages_and_cache_outcomes(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: [{"source": "news", "text": "up", "ts": None}])
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: [{"source": "reddit", "text": "down", "ts": None}])
+    monkeypatch.setattr(
+        sentiment_mod,
+        "score_items",
+        lambda items, finbert_top_n=12: [ScoredItem(source=it["source"], text=it["text"], score=0.3) for it in items],
+    )
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.3.1"}
+    client.get("/sentiment/AMD", headers=headers)
+    client.get("/sentiment/AMD", headers=headers)
+
+    r = client.get("/metrics", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("text/plain; version=0.0.4")
+    for stage in ("news_fetch", "reddit_fetch", "score", "aggregate", "cache_lock_wait"):
+        assert f'pioni_stage_seconds_count{{stage="{stage}"}}' in r.text
+    assert 'pioni_cache_requests_total{cache="sentiment",outcome="MISS"}' in r.text
+    assert 'pioni_cache_requests_total{cache="sentiment",outcome="HIT"}' in r.text
+
+    client.get("/sentiment/feed/AMD", headers=headers)
+    r = client.get("/metrics", headers=headers)
+    assert 'pioni_cache_requests_total{cache="feed",outcome="MISS"}' in r.text
@@ -0,0 +1,126 @@
+from datetime import datetime, timezone
+
+from backend.core.resp import FakeRedisServer, RespClient
+from backend.services.prefetch import PopularityTracker, Prefetcher, QuotaBudget
+
+
+def _noon():
+    return datetime(2026, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+
+def test_popularity_decays_and_ranks():
+    tracker = PopularityTracker(half_life_seconds=10)
+    for _ in range(4):
+        tracker.record("AAPL", now=0.0)
+    tracker.record("MSFT", now=0.0)
+    tracker.record("MSFT", now=20.0)
+
+    top = tracker.top(2, now=20.0)
+    assert [t for t, _ in top] == ["MSFT", "AAPL"]
+    assert abs(tracker.score("AAPL", now=20.0) - 1.0) < 1e-9
+
+
+def test_quota_budget_reserves_on_demand_share():
+    quota = QuotaBudget(daily_quota=100, clock=_noon)
+    quota.spend(50)
+    assert quota.remaining() == 50
+    assert quota.prefetch_budget(0.3) == 20
+    assert quota.seconds_until_reset() == 12 * 3600
+
+
+async def test_prefetcher_refreshes_hot_tickers_within_budget():
+    tracker = PopularityTracker()
+    for _ in range(5):
+        tracker.record("AAPL")
+    for _ in range(3):
+        tracker.record("TSLA")
+    tracker.record("COLD")
+
+    quota = QuotaBudget(daily_quota=100, clock=_noon)
+    refreshed = []
+    fresh = {"TSLA": 300.0}
+
+    async def refresh(ticker, fresh_for):
+        quota.spend()
+        refreshed.append((ticker, fresh_for))
+
+    async def freshness(ticker):
+        return fresh.get(ticker)
+
+    prefetcher = Prefetcher(refresh, freshness, tracker, quota, top_n=5, min_score=2, reserve_fraction=0.3)
+
+    assert await prefetcher.tick() == 1
+    assert [t for t, _ in refreshed] == ["AAPL"]
+
+    # 70 prefetch calls over 12h for 2 hot tickers -> one refresh per ~1234s each.
+    assert abs(refreshed[0][1] - (12 * 3600 * 2 / 70 + prefetcher.lead_seconds)) < 1.0
+
+    # Interval not elapsed yet: nothing else is spent.
+    assert await prefetcher.tick() == 0
+
+
+async def test_prefetcher_stops_when_budget_is_spent():
+    tracker = PopularityTracker()
+    for _ in range(5):
+        tracker.record("AAPL")
+
+    quota = QuotaBudget(daily_quota=10, clock=_noon)
+    quota.spend(7)
+
+    async def refresh(ticker, fresh_for):
+        raise AssertionError("should not refresh without budget")
+
+    async def freshness(ticker):
+        return None
+
+    prefetcher = Prefetcher(refresh, freshness, tracker, quota, reserve_fraction=0.3)
+    assert await prefetcher.tick() == 0
+
+
+async def test_quota_is_shared_across_workers_and_restarts():
+    server = await FakeRedisServer().start()
+    workers = [QuotaBudget(daily_quota=100, clock=_noon, store=RespClient.from_url(server.url)) for _ in range(2)]
+    try:
+        workers[0].spend(30)
+        workers[1].spend(20)
+        for w in workers:
+            await w.sync()
+        await workers[0].sync()
+        assert [w.used() for w in workers] == [50, 50]
+
+        # A restarted worker starts from the day's shared count, not zero.
+        restarted = QuotaBudget(daily_quota=100, clock=_noon, store=RespClient.from_url(server.url))
+        await restarted.sync()
+        assert restarted.remaining() == 50
+        await restarted.close()
+    finally:
+        for w in workers:
+            await w.close()
+        await server.stop()
+
+
+async def test_quota_counts_locally_when_the_store_is_down():
+    server = await FakeRedisServer().start()
+    url = server.url
+    await server.stop()
+
+    quota = QuotaBudget(daily_quota=100, clock=_noon, store=RespClient.from_url(url, timeout=0.2))
+    quota.spend(5)
+    await quota.sync()
+    assert quota.used() == 5
+    assert quota.sync_errors == 1
+
+
+def test_paged_refreshes_stretch_the_interval():
+    tracker = PopularityTracker()
+    quota = QuotaBudget(daily_quota=100, clock=_noon)
+
+    async def never(*args):
+        raise AssertionError
+
+    one = Prefetcher(never, never, tracker, quota, reserve_fraction=0.3)
+    paged = Prefetcher(never, never, tracker, quota, reserve_fraction=0.3, calls_per_refresh=3)
+    assert paged.interval_for(2) == 3 * one.interval_for(2)
+
+    quota.spend(68)
+    assert paged.interval_for(2) is None
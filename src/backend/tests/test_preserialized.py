@@ -0,0 +1,82 @@
+import importlib
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+
+def _setup(monkeypatch, preserialized):
+    monkeypatch.setenv("MOCK", "false")
+    monkeypatch.setenv("PRESERIALIZED_RESPONSES", "true" if preserialized else "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    now = datetime.now(timezone.utc)
+    monkeypatch.setattr(
+        sentiment_mod,
+        "fetch_news_items",
+        lambda ticker: [{"source": "news", "text": f"{ticker} beats estimates — again", "ts": now - timedelta(minutes=5), "id": "n1", "origin": "Reuters"}],
+    )
+    monkeypatch.setattr(
+        sentiment_mod,
+        "fetch_reddit_items",
+        lambda ticker: [{"source": "reddit", "text": f"{ticker} is overvalued", "ts": now - timedelta(hours=2), "id": "r1", "origin": "r/stocks"}],
+    )
+    monkeypatch.setattr(
+        sentiment_mod,
+        "score_items",
+        lambda items, finbert_top_n=12: [
+            ScoredItem(source=it["source"], text=it["text"], score=0.4 if it["source"] == "news" else -0.2, ts=it["ts"], id=it["id"], origin=it["origin"])
+            for it in items
+        ],
+    )
+    return sentiment_mod, TestClient(main_mod.app)
+
+
+@pytest.mark.parametrize("preserialized", [True, False])
+def test_sentiment_body_matches_the_response_model(monkeypatch, preserialized):
+    _, client = _setup(monkeypatch, preserialized)
+    headers = {"X-Forwarded-For": "10.0.25.1" if preserialized else "10.0.25.2"}
+
+    r1 = client.get("/sentiment/TSLA", headers=headers)
+    r2 = client.get("/sentiment/TSLA", headers=headers)
+
+    assert (r1.headers["x-cache"], r2.headers["x-cache"]) == ("MISS", "HIT")
+    assert r2.headers["content-type"] == "application/json"
+    assert r2.headers["x-mode"] == "LIVE"
+    body = r2.json()
+    assert body["highlights"][0]["text"] == "TSLA beats estimates — again"
+    assert body["scoring"] == {"finbert": 0, "vader": 2}
+    assert r1.json() == body
+
+
+async def test_hits_return_the_cached_bytes_verbatim(monkeypatch):
+    sentiment_mod, client = _setup(monkeypatch, True)
+    headers = {"X-Forwarded-For": "10.0.25.3"}
+
+    assert client.get("/sentiment/AMD", headers=headers).status_code == 200
+
+    docs, _ = await sentiment_mod._cache.peek("docs:AMD")
+    assert json.loads(docs["body"]) == docs["sentiment"]
+
+    # Whatever was encoded at compute time is what a hit serves: no re-validation.
+    marker = json.dumps({**docs["sentiment"], "sentiment": 0.123456789})
+    sentiment_mod._cache.set("docs:AMD", {**docs, "body": marker}, ttl_seconds=300, stale_seconds=60)
+    r = client.get("/sentiment/AMD", headers=headers)
+    assert r.headers["x-cache"] == "HIT"
+    assert r.text == marker
+
+
+def test_stdlib_fallback_encodes_like_orjson(monkeypatch):
+    import backend.core.encoding as encoding
+
+    payload = {"ticker": "TSLA", "sentiment": 0.25, "sources": {"newsapi": -0.5}, "highlights": [{"text": "café ↑"}]}
+    fast = encoding.dumps(payload)
+    monkeypatch.setattr(encoding, "orjson", None)
+    assert encoding.dumps(payload) == fast
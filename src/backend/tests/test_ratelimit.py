@@ -1,6 +1,8 @@
 import importlib
 from fastapi.testclient import TestClient
 
+from backend.core.ratelimit import RateLimiter
+
 def test_rate_limit_returns_429(monkeypatch):
     monkeypatch.setenv("MOCK", "true")
     monkeypatch.setenv("RATE_LIMIT_MAX_REQUESTS", "1")
@@ -12,12 +14,69 @@ def test_rate_limit_returns_429(monkeypatch):
     import backend.main as main_mod
     importlib.reload(main_mod)
 
-    client = TestClient(main_mod.app)
-    headers = {"X-Forwarded-For": "1.2.3.4"}
+    try:
+        client = TestClient(main_mod.app)
+        headers = {"X-Forwarded-For": "1.2.3.4"}
+
+        r1 = client.get("/sentiment/TSLA", headers=headers)
+        assert r1.status_code == 200
+
+        r2 = client.get("/sentiment/TSLA", headers=headers)
+        assert r2.status_code == 429, r2.text
+        assert "error" in r2.json()
+        assert int(r2.headers["retry-after"]) > 0
+
+        # Default key is client + route template: other tickers share the
+        # budget, other routes and the probes do not.
+        r3 = client.get("/sentiment/AAPL", headers=headers)
+        assert r3.status_code == 429
+        assert client.get("/sentiment/feed/AAPL", headers=headers).status_code == 200
+        assert client.get("/health", headers=headers).status_code == 200
+    finally:
+        monkeypatch.undo()
+        importlib.reload(rl)
+        importlib.reload(main_mod)
+
+def test_route_template_is_matched_once_per_path():
+    import backend.core.ratelimit as rl
+    import backend.main as main_mod
+
+    rl._templates.clear()
+    scope = {"type": "http", "method": "GET", "path": "/sentiment/feed/TSLA", "app": main_mod.app}
+    assert rl._route_template(scope) == "/sentiment/feed/{ticker}"
+    assert rl._route_template({**scope, "path": "/sentiment/AAPL"}) == "/sentiment/{ticker}"
+    assert len(rl._templates) == 2
+
+    routes = main_mod.app.router.routes[:]
+    main_mod.app.router.routes.clear()
+    try:
+        # Cached: the routes are not walked again.
+        assert rl._route_template(scope) == "/sentiment/feed/{ticker}"
+    finally:
+        main_mod.app.router.routes.extend(routes)
+
+def test_gcra_refills_one_slot_per_interval():
+    now = [0.0]
+    limiter = RateLimiter(max_requests=3, window_seconds=30, clock=lambda: now[0])
+
+    assert [limiter.allow("k") for _ in range(4)] == [True, True, True, False]
+    assert limiter.retry_after("k") == 10.0
+
+    now[0] = 9.9
+    assert not limiter.allow("k")
+    now[0] = 10.0
+    assert limiter.allow("k")
+    assert not limiter.allow("k")
+
+def test_key_table_is_bounded_and_expires():
+    now = [0.0]
+    limiter = RateLimiter(max_requests=2, window_seconds=10, max_keys=100, clock=lambda: now[0])
 
-    r1 = client.get("/sentiment/TSLA", headers=headers)
-    assert r1.status_code == 200
+    for i in range(1000):
+        limiter.allow(f"ip-{i}")
+    assert len(limiter) == 100
+    assert limiter.stats()["evicted"] == 900
 
-    r2 = client.get("/sentiment/TSLA", headers=headers)
-    assert r2.status_code == 429, r2.text
-    assert "error" in r2.json()
\ No newline at end of file
+    now[0] = 60.0
+    limiter.allow("late")
+    assert len(limiter) == 1
@@ -0,0 +1,75 @@
+import importlib
+import os
+import subprocess
+import sys
+import threading
+import time
+
+from fastapi.testclient import TestClient
+
+
+def _reload(monkeypatch, mock):
+    monkeypatch.setenv("MOCK", "true" if mock else "false")
+    import backend.services.prefetch as prefetch_mod
+    import backend.services.warmup as warmup_mod
+    import backend.main as main_mod
+    monkeypatch.setattr(prefetch_mod, "PREFETCH_ENABLED", False)
+    importlib.reload(warmup_mod)
+    importlib.reload(main_mod)
+    return warmup_mod, main_mod
+
+
+def test_ready_waits_for_model_warmup(monkeypatch):
+    warmup_mod, main_mod = _reload(monkeypatch, mock=False)
+    gate = threading.Event()
+    calls = []
+
+    def warm_up(finbert=True):
+        calls.append(finbert)
+        gate.wait(5)
+        return {"vader": {"status": "ok", "ms": 1.0}, "finbert": {"status": "unavailable", "ms": 0.0, "error": "x"}}
+
+    monkeypatch.setattr(warmup_mod.scoring, "warm_up", warm_up)
+
+    with TestClient(main_mod.app) as client:
+        assert client.get("/health").status_code == 200
+        r = client.get("/ready")
+        assert r.status_code == 503
+        assert r.json()["status"] in ("pending", "warming")
+
+        gate.set()
+        deadline = time.monotonic() + 5
+        while (r := client.get("/ready")).status_code != 200 and time.monotonic() < deadline:
+            time.sleep(0.02)
+
+    assert r.status_code == 200
+    assert r.json()["status"] == "ready"
+    assert r.json()["models"]["vader"]["status"] == "ok"
+    assert calls == [True]
+
+
+def test_warm_up_runs_vader_without_touching_the_score_cache():
+    from backend.services import scoring
+
+    before = scoring.score_cache_stats()["vader"]
+    report = scoring.warm_up(finbert=False)
+    assert report["vader"]["status"] == "ok"
+    assert report["finbert"]["status"] == "skipped"
+    assert scoring.score_cache_stats()["vader"] == before
+
+
+def test_mock_mode_is_ready_immediately(monkeypatch):
+    _, main_mod = _reload(monkeypatch, mock=True)
+    with TestClient(main_mod.app) as client:
+        assert client.get("/ready").status_code == 200
+        assert client.get("/sentiment/TSLA", headers={"X-Forwarded-For": "10.19.0.1"}).status_code == 200
+
+
+def test_app_import_does_not_load_upstream_sdks():
+    code = (
+        "import sys, backend.main; "
+        "print(sorted(m for m in ('praw', 'newsapi', 'requests', 'transformers') if m in sys.modules))"
+    )
+    src = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    out = subprocess.run([sys.executable, "-c", code], cwd=src, capture_output=True, text=True, check=True)
+    assert out.stdout.strip() == "[]"
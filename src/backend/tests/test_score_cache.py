@@ -0,0 +1,60 @@
+def test_score_cache_is_lru_bounded():
+    from backend.services.scoring import ScoreCache
+
+    cache = ScoreCache("test-model", max_entries=2)
+    cache.put("a", 0.1)
+    cache.put("b", 0.2)
+    assert cache.get("a") == 0.1
+    cache.put("c", 0.3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 0.1
+    assert cache.get("c") == 0.3
+
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+
+def test_score_cache_key_normalizes_whitespace_and_model():
+    from backend.services.scoring import ScoreCache
+
+    v1 = ScoreCache("v1")
+    v2 = ScoreCache("v2")
+    assert v1.key("Apple  beats\nestimates ") == v1.key("Apple beats estimates")
+    assert v1.key("APPLE beats") != v1.key("apple beats")
+    assert v1.key("Apple beats") != v2.key("Apple beats")
+
+
+def test_finbert_only_sees_unseen_texts(monkeypatch):
+    import backend.services.scoring as scoring
+
+    seen = []
+
+    def runner(texts):
+        seen.append(list(texts))
+        return [0.5 for _ in texts]
+
+    monkeypatch.setattr(scoring, "_batcher", scoring.FinbertBatcher(window_ms=0, runner=runner))
+    monkeypatch.setattr(scoring, "_finbert_cache", scoring.ScoreCache("test-finbert"))
+
+    assert scoring.finbert_score(["one", "two", "one"]) == [0.5, 0.5, 0.5]
+    assert scoring.finbert_score(["two", "three"]) == [0.5, 0.5]
+
+    assert seen == [["one", "two"], ["three"]]
+    stats = scoring._finbert_cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 4
+
+
+def test_vader_score_is_cached(monkeypatch):
+    import backend.services.scoring as scoring
+
+    monkeypatch.setattr(scoring, "_vader_cache", scoring.ScoreCache("test-vader"))
+    first = scoring.vader_score("Shares surge after great earnings")
+    second = scoring.vader_score("Shares surge after great earnings")
+
+    assert first == second
+    assert scoring._vader_cache.stats()["hits"] == 1
@@ -0,0 +1,84 @@
+import time
+
+from backend.services import scoring
+
+STRONG = "Amazing, wonderful, excellent results! Great win!"
+
+
+def _items(texts):
+    return [{"source": "news", "text": t, "ts": None} for t in texts]
+
+
+def _batcher(monkeypatch, delay=0.0, text_ms=None):
+    sent = []
+
+    def runner(texts):
+        sent.append(list(texts))
+        time.sleep(delay)
+        return [0.5] * len(texts)
+
+    batcher = scoring.FinbertBatcher(window_ms=0, runner=runner)
+    batcher.text_ms = text_ms
+    monkeypatch.setattr(scoring, "_batcher", batcher)
+    scoring._finbert_cache.clear()
+    return sent
+
+
+def test_unambiguous_vader_scores_skip_finbert(monkeypatch):
+    sent = _batcher(monkeypatch)
+    texts = [STRONG, "Shares of the company moved on Tuesday", "Stock holds steady ahead of the report"]
+
+    scored = scoring.score_items(_items(texts), finbert_top_n=12, budget_ms=1000)
+
+    assert [t for batch in sent for t in batch] == texts[1:]
+    models = {s.text: s.model for s in scored}
+    assert models == {STRONG: "vader", texts[1]: "finbert", texts[2]: "finbert"}
+
+
+def test_no_budget_sends_the_whole_top_n(monkeypatch):
+    sent = _batcher(monkeypatch)
+    texts = [STRONG, "Shares of the company moved on Wednesday"]
+
+    scored = scoring.score_items(_items(texts), finbert_top_n=12, budget_ms=0)
+
+    assert sorted(t for batch in sent for t in batch) == sorted(texts)
+    assert all(s.model == "finbert" for s in scored)
+
+
+def test_top_n_shrinks_to_what_recent_latency_allows(monkeypatch):
+    sent = _batcher(monkeypatch, text_ms=50.0)
+    texts = [f"Plain update number {i} on the company" for i in range(6)]
+
+    scored = scoring.score_items(_items(texts), finbert_top_n=12, budget_ms=120)
+
+    assert len(sent) == 1 and len(sent[0]) == 2
+    assert sum(s.model == "finbert" for s in scored) == 2
+    assert scoring.finbert_batch_stats()["cascade"]["budget"] >= 4
+
+
+def test_deadline_falls_back_to_vader_and_caches_late_scores(monkeypatch):
+    _batcher(monkeypatch, delay=0.3)
+    text = "Quarterly filing published by the company"
+
+    start = time.perf_counter()
+    scored = scoring.score_items(_items([text]), finbert_top_n=12, budget_ms=50)
+    assert time.perf_counter() - start < 0.25
+    assert scored[0].model == "vader"
+    assert scored[0].score == scored[0].vader
+
+    deadline = time.monotonic() + 2
+    while scoring._finbert_cache.get(text) is None and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert scoring._finbert_cache.get(text) == 0.5
+
+
+def test_batcher_tracks_per_text_latency():
+    def runner(texts):
+        time.sleep(0.02)
+        return [0.0] * len(texts)
+
+    batcher = scoring.FinbertBatcher(window_ms=0, runner=runner)
+    assert batcher.affordable(100) is None
+    batcher.submit(["a", "b"]).result(timeout=2)
+    assert batcher.text_ms is not None and batcher.text_ms >= 5
+    assert batcher.affordable(batcher.text_ms * 3.5) == 3
@@ -0,0 +1,163 @@
+import importlib
+from fastapi.testclient import TestClient
+
+def test_batch_mock_mode(monkeypatch):
+    monkeypatch.setenv("MOCK", "true")
+
+    import backend.main as main_mod
+    importlib.reload(main_mod)
+
+    client = TestClient(main_mod.app)
+    r = client.get("/sentiment/batch?tickers=TSLA,aapl,NONEWS,XYZ", headers={"X-Forwarded-For": "10.0.1.1"})
+    assert r.status_code == 200
+    assert r.headers.get("x-cache") == "MOCK"
+
+    results = {item["ticker"]: item for item in r.json()["results"]}
+    assert list(results) == ["TSLA", "AAPL", "NONEWS", "XYZ"]
+    assert results["TSLA"]["sentiment"]["sentiment"] == 0.3
+    assert results["NONEWS"]["error"]["error"] == "NO_NEWS"
+    assert results["XYZ"]["error"]["status"] == 404
+
+
+def test_batch_serves_hits_and_combines_misses(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    import backend.main as main_mod
+    importlib.reload(sentiment_mod)
+    importlib.reload(main_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    calls = {"single_news": 0, "multi_news": [], "multi_reddit": [], "score_groups": []}
+
+    def fake_news(ticker):
+        calls["single_news"] += 1
+        return [{"source": "news", "text": f"{ticker} solo headline", "ts": None}]
+
+    def fake_reddit(ticker):
+        return [{"source": "reddit", "text": f"{ticker} solo post", "ts": None}]
+
+    def fake_news_multi(tickers):
+        calls["multi_news"].append(list(tickers))
+        return {t: [{"source": "news", "text": f"{t} up", "ts": None}] for t in tickers}
+
+    def fake_reddit_multi(tickers):
+        calls["multi_reddit"].append(list(tickers))
+        return {t: [{"source": "reddit", "text": f"{t} down", "ts": None}] for t in tickers}
+
+    def fake_score(items):
+        return [ScoredItem(source=it["source"], text=it["text"], score=0.3 if it["source"] == "news" else -0.1) for it in items]
+
+    def fake_score_items(items, finbert_top_n=12):
+        return fake_score(items)
+
+    def fake_score_groups(groups, finbert_top_n=12):
+        groups = [list(g) for g in groups]
+        calls["score_groups"].append(len(groups))
+        return [fake_score(g) for g in groups]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", fake_news)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", fake_reddit)
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items_multi", fake_news_multi)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items_multi", fake_reddit_multi)
+    monkeypatch.setattr(sentiment_mod, "score_items", fake_score_items)
+    monkeypatch.setattr(sentiment_mod, "score_groups", fake_score_groups)
+
+    client = TestClient(main_mod.app)
+    headers = {"X-Forwarded-For": "10.0.1.2"}
+
+    assert client.get("/sentiment/TSLA", headers=headers).status_code == 200
+
+    r = client.get("/sentiment/batch?tickers=TSLA,AAPL,MSFT", headers=headers)
+    assert r.status_code == 200
+    assert r.headers.get("x-cache") == "MIXED"
+
+    results = {item["ticker"]: item for item in r.json()["results"]}
+    assert results["TSLA"]["cache"] == "HIT"
+    assert results["AAPL"]["cache"] == "MISS"
+    assert results["MSFT"]["sentiment"]["sources"] == {"newsapi": 0.3, "reddit": -0.1}
+
+    assert calls["multi_news"] == [["AAPL", "MSFT"]]
+    assert calls["multi_reddit"] == [["AAPL", "MSFT"]]
+    assert calls["score_groups"] == [2]
+    assert calls["single_news"] == 1
+
+    r2 = client.get("/sentiment/AAPL", headers=headers)
+    assert r2.headers.get("x-cache") == "HIT"
+
+
+def test_news_multi_attributes_articles_by_mention(monkeypatch):
+    import backend.services.sentiment as sentiment_mod
+
+    queries = []
+
+    class FakeNewsApi:
+        def get_everything(self, q, language, page_size):
+            queries.append(q)
+            return {
+                "articles": [
+                    {"title": "AAPL and MSFT rally", "url": "u1"},
+                    {"title": "Why $MSFT is cheap", "url": "u2"},
+                    {"title": "Markets wrap", "description": "AAPLX is not AAPL", "url": "u3"},
+                ]
+            }
+
+    class FakeRegistry:
+        def newsapi(self):
+            return FakeNewsApi()
+
+    monkeypatch.setattr(sentiment_mod, "get_registry", lambda: FakeRegistry())
+    out = sentiment_mod.fetch_news_items_multi(["AAPL", "MSFT"])
+
+    assert queries == ["(AAPL OR MSFT) AND (stock OR shares OR earnings)"]
+    assert [i["id"] for i in out["AAPL"]] == ["u1", "u3"]
+    assert [i["id"] for i in out["MSFT"]] == ["u1", "u2"]
+
+
+async def test_batch_misses_share_single_flight_with_other_requests(monkeypatch):
+    import asyncio
+    import time
+
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+
+    from backend.services.scoring import ScoredItem
+
+    calls = {"single": [], "multi": []}
+
+    def slow_news(ticker):
+        calls["single"].append(ticker)
+        time.sleep(0.1)
+        return [{"source": "news", "text": f"{ticker} up", "ts": None}]
+
+    def slow_news_multi(tickers):
+        calls["multi"].append(list(tickers))
+        time.sleep(0.1)
+        return {t: [{"source": "news", "text": f"{t} up", "ts": None}] for t in tickers}
+
+    def fake_score(items):
+        return [ScoredItem(source=it["source"], text=it["text"], score=0.3 if it["source"] == "news" else -0.1) for it in items]
+
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", slow_news)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: [{"source": "reddit", "text": f"{t} down", "ts": None}])
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items_multi", slow_news_multi)
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items_multi", lambda ts: {t: [{"source": "reddit", "text": f"{t} down", "ts": None}] for t in ts})
+    monkeypatch.setattr(sentiment_mod, "score_items", lambda items, finbert_top_n=12: fake_score(items))
+    monkeypatch.setattr(sentiment_mod, "score_groups", lambda groups, finbert_top_n=12: [fake_score(list(g)) for g in groups])
+
+    single, batch, other_batch = await asyncio.gather(
+        sentiment_mod.get_documents("AAPL", None),
+        sentiment_mod.get_sentiment_batch(["AAPL", "MSFT"], None),
+        sentiment_mod.get_sentiment_batch(["MSFT", "AAPL"], None),
+    )
+
+    # AAPL is computed once by the single request, MSFT once by the first batch.
+    assert calls["single"] == ["AAPL"]
+    assert calls["multi"] == [["MSFT"]]
+    assert single[1] == "MISS"
+    assert {r["ticker"]: r["cache"] for r in batch[0]} == {"AAPL": "HIT", "MSFT": "MISS"}
+    assert {r["ticker"]: r["cache"] for r in other_batch[0]} == {"MSFT": "HIT", "AAPL": "HIT"}
+    assert all(r["sentiment"]["sources"] == {"newsapi": 0.3, "reddit": -0.1} for r in batch[0] + other_batch[0])
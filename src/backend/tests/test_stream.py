@@ -0,0 +1,88 @@
+import asyncio
+import importlib
+import json
+from types import SimpleNamespace
+
+from backend.core.pubsub import Broker
+
+
+def test_broker_fans_out_and_skips_repeats():
+    b = Broker()
+    s1 = b.subscribe(["AAPL"])
+    s2 = b.subscribe(["AAPL", "MSFT"])
+
+    assert b.publish("AAPL", {"v": 1}) == 2
+    assert b.publish("AAPL", {"v": 1}) == 0
+    assert b.publish("NFLX", {"v": 1}) == 0
+    assert b.stats()["suppressed"] == 1
+
+    b.unsubscribe(s1)
+    assert b.stats()["subscribers"] == 1
+    assert b.publish("AAPL", {"v": 2}) == 1
+    assert s2.dropped == 1
+
+
+async def test_slow_subscriber_only_gets_latest_value():
+    b = Broker()
+    sub = b.subscribe(["AAPL", "MSFT"])
+    for i in range(100):
+        b.publish("AAPL", i)
+    b.publish("MSFT", "x")
+
+    assert await sub.next(timeout=0.1) == {"AAPL": 99, "MSFT": "x"}
+    assert await sub.next(timeout=0.01) is None
+    assert sub.dropped == 99
+
+
+def test_subscriber_limit():
+    b = Broker(max_subscribers=1)
+    assert b.subscribe(["AAPL"]) is not None
+    assert b.subscribe(["AAPL"]) is None
+
+
+async def test_stream_pushes_changed_sentiment(monkeypatch):
+    monkeypatch.setenv("MOCK", "false")
+
+    import backend.services.sentiment as sentiment_mod
+    importlib.reload(sentiment_mod)
+    import backend.services.stream as stream_mod
+
+    from backend.services.scoring import ScoredItem
+
+    monkeypatch.setattr(stream_mod, "_ensure_keeper", lambda: None)
+    monkeypatch.setattr(sentiment_mod, "fetch_news_items", lambda t: [{"source": "news", "text": "up", "ts": None}])
+    monkeypatch.setattr(sentiment_mod, "fetch_reddit_items", lambda t: [{"source": "reddit", "text": "down", "ts": None}])
+    monkeypatch.setattr(
+        sentiment_mod,
+        "score_items",
+        lambda items, finbert_top_n=12: [ScoredItem(source=it["source"], text=it["text"], score=0.4 if it["source"] == "news" else -0.1) for it in items],
+    )
+
+    async def is_disconnected():
+        return False
+
+    request = SimpleNamespace(state=SimpleNamespace(request_id="test"), is_disconnected=is_disconnected)
+
+    subscribers = stream_mod.broker.stats()["subscribers"]
+    events = stream_mod.sentiment_events(stream_mod.check_tickers(["tsla"], request), request)
+    # Nothing is held until the response is actually streamed.
+    assert stream_mod.broker.stats()["subscribers"] == subscribers
+
+    first = await events.__anext__()
+    assert first.startswith("event: sentiment\n")
+    assert json.loads(first.split("data: ", 1)[1])["sentiment"] == 0.15
+    # The miss above published the same value; it is not queued a second time.
+    assert all(not sub._pending for sub in stream_mod.broker._subs["TSLA"])
+
+    # Same value again is not pushed; a changed refresh is.
+    docs, _ = await sentiment_mod._cache.peek("docs:TSLA")
+    sentiment_mod._cache.set("docs:TSLA", docs, ttl_seconds=300, stale_seconds=60)
+    changed = sentiment_mod._document_set("TSLA", [ScoredItem(source="news", text="great", score=0.8), ScoredItem(source="reddit", text="ok", score=0.2)])
+    sentiment_mod._cache.set("docs:TSLA", changed, ttl_seconds=300, stale_seconds=60)
+
+    second = await asyncio.wait_for(events.__anext__(), 1)
+    assert json.loads(second.split("data: ", 1)[1])["sentiment"] == 0.5
+
+    await events.aclose()
+    assert "TSLA" not in stream_mod.broker.topics()
+    assert stream_mod.broker.stats()["subscribers"] == subscribers
@@ -0,0 +1,142 @@
+import random
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import backend.services.sentiment as sentiment_mod
+from backend.services import scoring
+
+WORDS = ["beats", "misses", "great", "terrible", "steady", "soars", "crashes", "strong", "weak", "lawsuit", "record"]
+
+
+def _item(source, i, rng, now):
+    return {
+        "source": source,
+        "text": " ".join(rng.choice(WORDS) for _ in range(4)) + f" #{source}{i}",
+        "ts": now - timedelta(minutes=rng.randrange(1, 3000)),
+        "id": f"{source}-{i}",
+        "origin": "Reuters" if source == "news" else "r/stocks",
+    }
+
+
+@pytest.fixture
+def deep_window(monkeypatch):
+    rng = random.Random(11)
+    now = datetime.now(timezone.utc)
+    news = [_item("news", i, rng, now) for i in range(700)]
+    reddit = {sub: [_item("reddit", f"{sub}{i}", rng, now) for i in range(150)] for sub in sentiment_mod.SUBREDDITS}
+    produced = {"n": 0}
+
+    def counted(items):
+        for it in items:
+            produced["n"] += 1
+            yield it
+
+    chunks = []
+    real = scoring.score_items
+
+    def score_items(items, finbert_top_n=12, budget_ms=None):
+        chunks.append(len(items))
+        return real(items, finbert_top_n=0)
+
+    monkeypatch.setattr(sentiment_mod, "STREAM_CHUNK_SIZE", 50)
+    monkeypatch.setattr(sentiment_mod, "STREAM_KEEP_DOCS", 20)
+    monkeypatch.setattr(sentiment_mod, "iter_news_items", lambda ticker: counted(news))
+    monkeypatch.setattr(sentiment_mod, "iter_reddit_items", lambda ticker, sub: counted(reddit[sub]))
+    monkeypatch.setattr(sentiment_mod, "score_items", score_items)
+    return news + [it for sub in sentiment_mod.SUBREDDITS for it in reddit[sub]], chunks, produced
+
+
+async def test_streamed_window_matches_full_aggregate(deep_window):
+    items, chunks, produced = deep_window
+
+    docset = await sentiment_mod._streamed_documents("TSLA", None)
+    full, _ = sentiment_mod._aggregate("TSLA", [sentiment_mod._document(s) for s in scoring.score_items(items, finbert_top_n=0)])
+
+    assert produced["n"] == len(items)
+    assert max(chunks) <= 50 and sum(chunks) == len(items)
+
+    payload = docset["sentiment"]
+    assert payload["sentiment"] == pytest.approx(full["sentiment"], abs=1e-4)
+    assert payload["sources"] == pytest.approx(full["sources"], abs=1e-4)
+    assert payload["confidence"] == pytest.approx(full["confidence"], abs=1e-4)
+    assert [h["text"] for h in payload["highlights"]] == [h["text"] for h in full["highlights"]]
+    assert payload["scoring"] == {"finbert": 0, "vader": len(items)}
+
+    kept = docset["items"]
+    assert len(kept) == 20
+    newest = sorted((it for it in items), key=lambda it: it["ts"], reverse=True)[:20]
+    assert [d["text"] for d in kept] == [it["text"] for it in newest]
+
+
+def test_news_pages_stop_at_depth(monkeypatch):
+    calls = []
+
+    class FakeNews:
+        def get_everything(self, q, language, page_size, page):
+            calls.append((page, page_size))
+            total = 230
+            start = (page - 1) * page_size
+            return {"articles": [{"title": f"headline {i}", "url": f"u{i}"} for i in range(start, min(total, start + page_size))]}
+
+    class FakeRegistry:
+        def newsapi(self):
+            return FakeNews()
+
+    monkeypatch.setattr(sentiment_mod, "get_registry", lambda: FakeRegistry())
+
+    assert len(list(sentiment_mod.iter_news_items("TSLA", depth=150))) == 150
+    assert calls == [(1, 100), (2, 100)]
+
+    calls.clear()
+    assert len(list(sentiment_mod.iter_news_items("TSLA", depth=1000))) == 230
+    assert calls == [(1, 100), (2, 100), (3, 100)]
+
+
+def test_chunks_share_one_scoring_deadline(monkeypatch):
+    budgets = []
+
+    def slow_score_items(items, finbert_top_n=12, budget_ms=None):
+        budgets.append(budget_ms)
+        time.sleep(0.03)
+        return scoring.score_items(items, finbert_top_n=0)
+
+    monkeypatch.setattr(sentiment_mod, "score_items", slow_score_items)
+    items = [{"source": "news", "text": f"steady #{i}", "ts": None, "id": str(i), "origin": "AP"} for i in range(50)]
+
+    agg = sentiment_mod._fold(lambda: iter(items), 10, deadline=time.monotonic() + 0.1)
+
+    assert len(agg) == 50 and len(budgets) == 5
+    assert budgets[0] <= 100
+    assert budgets == sorted(budgets, reverse=True)
+    # Chunks after the deadline get a budget that is spent, never 0 (no budget).
+    assert budgets[-1] == sentiment_mod._MIN_CHUNK_BUDGET_MS
+
+    budgets.clear()
+    sentiment_mod._fold(lambda: iter(items), 25)
+    assert budgets == [0.0, 0.0]
+
+
+def test_news_page_error_keeps_earlier_pages(monkeypatch):
+    class FakeNews:
+        def get_everything(self, q, language, page_size, page):
+            if page == 3:
+                raise RuntimeError("rateLimited")
+            return {"articles": [{"title": f"headline {page}-{i}", "url": f"u{page}-{i}"} for i in range(page_size)]}
+
+    class FakeRegistry:
+        def newsapi(self):
+            return FakeNews()
+
+    monkeypatch.setattr(sentiment_mod, "get_registry", lambda: FakeRegistry())
+    monkeypatch.setattr(sentiment_mod, "NEWSAPI_PAGE_SIZE", 10)
+
+    assert len(list(sentiment_mod.iter_news_items("TSLA", depth=100))) == 20
+
+    def down(self, q, language, page_size, page):
+        raise RuntimeError("down")
+
+    monkeypatch.setattr(FakeNews, "get_everything", down)
+    with pytest.raises(RuntimeError, match="down"):
+        list(sentiment_mod.iter_news_items("TSLA", depth=100))
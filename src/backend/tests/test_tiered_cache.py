@@ -0,0 +1,151 @@
+import asyncio
+import time
+
+from backend.core.resp import FakeRedisServer, RespClient
+from backend.core.tiered_cache import TieredCache
+
+
+async def test_resp_client_round_trip():
+    server = await FakeRedisServer().start()
+    client = RespClient.from_url(server.url)
+    try:
+        assert await client.ping()
+        assert await client.get("missing") is None
+        assert await client.set("k", "v", px=10_000)
+        assert await client.get("k") == b"v"
+        assert not await client.set("k", "other", nx=True)
+        assert await client.delete("k") == 1
+    finally:
+        await client.close()
+        await server.stop()
+
+
+async def test_workers_share_one_compute():
+    server = await FakeRedisServer().start()
+    workers = [TieredCache(RespClient.from_url(server.url), lock_poll_ms=5) for _ in range(3)]
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return {"ticker": "TSLA", "sentiment": 0.3}
+
+    try:
+        results = await asyncio.gather(
+            *[w.get_or_compute_swr("sentiment:TSLA", 300, 60, compute) for w in workers for _ in range(4)]
+        )
+        assert calls == 1
+        assert all(value == {"ticker": "TSLA", "sentiment": 0.3} for value, _ in results)
+        assert sorted(status for _, status in results).count("MISS") == 1
+
+        value, status = await workers[0].get_or_compute_swr("sentiment:TSLA", 300, 60, compute)
+        assert status == "HIT"
+        assert calls == 1
+    finally:
+        for w in workers:
+            await w.close()
+        await server.stop()
+
+
+async def test_unreachable_l2_falls_back_to_compute():
+    server = await FakeRedisServer().start()
+    url = server.url
+    await server.stop()
+
+    cache = TieredCache(RespClient.from_url(url, timeout=0.2))
+
+    async def compute():
+        return 42
+
+    value, status = await cache.get_or_compute_swr("k", 60, 30, compute)
+    assert (value, status) == (42, "MISS")
+    assert cache.stats()["l2_errors"] > 0
+
+    value, status = await cache.get_or_compute_swr("k", 60, 30, compute)
+    assert (value, status) == (42, "HIT")
+
+    # With L2 down, L1 keeps the value for the full stale window, not the L1 cap.
+    assert cache.l1.get_entry("k").stale_at - time.monotonic() > cache.l1_ttl_seconds + 20
+
+
+
+
+async def test_release_leaves_a_lock_retaken_after_expiry():
+    server = await FakeRedisServer().start()
+    cache = TieredCache(RespClient.from_url(server.url), lock_ttl_ms=50)
+    other = RespClient.from_url(server.url)
+    lock_key = cache._lock_key("sentiment:AMD")
+    execute = cache.client.execute
+    sent = []
+
+    async def recording_execute(*args):
+        sent.append(args[0])
+        return await execute(*args)
+
+    try:
+        token = await cache._acquire("sentiment:AMD")
+        assert token
+
+        # Our lock expires mid-compute and another worker takes it over.
+        await asyncio.sleep(0.08)
+        assert await other.set(lock_key, "theirs", px=10_000, nx=True)
+
+        cache.client.execute = recording_execute
+        await cache._release("sentiment:AMD", token)
+        assert await other.get(lock_key) == b"theirs"
+        # One compare-and-delete round trip: nothing can expire between a read and a DEL.
+        assert sent == ["EVAL"]
+
+        assert await other.delete_if_equals(lock_key, "theirs")
+        assert await other.get(lock_key) is None
+    finally:
+        await cache.close()
+        await other.close()
+        await server.stop()
+
+
+async def test_claim_is_exclusive_across_workers():
+    server = await FakeRedisServer().start()
+    a, b = (TieredCache(RespClient.from_url(server.url)) for _ in range(2))
+    try:
+        async with a.claim("docs:AMD") as owner:
+            assert owner
+            async with b.claim("docs:AMD") as other:
+                assert not other
+            async with a.claim("docs:AMD") as same_worker:
+                assert not same_worker
+            await a.store("docs:AMD", {"ticker": "AMD"}, 300, 60)
+
+        async with b.claim("docs:AMD") as owner:
+            assert owner
+        assert await b.peek("docs:AMD") == ({"ticker": "AMD"}, "HIT")
+    finally:
+        await a.close()
+        await b.close()
+        await server.stop()
+
+
+async def test_l2_hits_fill_l1_without_re_encoding(monkeypatch):
+    import backend.core.cache as cache_mod
+
+    server = await FakeRedisServer().start()
+    writer, reader = (TieredCache(RespClient.from_url(server.url)) for _ in range(2))
+
+    async def compute():
+        return {"ticker": "AMD", "items": ["x" * 100] * 10}
+
+    try:
+        await writer.get_or_compute_swr("docs:AMD", 300, 60, compute)
+
+        def no_estimate(value):
+            raise AssertionError("L2 hits already know the encoded size")
+
+        monkeypatch.setattr(cache_mod, "_estimate_size", no_estimate)
+        value, status = await reader.get_or_compute_swr("docs:AMD", 300, 60, compute)
+        assert status == "HIT"
+        assert reader.l1.stats()["bytes"] > 1000
+    finally:
+        await writer.close()
+        await reader.close()
+        await server.stop()